@@ -9,7 +9,8 @@ the unit tests to exercise the upsert logic without requiring external
 infrastructure.
 """
 
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError
 import os
 import mongomock
 from urllib.parse import urlparse
@@ -75,6 +76,45 @@ class AiStockDatabase:
             except Exception as e:
                 print(f"Error upserting record {record}: {e}")
 
+    def bulk_upsert_records(self, records, key_fields=("Ticker",)):
+        """Upsert many records with one unordered ``bulk_write``.
+
+        Returns a list of ``(record, error_message)`` tuples for rows that
+        failed, either before sending (no key fields) or server-side.
+        """
+        ops = []
+        op_records = []
+        failures = []
+        for record in records:
+            query = {k: record[k] for k in key_fields if k in record}
+            if not query:
+                failures.append((record, "No key fields found in record for upsert."))
+                continue
+            payload = {k: v for k, v in record.items() if k != "_id"}
+            ops.append((query, payload))
+            op_records.append(record)
+        if not ops:
+            return failures
+        if isinstance(self.collection, mongomock.Collection):
+            # mongomock's bulk builder lags pymongo's UpdateOne signature.
+            for (query, payload), record in zip(ops, op_records):
+                try:
+                    self.collection.update_one(query, {"$set": payload}, upsert=True)
+                except Exception as exc:
+                    failures.append((record, str(exc)))
+            return failures
+        try:
+            self.collection.bulk_write(
+                [UpdateOne(query, {"$set": payload}, upsert=True) for query, payload in ops],
+                ordered=False,
+            )
+        except BulkWriteError as exc:
+            for err in exc.details.get("writeErrors", []):
+                idx = err.get("index")
+                record = op_records[idx] if isinstance(idx, int) and idx < len(op_records) else None
+                failures.append((record, err.get("errmsg") or str(err)))
+        return failures
+
 # Example usage for manual testing
 if __name__ == "__main__":
     db = AiStockDatabase()
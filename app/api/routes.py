@@ -2,10 +2,12 @@ from collections import defaultdict
 from datetime import date, timedelta, datetime, timezone
 import math
 import re
+import time
 from typing import Annotated, List
 from uuid import uuid4
 from zoneinfo import ZoneInfo
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from pymongo import MongoClient
 import yfinance as yf
@@ -37,11 +39,40 @@ from app.services.stock_live_comparison import (
     run_stock_live_comparison_with_optional_sharding,
 )
 from app.services.ibkr_service import fetch_and_store_nav_report
-from app.database import get_db
+from app.database import get_db, get_mongo_client
 from app.services.signal_service import SignalService
 from app.services.ibkr_tws_service import get_ibkr_tws_service
 from app.services.data_refresh_queue import get_data_refresh_queue
 from app.services.instrument_identity import canonical_instrument_key
+from app.services.async_repository import AsyncMongoRepository
+from app.services.holdings_latest import get_latest_holdings, holdings_snapshot_query
+from app.services.position_marks import apply_snapshot_heartbeat
+from app.services.response_cache import (
+    HOLDINGS,
+    JUICYS,
+    NAV,
+    STOCKS,
+    cached_response,
+    cached_response_async,
+    get_response_cache,
+    reset_response_cache,
+)
+from app.services.stock_query import (
+    StockQueryError,
+    build_stock_filter,
+    build_stock_projection,
+    clamp_page_size,
+    cursor_filter,
+    decode_cursor,
+    encode_cursor,
+    etag_matches,
+    etag_pipeline,
+    parse_stock_sort,
+    sort_spec,
+    stock_data_etag,
+)
+from app.services.price_history_store import DOWNSAMPLE_INTERVALS, fetch_downsampled_history, history_sort_field
+from app.services.index_registry import explain_query_shapes, reconcile_indexes
 from app.services.juicy_service import (
     build_juicy_candidates,
     compute_latest_market_close_utc,
@@ -769,10 +800,26 @@ def _normalize_order_row(order: dict) -> dict:
     return normalized
 
 
-def _market_context_for_ticker(db, ticker: str | None) -> dict:
-    if not ticker:
-        return {}
-    doc = db.stock_data.find_one({"Ticker": ticker}, {"_id": 0}) or {}
+# stock_data fields read by _market_context_from_doc.
+_MARKET_CONTEXT_PROJECTION = {
+    "_id": 0,
+    "Ticker": 1,
+    "Current Price": 1,
+    "1D % Change": 1,
+    "YoY Price %": 1,
+    "Call/Put Skew": 1,
+    "TSMOM_60": 1,
+    "MA_200": 1,
+    "EMA_20": 1,
+    "HMA_20": 1,
+    "Div Yield": 1,
+    "dividendRate": 1,
+    "trailingAnnualDividendRate": 1,
+    "exDividendDate": 1,
+}
+
+
+def _market_context_from_doc(doc) -> dict:
     if not isinstance(doc, dict):
         doc = {}
 
@@ -800,10 +847,30 @@ def _market_context_for_ticker(db, ticker: str | None) -> dict:
     }
 
 
-def _load_pending_order_summaries(db, coverage_by_account) -> dict[tuple[str, str], dict]:
+def _load_market_context(db, tickers) -> dict[str, dict]:
+    """Market context for every ticker in one ``$in`` read of stock_data."""
+    symbols = sorted({t for t in tickers if t})
+    docs = {}
+    if symbols:
+        for doc in db.stock_data.find({"Ticker": {"$in": symbols}}, _MARKET_CONTEXT_PROJECTION):
+            docs[doc.get("Ticker")] = doc
+    return {sym: _market_context_from_doc(docs.get(sym)) for sym in symbols}
+
+
+def _market_context_for_ticker(db, ticker: str | None) -> dict:
+    if not ticker:
+        return {}
+    return _load_market_context(db, [ticker]).get(ticker, {})
+
+
+def _load_pending_order_summaries(db, coverage_by_account, underlyings=None) -> dict[tuple[str, str], dict]:
+    # Pending intent should be derived from realtime working orders only.
+    query = {"source": "tws_open_order"}
+    if underlyings is not None:
+        symbols = sorted({s for s in underlyings if s})
+        query["$or"] = [{"underlying_symbol": {"$in": symbols}}, {"symbol": {"$in": symbols}}]
     try:
-        # Pending intent should be derived from realtime working orders only.
-        orders = list(db.ibkr_orders.find({"source": "tws_open_order"}, {"_id": 0}))
+        orders = list(db.ibkr_orders.find(query, {"_id": 0}))
     except Exception:
         orders = []
 
@@ -1012,23 +1079,11 @@ def _normalize_portfolio_row(row: dict) -> dict:
 
 
 def _latest_holdings_query_for_source(db, source: str | None) -> dict | None:
-    if source == "tws":
-        latest = db.ibkr_holdings.find_one({"source": "tws"}, sort=[("date", -1)])
-    elif source == "flex":
-        latest = db.ibkr_holdings.find_one({"source": "flex"}, sort=[("date", -1)])
-        if not latest:
-            latest = db.ibkr_holdings.find_one({"source": {"$exists": False}}, sort=[("date", -1)])
-    else:
-        latest = db.ibkr_holdings.find_one(sort=[("date", -1)])
-
+    latest = get_latest_holdings(db, source)
     if not latest:
         return None
 
-    snapshot_id = latest.get("snapshot_id")
-    if snapshot_id:
-        query = {"snapshot_id": snapshot_id}
-    else:
-        query = {"report_date": latest.get("report_date")}
+    query = holdings_snapshot_query(latest)
 
     if source == "tws":
         query["source"] = "tws"
@@ -1088,14 +1143,12 @@ def _merge_portfolio_rows(base_row: dict, incoming_row: dict) -> dict:
 
 
 def _load_portfolio_holdings_rows(db) -> list[dict]:
-    latest_tws = db.ibkr_holdings.find_one({"source": "tws"}, sort=[("date", -1)])
-    latest_flex = db.ibkr_holdings.find_one({"source": "flex"}, sort=[("date", -1)])
-    if not latest_flex:
-        latest_flex = db.ibkr_holdings.find_one({"source": {"$exists": False}}, sort=[("date", -1)])
+    latest_tws = get_latest_holdings(db, "tws")
+    latest_flex = get_latest_holdings(db, "flex")
 
     tws_is_stale = False
     if latest_tws and latest_flex:
-        tws_timestamp = _parse_datetime_utc(latest_tws.get("date") or latest_tws.get("last_tws_update"))
+        tws_timestamp = _parse_datetime_utc(latest_tws.get("last_tws_update") or latest_tws.get("date"))
         threshold_mins = _get_freshness_threshold_minutes(db=db).get(
             "price_open_min" if _is_us_equity_market_session() else "price_closed_min",
             15,
@@ -1115,7 +1168,10 @@ def _load_portfolio_holdings_rows(db) -> list[dict]:
         if key in seen_queries:
             continue
         seen_queries.add(key)
-        row_groups.append((source, list(db.ibkr_holdings.find(query, {"_id": 0}))))
+        rows = list(db.ibkr_holdings.find(query, {"_id": 0}))
+        if source == "tws":
+            rows = apply_snapshot_heartbeat(rows, latest_tws)
+        row_groups.append((source, rows))
 
     if not row_groups:
         fallback_query = _latest_holdings_query_for_source(db, None)
@@ -1147,7 +1203,7 @@ async def login_for_access_token(
 ):
     # Authenticate against MongoDB
     logger.debug(f"Login attempt for user: {form_data.username}")
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     try:
         user = db.users.find_one({"username": form_data.username})
@@ -1228,25 +1284,86 @@ def ingest_frontend_log(
 @router.get("/stocks", response_model=List[StockRecord])
 @log_endpoint
 async def get_stocks(
-    current_user: Annotated[User, Depends(get_current_active_user)]
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    response: Response,
+    limit: int | None = None,
+    cursor: str | None = None,
+    fields: str | None = None,
+    sort: str | None = None,
+    order: str = "asc",
+    tickers: str | None = None,
+    search: str | None = None,
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
     """
-    Fetch all stock records from MongoDB.
+    Fetch stock records from MongoDB.
+
+    Without parameters every record is returned with every field, sorted by
+    Ticker. ``fields`` takes a preset (``grid``) or a comma-separated list;
+    ``tickers`` / ``search`` filter by ticker list / prefix; ``sort`` and
+    ``order`` sort server-side. With ``limit`` the response is one page and
+    the ``X-Next-Cursor`` header carries the ``cursor`` for the next one.
+    The weak ``ETag`` changes whenever a matching row is persisted; a
+    matching ``If-None-Match`` returns 304.
     """
     try:
-        # Connect to Mongo (Connection pooling is handled by driver, simple connect here is fine for now)
-        client = MongoClient(settings.MONGO_URI)
-        db = client["stock_analysis"]
-        collection = db["stock_data"]
-        
-        # Fetch all records, exclude internal Mongo ID
-        cursor = collection.find({}, {"_id": 0})
-        results = list(cursor)
-        
-        return results
+        projection = build_stock_projection(fields)
+        base_query = build_stock_filter(tickers, search)
+        sort_field, direction = parse_stock_sort(sort, order)
+        page_size = clamp_page_size(limit)
+        query = base_query
+        if cursor:
+            after = cursor_filter(decode_cursor(cursor), sort_field, direction)
+            query = {"$and": [base_query, after]} if base_query else after
+    except StockQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(projection) > 1:
+        # Keyset cursors need the sort value on every row.
+        projection[sort_field] = 1
+
+    repo = AsyncMongoRepository(factory=MongoClient)
+    request_shape = {
+        "limit": page_size,
+        "cursor": cursor,
+        "fields": fields,
+        "sort": [sort_field, direction],
+        "tickers": tickers,
+        "search": search,
+    }
+
+    async def _load_page():
+        # Non-blocking reads; exclude internal Mongo ID
+        summary = next(iter(await repo.aggregate("stock_data", etag_pipeline(base_query))), None)
+        rows = await repo.list_stock_data(
+            query,
+            projection,
+            sort=sort_spec(sort_field, direction),
+            limit=page_size + 1 if page_size else 0,
+        )
+        next_cursor = None
+        if page_size and len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = encode_cursor(rows[-1], sort_field)
+        return {"etag": stock_data_etag(summary, request_shape), "rows": rows, "next_cursor": next_cursor}
+
+    try:
+        page = await cached_response_async(
+            get_mongo_client(MongoClient).get_default_database("stock_analysis"),
+            "stocks",
+            request_shape,
+            [STOCKS],
+            _load_page,
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
+    if etag_matches(if_none_match, page["etag"]):
+        return Response(status_code=304, headers={"ETag": page["etag"]})
+    if page["next_cursor"]:
+        response.headers["X-Next-Cursor"] = page["next_cursor"]
+    response.headers["ETag"] = page["etag"]
+    return page["rows"]
+
 @router.post("/run/portfolio-fixer")
 @log_endpoint
 def run_portfolio_fixer_endpoint(
@@ -1293,7 +1410,7 @@ def get_job_status(
 
 
 def _run_juicy_refresh(symbols: list[str] | None = None) -> dict:
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     symbol_list = [s for s in (symbols or []) if _normalize_ticker_symbol(s)]
     if not symbol_list:
@@ -1325,8 +1442,27 @@ def get_juicys(
     sort_dir: str = "desc",
     wheel_mode: str = "auto",
 ):
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
+    return cached_response(
+        db,
+        "juicys",
+        {
+            "symbol": symbol,
+            "preset": preset,
+            "limit": limit,
+            "sort_by": sort_by,
+            "sort_dir": sort_dir,
+            "wheel_mode": wheel_mode,
+        },
+        [JUICYS, HOLDINGS, STOCKS],
+        lambda: _load_juicys(db, symbol, preset, limit, sort_by, sort_dir, wheel_mode),
+        # An empty result triggers a seed refresh; never serve it from cache.
+        cacheable=lambda payload: payload.get("count", 0) > 0,
+    )
+
+
+def _load_juicys(db, symbol, preset, limit, sort_by, sort_dir, wheel_mode) -> dict:
     norm_symbol = _normalize_ticker_symbol(symbol) if symbol else None
     owned_symbols = get_owned_symbols(db)
     rows = get_juicy_rows(
@@ -1409,13 +1545,8 @@ def _validate_review_state_transition(current_state: str, next_state: str):
 
 
 def _get_fr_collection(db):
-    coll = db.juicy_fr_followup_reviews
-    try:
-        coll.create_index("fr_id", unique=True)
-        coll.create_index([("status", 1), ("strategy_type", 1), ("updated_at", -1)])
-    except Exception:
-        pass
-    return coll
+    # Indexes are reconciled at startup (app.services.index_registry).
+    return db.juicy_fr_followup_reviews
 
 
 @router.get("/juicys/followup-review", response_model=FRListResponse)
@@ -1427,7 +1558,7 @@ def list_juicy_followup_review_items(
     review_state: FRReviewState | None = None,
     limit: int = 200,
 ):
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     coll = _get_fr_collection(db)
 
@@ -1450,7 +1581,7 @@ def create_juicy_followup_review_item(
     payload: FRCreateRequest,
     current_user: Annotated[User, Depends(get_current_active_user)],
 ):
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     coll = _get_fr_collection(db)
 
@@ -1490,7 +1621,7 @@ def update_juicy_followup_review_item(
     payload: FRUpdateRequest,
     current_user: Annotated[User, Depends(get_current_active_user)],
 ):
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     coll = _get_fr_collection(db)
 
@@ -1661,9 +1792,13 @@ class StockAnalysisHttpConfig(BaseModel):
     download_batch_size: int = 6
     batch_pause_sec: float = 8.0
     request_throttle_interval_sec: float = 1.5
+    fetch_max_workers: int = 4
+    price_action_workers: int = 0
+    adaptive_rate_enabled: bool = True
     scheduler_sharding_enabled: bool = False
     scheduler_shard_size: int = 25
     scheduler_shard_pause_sec: float = 20.0
+    scheduler_shard_workers: int = 1
 
 
 def _get_stock_analysis_http_settings(db=None):
@@ -1671,13 +1806,17 @@ def _get_stock_analysis_http_settings(db=None):
         "download_batch_size": 6,
         "batch_pause_sec": 8.0,
         "request_throttle_interval_sec": 1.5,
+        "fetch_max_workers": 4,
+        "price_action_workers": 0,
+        "adaptive_rate_enabled": True,
         "scheduler_sharding_enabled": False,
         "scheduler_shard_size": 25,
         "scheduler_shard_pause_sec": 20.0,
+        "scheduler_shard_workers": 1,
     }
     client = None
     if db is None:
-        client = MongoClient(settings.MONGO_URI)
+        client = get_mongo_client(MongoClient)
         db = client.get_default_database("stock_analysis")
 
     doc = db.system_config.find_one({"_id": "stock_analysis_http_config"}) or {}
@@ -1699,6 +1838,27 @@ def _get_stock_analysis_http_settings(db=None):
     except (TypeError, ValueError):
         merged["request_throttle_interval_sec"] = defaults["request_throttle_interval_sec"]
 
+    try:
+        merged["fetch_max_workers"] = max(1, int(merged["fetch_max_workers"]))
+    except (TypeError, ValueError):
+        merged["fetch_max_workers"] = defaults["fetch_max_workers"]
+
+    try:
+        merged["price_action_workers"] = max(0, int(merged["price_action_workers"]))
+    except (TypeError, ValueError):
+        merged["price_action_workers"] = defaults["price_action_workers"]
+
+    raw_adaptive_rate = merged.get("adaptive_rate_enabled", defaults["adaptive_rate_enabled"])
+    if isinstance(raw_adaptive_rate, str):
+        merged["adaptive_rate_enabled"] = raw_adaptive_rate.strip().lower() in {
+            "1",
+            "true",
+            "yes",
+            "on",
+        }
+    else:
+        merged["adaptive_rate_enabled"] = bool(raw_adaptive_rate)
+
     raw_scheduler_enabled = merged.get("scheduler_sharding_enabled", defaults["scheduler_sharding_enabled"])
     if isinstance(raw_scheduler_enabled, str):
         merged["scheduler_sharding_enabled"] = raw_scheduler_enabled.strip().lower() in {
@@ -1720,6 +1880,11 @@ def _get_stock_analysis_http_settings(db=None):
     except (TypeError, ValueError):
         merged["scheduler_shard_pause_sec"] = defaults["scheduler_shard_pause_sec"]
 
+    try:
+        merged["scheduler_shard_workers"] = max(1, int(merged["scheduler_shard_workers"]))
+    except (TypeError, ValueError):
+        merged["scheduler_shard_workers"] = defaults["scheduler_shard_workers"]
+
     return merged
 
 @router.get("/schedule", response_model=ScheduleConfig)
@@ -1749,7 +1914,7 @@ def update_schedule(
 def get_data_freshness_config(
     current_user: Annotated[User, Depends(get_current_active_user)]
 ):
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     merged = _get_freshness_threshold_minutes(db=db)
     return DataFreshnessConfig(**merged)
@@ -1764,7 +1929,7 @@ def update_data_freshness_config(
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     payload = config.model_dump()
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     db.system_config.update_one(
         {"_id": "data_freshness_config"},
@@ -1780,7 +1945,7 @@ def update_data_freshness_config(
 def get_stock_analysis_http_config(
     current_user: Annotated[User, Depends(get_current_active_user)]
 ):
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     merged = _get_stock_analysis_http_settings(db=db)
     return StockAnalysisHttpConfig(**merged)
@@ -1795,7 +1960,7 @@ def update_stock_analysis_http_config(
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     payload = config.model_dump()
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     db.system_config.update_one(
         {"_id": "stock_analysis_http_config"},
@@ -1805,6 +1970,38 @@ def update_stock_analysis_http_config(
     merged = _get_stock_analysis_http_settings(db=db)
     return StockAnalysisHttpConfig(**merged)
 
+
+@router.get("/admin/index-report")
+@log_endpoint
+def get_index_report(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    reconcile: bool = False,
+):
+    """Explain the registered hot query shapes and flag collection scans."""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    client = get_mongo_client(MongoClient)
+    db = client.get_default_database("stock_analysis")
+    report = {}
+    if reconcile:
+        report["reconciliation"] = reconcile_indexes(db)
+    report.update(explain_query_shapes(db))
+    return report
+
+@router.get("/admin/response-cache")
+@log_endpoint
+def get_response_cache_stats(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    reset: bool = False,
+):
+    """Hit/miss statistics of the dashboard response cache; ``reset`` clears it afterwards."""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    stats = {"enabled": settings.RESPONSE_CACHE_ENABLED, **get_response_cache().stats()}
+    if reset:
+        reset_response_cache()
+    return stats
+
 # --- User Settings Persistence ---
 
 class UserSettings(BaseModel):
@@ -1818,7 +2015,7 @@ def get_user_settings(
     current_user: Annotated[User, Depends(get_current_active_user)]
 ):
     try:
-        client = MongoClient(settings.MONGO_URI)
+        client = get_mongo_client(MongoClient)
         db = client["stock_analysis"]
         # Fetch settings for this user
         doc = db.user_settings.find_one({"username": current_user.username})
@@ -1837,7 +2034,7 @@ def save_user_settings(
     current_user: Annotated[User, Depends(get_current_active_user)]
 ):
     try:
-        client = MongoClient(settings.MONGO_URI)
+        client = get_mongo_client(MongoClient)
         db = client["stock_analysis"]
         db.user_settings.update_one(
             {"username": current_user.username},
@@ -1859,7 +2056,7 @@ def get_account_settings(
     current_user: Annotated[User, Depends(get_current_active_user)]
 ):
     """List all known accounts and their settings."""
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     
     # 1. Discover Accounts from Holdings & NAV
@@ -1891,7 +2088,7 @@ def update_account_settings(
     if current_user.role != "admin":
          raise HTTPException(status_code=403, detail="Not authorized")
          
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     
     # Convert list to dict map for storage
@@ -1974,7 +2171,7 @@ def get_ibkr_status(
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
         
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     config = db.system_config.find_one({"_id": "ibkr_config"})
     
@@ -2019,7 +2216,7 @@ def update_ibkr_config(
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
         
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     
     update_data = {}
@@ -2056,7 +2253,7 @@ def test_ibkr_connection(
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     config = db.system_config.find_one({"_id": "ibkr_config"})
     
@@ -2115,7 +2312,15 @@ async def get_portfolio_stats(
         raise HTTPException(status_code=403, detail="Portfolio access required")
         
     from app.services.portfolio_analysis import get_nav_history_stats
-    return get_nav_history_stats(account_id=account_id)
+    db = get_mongo_client(MongoClient).get_default_database("stock_analysis")
+    return await run_in_threadpool(
+        cached_response,
+        db,
+        "portfolio/stats",
+        {"account_id": account_id},
+        [NAV],
+        lambda: get_nav_history_stats(account_id=account_id),
+    )
 
 
 @router.get("/portfolio/live-status")
@@ -2165,7 +2370,7 @@ async def get_open_orders(
     if current_user.role not in ["admin", "portfolio"]:
         raise HTTPException(status_code=403, detail="Portfolio access required")
 
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
 
     sources = ["tws_open_order"] if active_only else ["tws_open_order", "flex_order_history"]
@@ -2185,14 +2390,12 @@ async def get_open_orders(
         reverse=True,
     )
 
-    market_cache: dict[str, dict] = {}
     for row in normalized_rows:
         ticker = row.get("underlying_symbol") or row.get("symbol")
-        ticker = str(ticker or "").strip().upper() or None
-        row["underlying_ticker"] = ticker
-        if ticker not in market_cache:
-            market_cache[ticker] = _market_context_for_ticker(db, ticker)
-        row.update(market_cache[ticker])
+        row["underlying_ticker"] = str(ticker or "").strip().upper() or None
+    market_context = _load_market_context(db, (row["underlying_ticker"] for row in normalized_rows))
+    for row in normalized_rows:
+        row.update(market_context.get(row["underlying_ticker"], {}))
 
     return normalized_rows
 
@@ -2238,7 +2441,7 @@ def get_nav_report_endpoint(
     # The user said "simple single call". If old data is there, give it?
     # Assuming "get_report_stats" returns the LATEST available.
     if not stats_data:
-        client = MongoClient(settings.MONGO_URI)
+        client = get_mongo_client(MongoClient)
         db = client.get_default_database("stock_analysis")
         
         recent_entry = db.ibkr_raw_flex_reports.find_one({
@@ -2261,14 +2464,56 @@ async def get_portfolio_holdings(
     """Get latest snapshot of holdings."""
     if current_user.role not in ["admin", "portfolio"]:
         raise HTTPException(status_code=403, detail="Portfolio access required")
-        
-    client = MongoClient(settings.MONGO_URI)
+
+    # Snapshot merge and enrichment issue many small pymongo reads; keep them off the event loop.
+    db = get_mongo_client(MongoClient).get_default_database("stock_analysis")
+    return await run_in_threadpool(
+        cached_response, db, "portfolio/holdings", {}, [HOLDINGS, STOCKS], _build_portfolio_holdings
+    )
+
+
+class _StageTimer:
+    """Per-stage wall-clock breakdown, logged at DEBUG level only."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.enabled = logger.isEnabledFor(logging.DEBUG)
+        self.stages: dict[str, float] = {}
+        self._last = time.perf_counter() if self.enabled else 0.0
+
+    def mark(self, stage: str) -> None:
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.stages[stage] = round((now - self._last) * 1000.0, 2)
+        self._last = now
+
+    def log(self, **extra) -> None:
+        if not self.enabled:
+            return
+        breakdown = ", ".join(f"{stage}={ms}ms" for stage, ms in self.stages.items())
+        details = ", ".join(f"{key}={value}" for key, value in extra.items())
+        logger.debug(
+            "%s timing: %s; total=%.2fms; %s",
+            self.name,
+            breakdown,
+            sum(self.stages.values()),
+            details,
+        )
+
+
+def _build_portfolio_holdings() -> list[dict]:
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
+    timer = _StageTimer("portfolio/holdings")
     
     data = _load_portfolio_holdings_rows(db)
+    timer.mark("holdings")
     if not data:
         return []
     
+    # Enrichment reads one batch per collection (dividends, orders,
+    # stock_data) keyed by the symbols in the snapshot, then joins in memory.
     # Enrich with Dividend History
     symbols = list(set([h["symbol"] for h in data if "symbol" in h]))
     if symbols:
@@ -2296,6 +2541,8 @@ async def get_portfolio_holdings(
             else:
                 row["true_yield"] = None
 
+    timer.mark("dividends")
+
     # 3. Enhanced Metrics (Coverage, DTE, ITM/OTM)
     from app.services.options_analysis import OptionsAnalyzer
     analyzer_input = []
@@ -2338,7 +2585,13 @@ async def get_portfolio_holdings(
                 multiplier = 100.0
             coverage_by_account[key]["short_calls"] += abs(qty) * multiplier
 
-    pending_summary_by_account = _load_pending_order_summaries(db, coverage_by_account)
+    timer.mark("coverage")
+
+    # Only underlyings held in the snapshot can be joined back onto a row.
+    pending_summary_by_account = _load_pending_order_summaries(
+        db, coverage_by_account, underlyings={und for _, und in coverage_by_account}
+    )
+    timer.mark("orders")
     market_context_symbols = {
         str(row.get("symbol") or "").strip().upper()
         for row in data
@@ -2349,10 +2602,8 @@ async def get_portfolio_holdings(
         for row in data
         if row.get("underlying_symbol") or row.get("underlying")
     )
-    market_context_by_symbol = {
-        sym: _market_context_for_ticker(db, sym)
-        for sym in sorted(s for s in market_context_symbols if s)
-    }
+    market_context_by_symbol = _load_market_context(db, market_context_symbols)
+    timer.mark("market_context")
 
     for row in data:
         # A. Coverage Status
@@ -2482,6 +2733,8 @@ async def get_portfolio_holdings(
                 else:
                     row["is_itm"] = False
 
+    timer.mark("enrich")
+    timer.log(rows=len(data), symbols=len(market_context_by_symbol))
     return data
 
 @router.get("/portfolio/alerts")
@@ -2495,28 +2748,26 @@ async def get_portfolio_alerts(
     """
     if current_user.role not in ["admin", "portfolio"]:
         raise HTTPException(status_code=403, detail="Portfolio access required")
-        
-    client = MongoClient(settings.MONGO_URI)
-    db = client.get_default_database("stock_analysis")
+
+    db = get_mongo_client(MongoClient).get_default_database("stock_analysis")
+    return await cached_response_async(db, "portfolio/alerts", {}, [HOLDINGS, STOCKS], _build_portfolio_alerts)
+
+
+async def _build_portfolio_alerts() -> list:
+    repo = AsyncMongoRepository(factory=MongoClient)
     
     # 1. Fetch Latest Holdings (Snapshot)
-    latest = db.ibkr_holdings.find_one(sort=[("date", -1)])
+    latest = await repo.latest_holdings_snapshot()
     if not latest:
         return []
         
-    snapshot_id = latest.get("snapshot_id")
-    if snapshot_id:
-        query = {"snapshot_id": snapshot_id}
-    else:
-        query = {"report_date": latest.get("report_date")}
-        
-    holdings = list(db.ibkr_holdings.find(query, {"_id": 0}))
+    holdings = await repo.list_holdings(holdings_snapshot_query(latest))
     
     # 2. Fetch Market Data for Context
     # We want a map {Symbol: StockDataDict}
     # Optimize: Only fetch for symbols in holdings? Or just fetch all (dataset is small enough).
-    stock_cursor = db.stock_data.find({}, {"_id": 0})
-    market_data = {item["Ticker"]: item for item in stock_cursor}
+    stock_rows = await repo.list_stock_data()
+    market_data = {item["Ticker"]: item for item in stock_rows}
     
     # 3. Analyze
     from app.services.options_analysis import OptionsAnalyzer
@@ -2599,15 +2850,15 @@ def analyze_smart_rolls(
     and find Smart Roll opportunities (Up & Out, Credit, Short Duration).
     """
     # 1. Fetch Portfolio
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     
     # Get latest holdings
-    latest = db.ibkr_holdings.find_one(sort=[("date", -1)])
+    latest = get_latest_holdings(db)
     if not latest:
         return []
         
-    query = {"snapshot_id": latest.get("snapshot_id")} if latest.get("snapshot_id") else {"report_date": latest.get("report_date")}
+    query = holdings_snapshot_query(latest)
     holdings = list(db.ibkr_holdings.find(query, {"_id": 0}))
     
     if not holdings:
@@ -2637,20 +2888,20 @@ def analyze_ticker_smart_rolls(
     Flattened list for TickerModal consumption.
     """
     ticker = _normalize_ticker_symbol(ticker)
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     stock, _, ticker = _find_stock_data_by_symbol(db, ticker)
     freshness = _evaluate_stock_data_freshness(stock, tier="price", db=db)
     _queue_stock_refresh_if_stale(background_tasks, ticker, freshness)
     
     # Get latest holdings
-    latest = db.ibkr_holdings.find_one(sort=[("date", -1)])
+    latest = get_latest_holdings(db)
     if not latest:
         if include_meta:
             return {"symbol": ticker, "suggestions": [], **freshness}
         return []
         
-    query = {"snapshot_id": latest.get("snapshot_id")} if latest.get("snapshot_id") else {"report_date": latest.get("report_date")}
+    query = holdings_snapshot_query(latest)
     # Filter by symbol in query to save bandwidth
     query["symbol"] = ticker
     
@@ -2703,7 +2954,7 @@ def get_ticker_news(
     Get aggregated news with sentiment and logic analysis for a ticker.
     """
     symbol = _normalize_ticker_symbol(symbol)
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     stock, _, symbol = _find_stock_data_by_symbol(db, symbol)
     freshness = _evaluate_stock_data_freshness(stock, tier="profile", db=db)
@@ -2789,9 +3040,9 @@ def scan_dividend_capture(
         symbols_set = set()
         
         # Get symbols from latest portfolio holdings
-        latest = db.ibkr_holdings.find_one(sort=[("date", -1)])
+        latest = get_latest_holdings(db)
         if latest:
-            query = {"snapshot_id": latest.get("snapshot_id")} if latest.get("snapshot_id") else {"report_date": latest.get("report_date")}
+            query = holdings_snapshot_query(latest)
             holdings = list(db.ibkr_holdings.find(query, {"symbol": 1}))
             symbols_set.update([h["symbol"] for h in holdings if h.get("symbol")])
             logging.info(f"Adding portfolio symbols. Current count: {len(symbols_set)}")
@@ -2909,7 +3160,7 @@ def get_ticker_signals(
     """
     
     ticker = _normalize_ticker_symbol(ticker)
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     stock, _, ticker = _find_stock_data_by_symbol(db, ticker)
 
@@ -2995,9 +3246,20 @@ def get_ticker_analysis(
     Includes: Current Price, Stats, and basic metadata.
     """
     symbol = _normalize_ticker_symbol(symbol)
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
-    
+    return cached_response(
+        db,
+        "ticker",
+        {"symbol": symbol},
+        [STOCKS],
+        lambda: _load_ticker_analysis(db, symbol, background_tasks),
+        # Stale or missing rows queue a refresh on every request; only cache fresh hits.
+        cacheable=lambda payload: bool(payload.get("found")) and not payload.get("is_stale"),
+    )
+
+
+def _load_ticker_analysis(db, symbol: str, background_tasks: BackgroundTasks) -> dict:
     # Fetch from stock_data
     stock, stock_query, symbol = _find_stock_data_by_symbol(db, symbol)
     snapshot, _ = _find_instrument_snapshot_by_symbol(db, symbol)
@@ -3046,11 +3308,23 @@ def get_ticker_price_history(
     symbol: str,
     current_user: Annotated[User, Depends(get_current_active_user)],
     limit: int = 390,
+    interval: str | None = None,
+    days: int | None = None,
 ):
+    """Raw price history, or OHLC bars when ``interval`` is 1m, 5m or 1d.
+
+    ``days`` bounds downsampled bars to a trailing window; ``limit`` caps the
+    number of rows (raw) or bars (downsampled) returned.
+    """
     symbol = _normalize_ticker_symbol(symbol)
     safe_limit = max(1, min(int(limit), 5000))
+    if interval is not None and interval not in DOWNSAMPLE_INTERVALS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"interval must be one of: {', '.join(DOWNSAMPLE_INTERVALS)}",
+        )
 
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     stock, _, symbol = _find_stock_data_by_symbol(db, symbol)
     snapshot, _ = _find_instrument_snapshot_by_symbol(db, symbol)
@@ -3064,12 +3338,28 @@ def get_ticker_price_history(
     freshness = _evaluate_stock_data_freshness(freshness_seed, tier="price", db=db)
     canonical_symbol_key = canonical_instrument_key(ticker=symbol, sec_type="STK")
 
+    if interval:
+        bars = fetch_downsampled_history(
+            db,
+            [canonical_symbol_key, symbol],
+            interval,
+            max(1, int(days)) if days else None,
+            safe_limit,
+        )
+        return {
+            "symbol": symbol,
+            "interval": interval,
+            "count": len(bars),
+            "history": bars,
+            **freshness,
+        }
+
     rows = list(
         db.instrument_price_history.find(
             {"$or": [{"instrument_key": canonical_symbol_key}, {"instrument_key": symbol}]},
             {"_id": 0},
         )
-        .sort([("timestamp", -1)])
+        .sort([(history_sort_field(db), -1)])
         .limit(safe_limit)
     )
     rows = list(reversed(rows))
@@ -3100,7 +3390,7 @@ def get_opportunity_analysis(
     # For now, let's fetch the stock data and run a quick check?
     # Or just return the pre-calculated metrics from the daily scan if available?
     
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     stock, _, symbol = _find_stock_data_by_symbol(db, symbol)
     
@@ -3185,7 +3475,7 @@ def get_portfolio_optimizer(
     """
     symbol = _normalize_ticker_symbol(symbol)
     
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     stock, _, symbol = _find_stock_data_by_symbol(db, symbol)
     freshness = _evaluate_stock_data_freshness(stock, tier="price", db=db)
@@ -3314,7 +3604,7 @@ def get_tracked_tickers(
     current_user: Annotated[User, Depends(get_current_active_user)]
 ):
     """Get the list of tickers currently being tracked."""
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     doc = db.system_config.find_one({"_id": "tracked_tickers"})
     
@@ -3359,7 +3649,7 @@ def add_tracked_ticker(
     if not ticker:
         raise HTTPException(status_code=400, detail="Invalid ticker")
 
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     
     # 1. Update List
@@ -3392,7 +3682,7 @@ def remove_tracked_ticker(
     """Remove a ticker from the tracking list."""
     ticker = ticker.upper().strip()
     
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     
     # 1. Remove from List
@@ -3425,7 +3715,7 @@ async def get_thorp_audit(
 
     from app.services.thorp_service import ThorpService
 
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     try:
         service = ThorpService(db)
@@ -5,6 +5,7 @@ from typing import List, Optional
 from app.models import TradeRecord, AnalyzedTrade, TradeMetrics, User
 from app.auth.dependencies import get_current_active_user
 from app.config import settings
+from app.database import get_mongo_client
 from pymongo import MongoClient
 from app.services.trade_analysis import calculate_pnl, calculate_metrics
 from app.services.ibkr_tws_service import get_ibkr_tws_service
@@ -13,7 +14,7 @@ router = APIRouter()
 
 # TODO: Refactor DB connection to a dependency injection pattern
 def get_db():
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     return client.get_default_database("stock_analysis")
 
 
@@ -3,6 +3,7 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from app.config import settings
+from app.database import get_mongo_client
 from app.models import TokenData, User
 from app.auth.utils import verify_password
 
@@ -33,7 +34,7 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> Use
     # Fetch user from MongoDB
     from pymongo import MongoClient
     try:
-        client = MongoClient(settings.MONGO_URI)
+        client = get_mongo_client(MongoClient)
         db = client.get_default_database("stock_analysis")
         user_doc = db.users.find_one({"username": token_data.username})
         
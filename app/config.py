@@ -9,7 +9,19 @@ class Settings(BaseSettings):
     # Database
     MONGO_URI: str = "mongodb://mongo:27017" # Docker default
     MONGO_DB_NAME: str = "stock_data"
+    # Shared MongoClient pool (app/database.py)
+    MONGO_MAX_POOL_SIZE: int = 50
+    MONGO_MIN_POOL_SIZE: int = 0
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGO_CONNECT_TIMEOUT_MS: int = 5000
+    MONGO_SOCKET_TIMEOUT_MS: int = 0  # 0 = no socket timeout
+    MONGO_MAX_IDLE_TIME_MS: int = 0  # 0 = keep idle connections
     
+    # Response cache for read-heavy dashboard routes (app/services/response_cache.py)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL_SECONDS: float = 15.0
+    RESPONSE_CACHE_MAX_ENTRIES: int = 256
+
     # Logic
     MAX_AGE_HOURS: int = 4
     DATA_DIR: str = "/app/data/ibkr_data"
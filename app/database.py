@@ -1,17 +1,90 @@
+import os
+import threading
+
 from pymongo import MongoClient
 from app.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Process-wide MongoClient registry. A MongoClient owns a connection pool and
+# monitor threads, so services and routes share one per (factory, uri) instead
+# of opening a client per call. Entries are dropped in forked children, which
+# must not reuse the parent's sockets.
+_clients = {}
+_clients_lock = threading.Lock()
+_clients_pid = os.getpid()
+
+
+def _reset_clients_after_fork():
+    global _clients, _clients_lock, _clients_pid
+    _clients = {}
+    _clients_lock = threading.Lock()
+    _clients_pid = os.getpid()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_clients_after_fork)
+
+
+def mongo_client_options() -> dict:
+    """Pool size and timeout options for shared clients, from settings."""
+    options = {
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": settings.MONGO_CONNECT_TIMEOUT_MS,
+    }
+    if settings.MONGO_SOCKET_TIMEOUT_MS:
+        options["socketTimeoutMS"] = settings.MONGO_SOCKET_TIMEOUT_MS
+    if settings.MONGO_MAX_IDLE_TIME_MS:
+        options["maxIdleTimeMS"] = settings.MONGO_MAX_IDLE_TIME_MS
+    return options
+
+
+def get_mongo_client(factory=None, uri: str | None = None):
+    """Return the shared, lazily created client for this process.
+
+    Callers pass their module's ``MongoClient`` as ``factory`` so tests that
+    patch ``<module>.MongoClient`` keep intercepting the connection. Shared
+    clients must not be closed by callers; use ``close_mongo_clients`` on
+    shutdown.
+    """
+    global _clients_pid
+    factory = factory or MongoClient
+    uri = uri or settings.MONGO_URI
+    with _clients_lock:
+        if _clients_pid != os.getpid():
+            _clients.clear()
+            _clients_pid = os.getpid()
+        key = (factory, uri)
+        client = _clients.get(key)
+        if client is None:
+            client = factory(uri, **mongo_client_options())
+            _clients[key] = client
+        return client
+
+
+def get_mongo_db(name: str = "stock_analysis", factory=None):
+    """Service accessor: default database on the shared client."""
+    return get_mongo_client(factory).get_default_database(name)
+
+
+def close_mongo_clients() -> None:
+    """Close and forget every shared client (application shutdown)."""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception as exc:
+            logger.warning("MongoClient close failed: %s", exc)
+
+
 def get_db():
     """
     Dependency to get a MongoDB database reference.
-    Yields the database object.
+    Yields the database object from the shared client.
     """
-    client = MongoClient(settings.MONGO_URI)
-    db = client.get_default_database("stock_analysis")
-    try:
-        yield db
-    finally:
-        client.close()
+    yield get_mongo_db("stock_analysis", factory=MongoClient)
@@ -1,10 +1,13 @@
+import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.api import routes, trades
+from app.database import close_mongo_clients, get_mongo_db
 from app.scheduler.jobs import start_scheduler, stop_scheduler
 from app.services.ibkr_tws_service import get_ibkr_tws_service, set_ibkr_tws_service
+from app.services.index_registry import reconcile_indexes
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -12,6 +15,11 @@ async def lifespan(app: FastAPI):
     from app.utils.logging_config import setup_logging
     setup_logging()
 
+    try:
+        app.state.index_report = reconcile_indexes(get_mongo_db())
+    except Exception as exc:
+        logging.getLogger("app.main").warning("Index reconciliation skipped: %s", exc)
+
     tws_service = get_ibkr_tws_service()
     app.state.ibkr_tws_service = tws_service
     if settings.IBKR_TWS_ENABLED:
@@ -23,6 +31,7 @@ async def lifespan(app: FastAPI):
     stop_scheduler()
     tws_service.disconnect()
     set_ibkr_tws_service(None)
+    close_mongo_clients()
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -52,6 +61,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 app.include_router(routes.router, prefix="/api")
@@ -4,6 +4,12 @@ from datetime import datetime, timedelta, timezone
 from pymongo import MongoClient
 
 from app.config import settings
+from app.database import get_mongo_client
+from app.services.holdings_compaction import coerce_retention_config, compact_tws_holdings
+from app.services.holdings_latest import get_latest_holdings, publish_holdings_snapshot, touch_holdings_snapshot
+from app.services.price_history_store import set_price_history_retention
+from app.services.response_cache import HOLDINGS, bump_response_cache_version
+from app.services.position_marks import changed_accounts, position_set_hashes
 from app.services.portfolio_fixer import run_portfolio_fixer
 from app.services.stock_live_comparison import (
     run_stock_live_comparison,
@@ -25,7 +31,7 @@ def _utc_now() -> datetime:
 
 
 def _get_db():
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     return client.get_default_database("stock_analysis")
 
 
@@ -81,6 +87,13 @@ def run_price_history_retention_cleanup():
     """Delete old append-only instrument price history rows beyond retention horizon."""
     db = _get_db()
     retention_days = _get_price_history_retention_days()
+    if set_price_history_retention(db, retention_days):
+        # Time-series collection: the server expires rows itself.
+        logging.info(
+            "Scheduler: Price history retention set to %s days (time-series expireAfterSeconds).",
+            retention_days,
+        )
+        return
     cutoff = (_utc_now() - timedelta(days=retention_days)).strftime("%Y-%m-%d %H:%M:%S")
     result = db.instrument_price_history.delete_many({"timestamp": {"$lt": cutoff}})
     logging.info(
@@ -91,6 +104,30 @@ def run_price_history_retention_cleanup():
     )
 
 
+def _get_tws_holdings_retention_config() -> dict:
+    try:
+        config = _get_db().system_config.find_one({"_id": "tws_holdings_retention"}) or {}
+    except Exception as exc:
+        logging.warning("Scheduler: Failed reading TWS holdings retention config: %s", exc)
+        config = {}
+    return coerce_retention_config(config)
+
+
+def run_tws_holdings_compaction():
+    """Thin out old TWS holdings snapshots to interval/EOD keepers."""
+    db = _get_db()
+    summary = compact_tws_holdings(db, _utc_now(), _get_tws_holdings_retention_config())
+    logging.info(
+        "Scheduler: TWS holdings compaction dropped %s of %s snapshots (%s rows, %s diffs archived, mode=%s).",
+        summary["dropped"],
+        summary["scanned"],
+        summary["deleted_rows"],
+        summary["archived_diffs"],
+        summary["archive_mode"],
+    )
+    return summary
+
+
 def _get_tws_accounts(tws_service) -> list[str]:
     accounts: set[str] = set()
     app = tws_service.app
@@ -159,6 +196,7 @@ def run_tws_position_sync():
     report_date = now.strftime("%Y-%m-%d")
     synced_count = 0
 
+    docs = []
     for position in positions:
         account_id = position.get("account") or position.get("account_id")
         symbol = position.get("symbol")
@@ -184,12 +222,28 @@ def run_tws_position_sync():
                 "last_tws_update": now,
             }
         )
+        docs.append(doc)
+
+    # Change-only writes: an unchanged position set keeps the current snapshot
+    # and only refreshes the pointer heartbeat. Cached holdings responses stay
+    # valid; the response cache TTL bounds how stale their freshness flags get.
+    hashes = position_set_hashes(docs)
+    current = get_latest_holdings(db, "tws")
+    if docs and current and current.get("snapshot_id") and not changed_accounts(current.get("position_hashes"), hashes):
+        touch_holdings_snapshot(db, current, now)
+        logging.info(
+            "Scheduler: TWS position sync unchanged (%s positions); kept snapshot %s.",
+            len(docs),
+            current["snapshot_id"],
+        )
+        return
 
+    for doc in docs:
         db.ibkr_holdings.update_one(
             {
                 "snapshot_id": snapshot_id,
-                "position_key": position_key,
-                "account_id": account_id,
+                "position_key": doc["position_key"],
+                "account_id": doc["account_id"],
                 "source": "tws",
             },
             {"$set": doc},
@@ -197,6 +251,12 @@ def run_tws_position_sync():
         )
         synced_count += 1
 
+    if synced_count:
+        publish_holdings_snapshot(
+            db, snapshot_id, report_date, now, source="tws", position_count=synced_count, position_hashes=hashes
+        )
+        bump_response_cache_version(db, HOLDINGS)
+
     logging.info(
         "Scheduler: TWS position sync stored %s positions in snapshot %s.",
         synced_count,
@@ -367,7 +427,7 @@ def get_schedule_config():
     try:
         from pymongo import MongoClient
         # Use settings.MONGO_URI from config
-        client = MongoClient(settings.MONGO_URI)
+        client = get_mongo_client(MongoClient)
         db = client.get_default_database("stock_analysis")
         config = db.system_config.find_one({"_id": "daily_schedule"})
         
@@ -383,7 +443,7 @@ def save_schedule_config(hour, minute):
     """Persist schedule to MongoDB."""
     try:
         from pymongo import MongoClient
-        client = MongoClient(settings.MONGO_URI)
+        client = get_mongo_client(MongoClient)
         db = client.get_default_database("stock_analysis")
         
         db.system_config.update_one(
@@ -426,9 +486,9 @@ def run_dividend_scan_wrapper():
     
     # 1. Fetch Tickers
     try:
-         client = MongoClient(settings.MONGO_URI)
+         client = get_mongo_client(MongoClient)
          db = client.get_default_database("stock_analysis")
-         latest = db.ibkr_holdings.find_one(sort=[("date", -1)])
+         latest = get_latest_holdings(db)
          if latest:
              query = {"snapshot_id": latest.get("snapshot_id")} if latest.get("snapshot_id") else {"report_date": latest.get("report_date")}
              
@@ -513,11 +573,11 @@ def run_recommendation_scans():
 
     # 2. Portfolio Rolls & Signals (Holdings)
     try:
-         client = MongoClient(settings.MONGO_URI)
+         client = get_mongo_client(MongoClient)
          db = client.get_default_database("stock_analysis")
          
          # Get Tickers
-         latest = db.ibkr_holdings.find_one(sort=[("date", -1)])
+         latest = get_latest_holdings(db)
          if latest:
              query = {"snapshot_id": latest.get("snapshot_id")} if latest.get("snapshot_id") else {"report_date": latest.get("report_date")}
              holdings = list(db.ibkr_holdings.find(query))
@@ -632,6 +692,15 @@ def start_scheduler():
     )
     logging.info("Scheduled Instrument Price History retention cleanup for 03:45 daily.")
 
+    scheduler.add_job(
+        run_tws_holdings_compaction,
+        trigger="cron",
+        minute=7,
+        id="tws_holdings_compaction_hourly",
+        replace_existing=True
+    )
+    logging.info("Scheduled TWS holdings compaction hourly at :07.")
+
     # --- Dividend Scanner Jobs ---
     # 1. Market Hours (Monday-Friday, 9:30 - 16:00, every 30 mins)
     # Cron: Mon-Fri, 9-16 hour, 0,30 minute
@@ -4,6 +4,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')
 
 from pymongo import MongoClient
 from app.config import settings
+from app.services.holdings_latest import clear_holdings_pointers
 
 def clean_data():
     client = MongoClient(settings.MONGO_URI)
@@ -40,6 +41,7 @@ def clean_data():
         print(f"\nDeleting {len(bad_ids)} suspect snapshots...")
         result = db.ibkr_holdings.delete_many({"snapshot_id": {"$in": bad_ids}})
         print(f"Deleted {result.deleted_count} documents.")
+        clear_holdings_pointers(db)
     else:
         print("\nNo obvious bad snapshots found (NAV > 3M).")
 
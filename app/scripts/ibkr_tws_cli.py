@@ -9,6 +9,7 @@ from importlib.util import find_spec
 from pymongo import MongoClient
 
 from app.config import settings
+from app.services.holdings_latest import publish_holdings_snapshot
 from app.services.ibkr_tws_service import IBKRTWSService
 
 
@@ -126,6 +127,9 @@ def _upsert_positions(service: IBKRTWSService, *, snapshot_id: str | None = None
         )
         upserted += 1
 
+    if upserted:
+        publish_holdings_snapshot(db, effective_snapshot_id, report_date, now, source="tws", position_count=upserted)
+
     return {
         "requested": True,
         "snapshot_id": effective_snapshot_id,
@@ -8,6 +8,7 @@ from datetime import datetime
 # Setup paths
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 from app.config import settings
+from app.services.holdings_latest import publish_holdings_snapshot
 
 # Setup Logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -90,6 +91,7 @@ def import_portfolio_csv(filepath):
             db.ibkr_holdings.delete_many({"snapshot_id": snapshot_dt})
             
         db.ibkr_holdings.insert_many(positions)
+        publish_holdings_snapshot(db, snapshot_dt, snapshot_date_str, snapshot_dt, position_count=len(positions))
         logging.info(f"Successfully imported {len(positions)} holdings for Snapshot: {snapshot_date_str}")
     else:
         logging.error("No positions found.")
@@ -0,0 +1,46 @@
+import argparse
+import sys
+import os
+
+# Ensure we can import from app
+sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
+
+from pymongo import MongoClient
+from app.config import settings
+from app.services.price_history_store import (
+    DEFAULT_RETENTION_DAYS,
+    ensure_price_history_collection,
+    reset_timeseries_cache,
+)
+
+
+def migrate_price_history(retention_days: int, timeseries_supported: bool | None = None):
+    """One-off move of instrument_price_history onto a time-series collection.
+
+    Run once per deployment (it is a no-op when the collection is already
+    time-series). Until it runs, readers keep sorting on ``timestamp``.
+    """
+    print("Connecting to MongoDB...")
+    client = MongoClient(settings.MONGO_URI)
+    db = client.get_default_database("stock_analysis")
+
+    result = ensure_price_history_collection(
+        db, retention_days=retention_days, timeseries_supported=timeseries_supported
+    )
+    reset_timeseries_cache()
+    print(f"instrument_price_history: {result}")
+    if result.get("action") == "migrated":
+        print("Legacy rows remain in instrument_price_history_legacy; drop it once verified.")
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=migrate_price_history.__doc__.splitlines()[0])
+    parser.add_argument("--retention-days", type=int, default=DEFAULT_RETENTION_DAYS)
+    parser.add_argument(
+        "--no-timeseries",
+        action="store_true",
+        help="Keep the regular collection and only backfill ts (servers without time-series support).",
+    )
+    args = parser.parse_args()
+    migrate_price_history(args.retention_days, timeseries_supported=False if args.no_timeseries else None)
@@ -0,0 +1,51 @@
+import asyncio
+
+from app.database import get_mongo_client
+from app.services.holdings_latest import get_latest_holdings
+
+
+class AsyncMongoRepository:
+    """Non-blocking reads for the hot dashboard endpoints.
+
+    Each pymongo query runs on a worker thread (``asyncio.to_thread``) against
+    the shared client, so an ``async def`` route never blocks the event loop
+    on socket I/O.
+    """
+
+    def __init__(self, db_name: str = "stock_analysis", factory=None):
+        self.db_name = db_name
+        self.factory = factory
+
+    def _sync_db(self):
+        return get_mongo_client(self.factory).get_default_database(self.db_name)
+
+    async def find(self, collection: str, query=None, projection=None, sort=None, limit: int = 0) -> list[dict]:
+        def _run():
+            cursor = self._sync_db()[collection].find(query or {}, projection)
+            if sort:
+                cursor = cursor.sort(sort)
+            if limit:
+                cursor = cursor.limit(limit)
+            return list(cursor)
+
+        return await asyncio.to_thread(_run)
+
+    async def find_one(self, collection: str, query=None, projection=None, sort=None) -> dict | None:
+        return await asyncio.to_thread(
+            lambda: self._sync_db()[collection].find_one(query or {}, projection, sort=sort)
+        )
+
+    async def aggregate(self, collection: str, pipeline: list) -> list[dict]:
+        return await asyncio.to_thread(lambda: list(self._sync_db()[collection].aggregate(pipeline)))
+
+    # --- Collection accessors -------------------------------------------------
+
+    async def list_stock_data(self, query=None, projection=None, sort=None, limit: int = 0) -> list[dict]:
+        return await self.find("stock_data", query, projection or {"_id": 0}, sort=sort, limit=limit)
+
+    async def latest_holdings_snapshot(self) -> dict | None:
+        """Current snapshot pointer (see ``app.services.holdings_latest``)."""
+        return await asyncio.to_thread(lambda: get_latest_holdings(self._sync_db()))
+
+    async def list_holdings(self, query: dict) -> list[dict]:
+        return await self.find("ibkr_holdings", query, {"_id": 0})
@@ -7,6 +7,8 @@ from app.models.opportunity import JuicyOpportunity, OpportunityStatus
 from app.services.signal_service import SignalService
 from pymongo import MongoClient
 from app.config import settings
+from app.database import get_mongo_client
+from app.services.holdings_latest import get_latest_holdings
 
 from app.services.roll_service import RollService
 from app.services.news_service import NewsService
@@ -56,9 +58,9 @@ class DividendScanner:
         try:
             # 1. Fetch Basic Info & Holdings
             # Fetch Holdings Context
-            client = MongoClient(settings.MONGO_URI)
+            client = get_mongo_client(MongoClient)
             db = client.get_default_database("stock_analysis")
-            latest = db.ibkr_holdings.find_one(sort=[("date", -1)])
+            latest = get_latest_holdings(db)
             holdings_context = []
             
             if latest:
@@ -211,9 +213,9 @@ class DividendScanner:
             )
         
         # 1. Fetch Holdings for Account Mapping
-        client = MongoClient(settings.MONGO_URI)
+        client = get_mongo_client(MongoClient)
         db = client.get_default_database("stock_analysis")
-        latest = db.ibkr_holdings.find_one(sort=[("date", -1)])
+        latest = get_latest_holdings(db)
         
         holdings_map = {} # symbol -> "Acct1: 100, Acct2: 50"
         if latest:
@@ -350,11 +352,11 @@ class DividendScanner:
         filename = f"corporate_events_{today_str}.ics"
         file_path = os.path.join(cache_dir, filename)
         
-        client = MongoClient(settings.MONGO_URI)
+        client = get_mongo_client(MongoClient)
         db = client.get_default_database("stock_analysis")
         
         # 1. Fetch Symbols (From IBKR Holdings)
-        latest = db.ibkr_holdings.find_one(sort=[("date", -1)])
+        latest = get_latest_holdings(db)
         symbols = []
         if latest:
             query = {"snapshot_id": latest.get("snapshot_id")} if latest.get("snapshot_id") else {"report_date": latest.get("report_date")}
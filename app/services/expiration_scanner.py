@@ -2,6 +2,8 @@ from datetime import datetime
 import logging
 from pymongo import MongoClient
 from app.config import settings
+from app.database import get_mongo_client
+from app.services.holdings_latest import get_latest_holdings
 from app.services.opportunity_service import OpportunityService
 from app.models.opportunity import JuicyOpportunity, OpportunityStatus
 
@@ -17,11 +19,11 @@ class ExpirationScanner:
         """
         logger.info(f"ExpirationScanner: Starting scan (Threshold: {days_threshold} days)...")
         try:
-            client = MongoClient(settings.MONGO_URI)
+            client = get_mongo_client(MongoClient)
             db = client.get_default_database("stock_analysis")
             
             # 1. Fetch Latest Holdings
-            latest = db.ibkr_holdings.find_one(sort=[("date", -1)])
+            latest = get_latest_holdings(db)
             if not latest:
                 logger.warning("ExpirationScanner: No portfolio holdings found.")
                 return
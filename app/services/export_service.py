@@ -4,6 +4,8 @@ from datetime import datetime
 from collections import defaultdict
 from pymongo import MongoClient
 from app.config import settings
+from app.database import get_mongo_client
+from app.services.holdings_latest import get_latest_holdings
 
 def generate_portfolio_csv_content() -> str:
     """
@@ -20,11 +22,11 @@ def generate_portfolio_csv_content() -> str:
             - Aggregates multiple accounts.
     """
     try:
-        client = MongoClient(settings.MONGO_URI)
+        client = get_mongo_client(MongoClient)
         db = client.get_default_database("stock_analysis")
         
         # 1. Fetch Latest Holdings
-        latest_holding = db.ibkr_holdings.find_one(sort=[("date", -1)])
+        latest_holding = get_latest_holdings(db)
         
         # Default header
         lines = ["Symbol,Trade Date,Purchase Price,Quantity"]
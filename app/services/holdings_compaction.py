@@ -0,0 +1,238 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+from app.services.holdings_latest import HOLDINGS_LATEST_COLLECTION
+
+logger = logging.getLogger(__name__)
+
+# TWS position sync writes a full ibkr_holdings snapshot every 30 seconds.
+# Compaction keeps every snapshot for a short raw window, then only the last
+# snapshot per interval bucket (hourly by default), then only the last
+# snapshot per day (EOD). Dropped snapshots are deleted, or in "diff" mode
+# first reduced to a row-level diff against the previous snapshot.
+DEFAULT_TWS_HOLDINGS_RETENTION = {
+    "enabled": True,
+    "raw_retention_minutes": 120,
+    "keep_interval_minutes": 60,
+    "interval_retention_days": 7,
+    "eod_retention_days": 0,  # 0 = keep EOD snapshots forever
+    "archive_mode": "delete",  # "delete" | "diff"
+}
+ARCHIVE_MODES = {"delete", "diff"}
+HOLDINGS_DIFF_COLLECTION = "ibkr_holdings_diffs"
+# system_config document remembering where already-compacted history ends.
+COMPACTION_STATE_ID = "tws_holdings_compaction_state"
+DELETE_BATCH_SIZE = 500
+# Fields that change on every sync and carry no position information.
+VOLATILE_ROW_FIELDS = {"_id", "date", "snapshot_id", "report_date", "last_tws_update"}
+
+
+def coerce_retention_config(raw: dict | None) -> dict:
+    merged = dict(DEFAULT_TWS_HOLDINGS_RETENTION)
+    merged.update({k: v for k, v in (raw or {}).items() if k in DEFAULT_TWS_HOLDINGS_RETENTION})
+
+    raw_enabled = merged["enabled"]
+    if isinstance(raw_enabled, str):
+        merged["enabled"] = raw_enabled.strip().lower() in {"1", "true", "yes", "on"}
+    else:
+        merged["enabled"] = bool(raw_enabled)
+
+    minimums = {
+        "raw_retention_minutes": 5,
+        "keep_interval_minutes": 1,
+        "interval_retention_days": 0,
+        "eod_retention_days": 0,
+    }
+    for key, minimum in minimums.items():
+        try:
+            merged[key] = max(minimum, int(merged[key]))
+        except (TypeError, ValueError):
+            merged[key] = DEFAULT_TWS_HOLDINGS_RETENTION[key]
+
+    mode = str(merged["archive_mode"] or "").strip().lower()
+    merged["archive_mode"] = mode if mode in ARCHIVE_MODES else DEFAULT_TWS_HOLDINGS_RETENTION["archive_mode"]
+    return merged
+
+
+def _as_utc(value) -> datetime | None:
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def select_snapshots_to_drop(snapshots: list[dict], now: datetime, config: dict) -> list[dict]:
+    """Return the snapshots (``{"snapshot_id", "date"}``) that fall outside retention.
+
+    Snapshots newer than the raw window are never returned. Within the
+    interval window the newest snapshot of each ``keep_interval_minutes``
+    bucket survives; older than that, the newest snapshot of each UTC day.
+    """
+    now = _as_utc(now)
+    raw_cutoff = now - timedelta(minutes=config["raw_retention_minutes"])
+    interval_cutoff = now - timedelta(days=config["interval_retention_days"])
+    eod_cutoff = now - timedelta(days=config["eod_retention_days"]) if config["eod_retention_days"] else None
+    bucket_seconds = config["keep_interval_minutes"] * 60
+
+    keepers: dict[tuple, dict] = {}
+    candidates = []
+    for snap in snapshots:
+        date = _as_utc(snap.get("date"))
+        if date is None or date >= raw_cutoff:
+            continue
+        if eod_cutoff is not None and date < eod_cutoff:
+            candidates.append((None, snap))
+            continue
+        if date >= interval_cutoff:
+            bucket = ("interval", int(date.timestamp()) // bucket_seconds)
+        else:
+            bucket = ("eod", date.date())
+        candidates.append((bucket, snap))
+        kept = keepers.get(bucket)
+        if kept is None or date > _as_utc(kept["date"]):
+            keepers[bucket] = snap
+
+    return [snap for bucket, snap in candidates if bucket is None or keepers[bucket] is not snap]
+
+
+def diff_snapshot_rows(base_rows: list[dict], rows: list[dict]) -> dict:
+    """Row-level diff keyed by ``position_key``: changed/new rows and removed keys."""
+    def _key(row):
+        return row.get("position_key") or f"{row.get('account_id')}:{row.get('secType')}:{row.get('symbol')}"
+
+    def _stable(row):
+        return {k: v for k, v in row.items() if k not in VOLATILE_ROW_FIELDS}
+
+    base = {_key(row): _stable(row) for row in base_rows}
+    current = {_key(row): _stable(row) for row in rows}
+    upserts = [row for key, row in current.items() if base.get(key) != row]
+    removed = sorted(key for key in base if key not in current)
+    return {"upserts": upserts, "removed": removed}
+
+
+def _protected_snapshot_ids(db) -> set:
+    protected = set()
+    for pointer in db[HOLDINGS_LATEST_COLLECTION].find({}, {"snapshot_id": 1}):
+        if pointer.get("snapshot_id"):
+            protected.add(pointer["snapshot_id"])
+    return protected
+
+
+def list_tws_snapshots(db, before: datetime, since: datetime | None = None) -> list[dict]:
+    """Distinct TWS snapshots dated in ``[since, before)``, oldest first."""
+    date_range = {"$lt": before}
+    if since is not None:
+        date_range["$gte"] = since
+    pipeline = [
+        {"$match": {"source": "tws", "date": date_range}},
+        {"$group": {"_id": "$snapshot_id", "date": {"$max": "$date"}, "rows": {"$sum": 1}}},
+        {"$sort": {"date": 1}},
+    ]
+    return [
+        {"snapshot_id": doc["_id"], "date": doc.get("date"), "rows": doc.get("rows", 0)}
+        for doc in db.ibkr_holdings.aggregate(pipeline)
+        if doc.get("_id")
+    ]
+
+
+def _snapshot_rows(db, snapshot_id) -> list[dict]:
+    return list(db.ibkr_holdings.find({"snapshot_id": snapshot_id, "source": "tws"}))
+
+
+def _previous_snapshot_id(db, snap: dict):
+    """The TWS snapshot written just before ``snap`` (may lie outside the scanned window)."""
+    doc = db.ibkr_holdings.find_one(
+        {"source": "tws", "date": {"$lt": snap["date"]}, "snapshot_id": {"$ne": snap["snapshot_id"]}},
+        {"snapshot_id": 1},
+        sort=[("date", -1)],
+    )
+    return doc.get("snapshot_id") if doc else None
+
+
+def _archive_diffs(db, snapshots: list[dict], drop_ids: set) -> int:
+    """Store a diff for every dropped snapshot against the snapshot before it.
+
+    Only dropped snapshots and their immediate predecessors are loaded.
+    """
+    archived = 0
+    loaded: dict = {}
+    for index, snap in enumerate(snapshots):
+        snapshot_id = snap["snapshot_id"]
+        if snapshot_id not in drop_ids:
+            continue
+        previous_id = snapshots[index - 1]["snapshot_id"] if index else _previous_snapshot_id(db, snap)
+        loaded = {previous_id: loaded[previous_id]} if previous_id in loaded else {}
+        if previous_id is not None and previous_id not in loaded:
+            loaded[previous_id] = _snapshot_rows(db, previous_id)
+        rows = loaded[snapshot_id] = _snapshot_rows(db, snapshot_id)
+        diff = diff_snapshot_rows(loaded.get(previous_id, []), rows)
+        db[HOLDINGS_DIFF_COLLECTION].update_one(
+            {"_id": snapshot_id},
+            {
+                "$set": {
+                    "snapshot_id": snapshot_id,
+                    "date": snap.get("date"),
+                    "base_snapshot_id": previous_id,
+                    "row_count": len(rows),
+                    **diff,
+                }
+            },
+            upsert=True,
+        )
+        archived += 1
+    return archived
+
+
+def _settled_before(raw_cutoff: datetime, interval_cutoff: datetime) -> datetime:
+    """Start of the first UTC day whose EOD bucket can still gain or lose snapshots."""
+    edge = min(raw_cutoff, interval_cutoff)
+    return edge.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _load_compacted_before(db) -> datetime | None:
+    doc = db.system_config.find_one({"_id": COMPACTION_STATE_ID}) or {}
+    return _as_utc(doc.get("compacted_before"))
+
+
+def compact_tws_holdings(db, now: datetime | None = None, config: dict | None = None) -> dict:
+    """Drop TWS holdings snapshots outside the retention policy; return a summary."""
+    config = coerce_retention_config(config)
+    now = _as_utc(now or datetime.now(timezone.utc))
+    summary = {"scanned": 0, "dropped": 0, "deleted_rows": 0, "archived_diffs": 0, "archive_mode": config["archive_mode"]}
+    if not config["enabled"]:
+        summary["skipped"] = "disabled"
+        return summary
+
+    raw_cutoff = now - timedelta(minutes=config["raw_retention_minutes"])
+    interval_cutoff = now - timedelta(days=config["interval_retention_days"])
+    # Days before the stored watermark were already thinned to one EOD
+    # snapshot each, so only newer snapshots (plus any past EOD retention)
+    # can be drop candidates.
+    since = _load_compacted_before(db)
+    windows = [list_tws_snapshots(db, raw_cutoff, since=since)]
+    if since is not None and config["eod_retention_days"]:
+        eod_cutoff = now - timedelta(days=config["eod_retention_days"])
+        windows.insert(0, list_tws_snapshots(db, min(eod_cutoff, since)))
+    summary["scanned"] = sum(len(window) for window in windows)
+    protected = _protected_snapshot_ids(db)
+    drop = []
+    for window in windows:
+        window_drop = [s for s in select_snapshots_to_drop(window, now, config) if s["snapshot_id"] not in protected]
+        if window_drop and config["archive_mode"] == "diff":
+            summary["archived_diffs"] += _archive_diffs(db, window, {s["snapshot_id"] for s in window_drop})
+        drop.extend(window_drop)
+    drop_ids = {s["snapshot_id"] for s in drop}
+
+    ordered = [s["snapshot_id"] for s in drop]
+    for start in range(0, len(ordered), DELETE_BATCH_SIZE):
+        batch = ordered[start:start + DELETE_BATCH_SIZE]
+        result = db.ibkr_holdings.delete_many({"snapshot_id": {"$in": batch}, "source": "tws"})
+        summary["deleted_rows"] += result.deleted_count
+    summary["dropped"] = len(drop_ids)
+    db.system_config.update_one(
+        {"_id": COMPACTION_STATE_ID},
+        {"$set": {"compacted_before": _settled_before(raw_cutoff, interval_cutoff)}},
+        upsert=True,
+    )
+    return summary
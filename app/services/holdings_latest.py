@@ -0,0 +1,130 @@
+import logging
+from datetime import datetime, timezone
+
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+# Pointer documents naming the current ibkr_holdings snapshot, so readers
+# resolve "latest holdings" with one _id lookup instead of sorting the
+# (30s-growing) holdings collection. ``latest`` tracks the newest snapshot of
+# any source; ``tws`` / ``flex`` track the newest per source.
+HOLDINGS_LATEST_COLLECTION = "holdings_latest"
+LATEST_KEY = "latest"
+POINTER_FIELDS = ("snapshot_id", "report_date", "date", "source")
+
+
+def _pointer_from_holding(doc: dict) -> dict:
+    return {field: doc.get(field) for field in POINTER_FIELDS}
+
+
+def _is_valid_pointer(pointer) -> bool:
+    return isinstance(pointer, dict) and bool(pointer.get("snapshot_id") or pointer.get("report_date"))
+
+
+def _advance_pointer(db, key: str, pointer: dict) -> None:
+    """Move pointer ``key`` forward; never replace a newer snapshot with an older one."""
+    doc = dict(pointer, updated_at=datetime.now(timezone.utc))
+    try:
+        db[HOLDINGS_LATEST_COLLECTION].update_one(
+            {"_id": key, "$or": [{"date": {"$lte": pointer.get("date")}}, {"date": None}]},
+            {"$set": doc},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        # The pointer already names a newer snapshot; the upsert lost the race.
+        pass
+
+
+def publish_holdings_snapshot(
+    db, snapshot_id, report_date, date, source=None, position_count=None, position_hashes=None
+) -> None:
+    """Record a fully written holdings snapshot as the current one.
+
+    Call after every row of the snapshot is stored so readers never see a
+    partial snapshot. ``source`` is the value stored on the rows (None for
+    legacy rows without one, which count as Flex).
+    """
+    pointer = {
+        "snapshot_id": snapshot_id,
+        "report_date": report_date,
+        "date": date,
+        "source": source,
+        "position_count": position_count,
+    }
+    if source == "tws":
+        pointer["last_tws_update"] = date
+        pointer["position_hashes"] = position_hashes
+    _advance_pointer(db, LATEST_KEY, pointer)
+    _advance_pointer(db, source if source == "tws" else "flex", pointer)
+
+
+def touch_holdings_snapshot(db, pointer: dict, now) -> None:
+    """Heartbeat: the TWS snapshot named by ``pointer`` is still current as of ``now``.
+
+    ``latest`` is re-pointed at it on every heartbeat unless it names a
+    snapshot dated after ``now``: a Flex import published since the last TWS
+    snapshot would otherwise keep ``latest`` on the older Flex data while
+    the live positions are unchanged.
+    """
+    db[HOLDINGS_LATEST_COLLECTION].update_one(
+        {"_id": "tws", "snapshot_id": pointer.get("snapshot_id")},
+        {"$set": {"last_tws_update": now}},
+    )
+    doc = {field: pointer.get(field) for field in POINTER_FIELDS + ("position_count", "position_hashes")}
+    doc.update(last_tws_update=now, updated_at=datetime.now(timezone.utc))
+    try:
+        db[HOLDINGS_LATEST_COLLECTION].update_one(
+            {"_id": LATEST_KEY, "$or": [{"date": {"$lte": now}}, {"date": None}]},
+            {"$set": doc},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        # ``latest`` names a snapshot newer than this heartbeat.
+        pass
+
+
+def clear_holdings_pointers(db) -> None:
+    """Forget every pointer (after snapshots are deleted); the next read rebuilds them."""
+    db[HOLDINGS_LATEST_COLLECTION].delete_many({})
+
+
+def _scan_latest_holding(db, source):
+    if source == "tws":
+        return db.ibkr_holdings.find_one({"source": "tws"}, sort=[("date", -1)])
+    if source == "flex":
+        latest = db.ibkr_holdings.find_one({"source": "flex"}, sort=[("date", -1)])
+        if not latest:
+            latest = db.ibkr_holdings.find_one({"source": {"$exists": False}}, sort=[("date", -1)])
+        return latest
+    return db.ibkr_holdings.find_one(sort=[("date", -1)])
+
+
+def get_latest_holdings(db, source: str | None = None) -> dict | None:
+    """Return the current snapshot pointer (snapshot_id, report_date, date, source).
+
+    ``source`` is ``"tws"``, ``"flex"`` or None for the newest of any source.
+    Falls back to a sorted scan of ibkr_holdings when no pointer exists yet
+    (e.g. data written before pointers were maintained) and backfills it.
+    """
+    key = source or LATEST_KEY
+    pointer = db[HOLDINGS_LATEST_COLLECTION].find_one({"_id": key})
+    if _is_valid_pointer(pointer):
+        return pointer
+
+    latest = _scan_latest_holding(db, source)
+    if not isinstance(latest, dict) or not latest:
+        return None
+    pointer = _pointer_from_holding(latest)
+    try:
+        _advance_pointer(db, key, pointer)
+    except Exception as exc:
+        logger.warning("Unable to backfill holdings pointer %s: %s", key, exc)
+    return pointer
+
+
+def holdings_snapshot_query(latest: dict) -> dict:
+    """ibkr_holdings filter selecting every row of the snapshot ``latest`` names."""
+    if latest.get("snapshot_id"):
+        return {"snapshot_id": latest.get("snapshot_id")}
+    return {"report_date": latest.get("report_date")}
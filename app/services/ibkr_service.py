@@ -5,6 +5,9 @@ import re
 from datetime import datetime, timedelta
 from pymongo import MongoClient
 from app.config import settings
+from app.database import get_mongo_client
+from app.services.holdings_latest import publish_holdings_snapshot
+from app.services.response_cache import HOLDINGS, NAV, bump_response_cache_version
 from app.services.mappers import NavReportMapper
 from app.models import NavReportType
 
@@ -15,7 +18,7 @@ FLEX_GET_URL = "https://gdcdyn.interactivebrokers.com/Universal/servlet/FlexStat
 
 def get_system_config():
     """Fetch IBKR config from DB."""
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     return db.system_config.find_one({"_id": "ibkr_config"})
 
@@ -244,7 +247,7 @@ def parse_csv_holdings(csv_str):
             continue
 
     if positions:
-        client = MongoClient(settings.MONGO_URI)
+        client = get_mongo_client(MongoClient)
         db = client.get_default_database("stock_analysis")
         
         snapshot_id = positions[0]["date"]
@@ -252,6 +255,11 @@ def parse_csv_holdings(csv_str):
             p["snapshot_id"] = snapshot_id
             
         db.ibkr_holdings.insert_many(positions)
+        publish_holdings_snapshot(
+            db, snapshot_id, positions[0]["report_date"], positions[0]["date"],
+            source="flex", position_count=len(positions),
+        )
+        bump_response_cache_version(db, HOLDINGS)
         logging.info(f"Stored {len(positions)} holdings in snapshot {snapshot_id} (Full Data).")
     else:
         logging.warning("No positions found in CSV.")
@@ -267,7 +275,7 @@ def parse_xml_holdings(xml_content):
     """
     Parse 'Daily_Portfolio' XML and store snapshot.
     """
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     
     root = ET.fromstring(xml_content)
@@ -317,6 +325,11 @@ def parse_xml_holdings(xml_content):
             p["snapshot_id"] = snapshot_id
             
         db.ibkr_holdings.insert_many(positions)
+        publish_holdings_snapshot(
+            db, snapshot_id, positions[0]["report_date"], positions[0]["date"],
+            source="flex", position_count=len(positions),
+        )
+        bump_response_cache_version(db, HOLDINGS)
         logging.info(f"Stored {len(positions)} holding records in snapshot {snapshot_id} (Full Data).")
     else:
         logging.warning("No positions found in Flex XML.")
@@ -333,7 +346,7 @@ def parse_csv_trades(csv_str):
             break
             
     reader = csv.DictReader(lines[start_idx:])
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     count = 0
     
@@ -382,7 +395,7 @@ def parse_xml_trades(xml_content):
     """
     Parse 'Recent_Trades' XML and store idempotently.
     """
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     
     root = ET.fromstring(xml_content)
@@ -431,7 +444,7 @@ def parse_xml_trades(xml_content):
 def parse_csv_dividends(csv_str):
     """Parse IBKR Flex CSV for Cash Transactions (Dividends)."""
     import csv
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     
     lines = csv_str.splitlines()
@@ -510,6 +523,8 @@ def parse_and_store_dividends(content):
         logging.warning("XML parsing for Dividends is not yet implemented. Skipping.")
     else:
         parse_csv_dividends(content.decode('utf-8', errors='ignore'))
+        client = get_mongo_client(MongoClient)
+        bump_response_cache_version(client.get_default_database("stock_analysis"), HOLDINGS)
 
 
 def parse_and_store_order_history(content):
@@ -657,7 +672,7 @@ def parse_and_store_order_history(content):
             )
             return
 
-        client = MongoClient(settings.MONGO_URI)
+        client = get_mongo_client(MongoClient)
         db = client.get_default_database("stock_analysis")
         collection = db.ibkr_orders
         upserts = 0
@@ -722,7 +737,7 @@ def parse_and_store_order_history(content):
 def save_sync_status(status: str, message: str):
     """Persist the result of the sync job."""
     try:
-        client = MongoClient(settings.MONGO_URI)
+        client = get_mongo_client(MongoClient)
         db = client.get_default_database("stock_analysis")
         db.ibkr_status_log.insert_one({
             "timestamp": datetime.utcnow(),
@@ -752,7 +767,7 @@ def run_ibkr_sync(check_interval_hours: float = 0.0, nav_days: int = 0):
     if check_interval_hours > 0:
         config = get_system_config()
         # Find 'ibkr_last_sync' directly from correct collection
-        client = MongoClient(settings.MONGO_URI)
+        client = get_mongo_client(MongoClient)
         db = client.get_default_database("stock_analysis")
         last_sync_doc = db.system_config.find_one({"_id": "ibkr_last_sync"})
         
@@ -916,11 +931,13 @@ def parse_and_store_nav(content, metadata: dict = None):
         parse_xml_nav(content, metadata)
     else:
         parse_csv_nav(content.decode('utf-8', errors='ignore'), metadata)
+    client = get_mongo_client(MongoClient)
+    bump_response_cache_version(client.get_default_database("stock_analysis"), NAV)
 
 def parse_csv_nav(csv_str, metadata: dict = None):
     """Parse IBKR NAV CSV."""
     import csv
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     
     lines = csv_str.splitlines()
@@ -991,7 +1008,7 @@ def parse_xml_nav(xml_content, metadata: dict = None):
     Parse IBKR NAV XML.
     Uses NavReportMapper for consistent schema.
     """
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     
     root = ET.fromstring(xml_content)
@@ -1134,7 +1151,7 @@ def fetch_and_store_nav_report(report_type: NavReportType):
         data = fetch_flex_report(query_id, token, label=f"nav_{report_type.lower()}")
         
         # Store Raw Report
-        client = MongoClient(settings.MONGO_URI)
+        client = get_mongo_client(MongoClient)
         db = client.get_default_database("stock_analysis")
         db.ibkr_raw_flex_reports.insert_one({
             "ibkr_report_type": report_type.value,
@@ -7,6 +7,7 @@ from datetime import datetime, timezone
 from typing import Any, Callable
 
 from app.config import settings
+from app.database import get_mongo_client
 
 try:
     import ibapi as _ibapi_pkg
@@ -1127,7 +1128,7 @@ class IBKRTWSService:
         if db is None:
             from pymongo import MongoClient
 
-            client = MongoClient(settings.MONGO_URI)
+            client = get_mongo_client(MongoClient)
             db = client.get_default_database("stock_analysis")
 
         upserted = 0
@@ -1196,7 +1197,7 @@ class IBKRTWSService:
         if db is None:
             from pymongo import MongoClient
 
-            client = MongoClient(settings.MONGO_URI)
+            client = get_mongo_client(MongoClient)
             db = client.get_default_database("stock_analysis")
 
         upserted = 0
@@ -0,0 +1,243 @@
+import logging
+
+from pymongo.errors import ConnectionFailure
+
+logger = logging.getLogger(__name__)
+
+# Declarative index registry: collection -> index specs. Indexes are created
+# once at app startup by ``reconcile_indexes``; hot paths no longer call
+# ``create_index`` per request or per service construction.
+INDEX_REGISTRY = {
+    "stock_data": [
+        {"keys": [("Ticker", 1)]},
+    ],
+    "instrument_price_history": [
+        {"keys": [("instrument_key", 1), ("timestamp", -1)]},
+        {"keys": [("source", 1), ("timestamp", -1)]},
+        {"keys": [("timestamp", -1)]},
+        # Sort key once the collection is time-series (see price_history_store).
+        {"keys": [("instrument_key", 1), ("ts", -1)]},
+    ],
+    "instrument_snapshot": [
+        {"keys": [("instrument_key", 1)], "unique": True},
+        {"keys": [("symbol", 1), ("instrument_type", 1)]},
+    ],
+    "opportunities": [
+        {"keys": [("symbol", 1)]},
+        {"keys": [("timestamp", 1)]},
+        {"keys": [("status", 1)]},
+        {"keys": [("trigger_source", 1)]},
+    ],
+    "juicy_fr_followup_reviews": [
+        {"keys": [("fr_id", 1)], "unique": True},
+        {"keys": [("status", 1), ("strategy_type", 1), ("updated_at", -1)]},
+    ],
+    "ibkr_holdings": [
+        {"keys": [("date", -1)]},
+        {"keys": [("source", 1), ("date", -1)]},
+        {"keys": [("snapshot_id", 1)]},
+        {"keys": [("report_date", 1)]},
+    ],
+    "ibkr_holdings_diffs": [
+        {"keys": [("date", -1)]},
+    ],
+    "ibkr_trades": [
+        {"keys": [("symbol", 1), ("date_time", -1)]},
+        {"keys": [("underlying_symbol", 1), ("date_time", -1)]},
+        {"keys": [("date_time", -1)]},
+    ],
+    "ibkr_nav_history": [
+        {"keys": [("ibkr_report_type", 1), ("_report_date", -1)]},
+        {"keys": [("ibkr_report_type", 1), ("account_id", 1), ("_report_date", -1)]},
+    ],
+    "ibkr_orders": [
+        {"keys": [("source", 1), ("underlying_symbol", 1)]},
+    ],
+    "ibkr_dividends": [
+        {"keys": [("symbol", 1), ("code", 1)]},
+        {"keys": [("pay_date", -1)]},
+    ],
+    "juicy_opportunities": [
+        {"keys": [("strategy_key", 1)]},
+        {"keys": [("symbol", 1), ("last_updated", -1)]},
+    ],
+}
+
+# Representative query shapes from the hot paths, explained by the index report.
+QUERY_SHAPES = [
+    {"name": "stock_data_by_ticker", "collection": "stock_data", "filter": {"Ticker": "AAPL"}},
+    {
+        "name": "holdings_latest",
+        "collection": "ibkr_holdings",
+        "filter": {},
+        "sort": [("date", -1)],
+    },
+    {
+        "name": "holdings_latest_by_source",
+        "collection": "ibkr_holdings",
+        "filter": {"source": "tws"},
+        "sort": [("date", -1)],
+    },
+    {"name": "holdings_by_snapshot", "collection": "ibkr_holdings", "filter": {"snapshot_id": "x"}},
+    {"name": "holdings_by_report_date", "collection": "ibkr_holdings", "filter": {"report_date": "x"}},
+    {
+        "name": "trades_by_symbol",
+        "collection": "ibkr_trades",
+        "filter": {"symbol": "AAPL"},
+        "sort": [("date_time", -1)],
+    },
+    {
+        "name": "trades_by_underlying",
+        "collection": "ibkr_trades",
+        "filter": {"$or": [{"symbol": "AAPL"}, {"underlying_symbol": "AAPL"}]},
+        "sort": [("date_time", 1)],
+    },
+    {
+        "name": "nav_latest_by_report_type",
+        "collection": "ibkr_nav_history",
+        "filter": {"ibkr_report_type": "daily"},
+        "sort": [("_report_date", -1)],
+    },
+    {
+        "name": "open_orders_by_underlying",
+        "collection": "ibkr_orders",
+        "filter": {
+            "source": "tws_open_order",
+            "$or": [{"underlying_symbol": {"$in": ["AAPL"]}}, {"symbol": {"$in": ["AAPL"]}}],
+        },
+    },
+    {
+        "name": "dividends_reinvested_by_symbol",
+        "collection": "ibkr_dividends",
+        "filter": {"symbol": "AAPL", "code": "RE"},
+    },
+    {
+        "name": "juicy_by_strategy_key",
+        "collection": "juicy_opportunities",
+        "filter": {"strategy_key": "x"},
+    },
+    {
+        "name": "juicy_latest_by_symbol",
+        "collection": "juicy_opportunities",
+        "filter": {"symbol": "AAPL"},
+        "sort": [("last_updated", -1)],
+    },
+    {
+        "name": "price_history_by_instrument",
+        "collection": "instrument_price_history",
+        "filter": {"instrument_key": "STK:AAPL"},
+        "sort": [("timestamp", -1)],
+    },
+    {
+        "name": "price_history_by_instrument_ts",
+        "collection": "instrument_price_history",
+        "filter": {"instrument_key": "STK:AAPL"},
+        "sort": [("ts", -1)],
+    },
+]
+
+
+def index_name(keys) -> str:
+    """Default MongoDB index name for ``keys`` (e.g. ``symbol_1_date_-1``)."""
+    return "_".join(f"{field}_{direction}" for field, direction in keys)
+
+
+def _create(collection, spec):
+    options = {"unique": True} if spec.get("unique") else {}
+    return collection.create_index(list(spec["keys"]), **options)
+
+
+def ensure_registered_indexes(collection, name: str) -> None:
+    """Create every registered index for ``name`` on ``collection``.
+
+    ``create_index`` is a no-op server side when the index already exists.
+    """
+    for spec in INDEX_REGISTRY.get(name, []):
+        _create(collection, spec)
+
+
+def reconcile_indexes(db, registry=None) -> dict:
+    """Create registered indexes that are missing; report what was found.
+
+    Existing indexes that are not in the registry are reported but never
+    dropped. Failures are collected instead of raised so one bad collection
+    cannot block startup; an unreachable server stops the pass early.
+    """
+    registry = INDEX_REGISTRY if registry is None else registry
+    report = {"created": [], "existing": [], "unregistered": [], "errors": []}
+    for name, specs in registry.items():
+        collection = db[name]
+        try:
+            present = collection.index_information()
+        except ConnectionFailure as exc:
+            # Server unreachable: every other collection would time out too.
+            report["errors"].append({"collection": name, "error": str(exc)})
+            break
+        except Exception as exc:
+            report["errors"].append({"collection": name, "error": str(exc)})
+            continue
+        present_keys = {tuple(tuple(k) for k in info.get("key", [])) for info in present.values()}
+        wanted_keys = set()
+        for spec in specs:
+            keys = tuple(tuple(k) for k in spec["keys"])
+            wanted_keys.add(keys)
+            label = f"{name}.{index_name(spec['keys'])}"
+            if keys in present_keys:
+                report["existing"].append(label)
+                continue
+            try:
+                _create(collection, spec)
+                report["created"].append(label)
+            except Exception as exc:
+                report["errors"].append({"collection": name, "index": label, "error": str(exc)})
+        for idx_name, info in present.items():
+            keys = tuple(tuple(k) for k in info.get("key", []))
+            if idx_name != "_id_" and keys not in wanted_keys:
+                report["unregistered"].append(f"{name}.{idx_name}")
+    if report["created"]:
+        logger.info("Index reconciliation created %d index(es): %s", len(report["created"]), report["created"])
+    for error in report["errors"]:
+        logger.warning("Index reconciliation error: %s", error)
+    return report
+
+
+def _plan_stages(plan):
+    """Yield every stage name in an explain() plan tree."""
+    if not isinstance(plan, dict):
+        return
+    stage = plan.get("stage")
+    if stage:
+        yield stage
+    for key in ("inputStage", "queryPlan"):
+        yield from _plan_stages(plan.get(key))
+    for child in plan.get("inputStages") or []:
+        yield from _plan_stages(child)
+
+
+def _winning_plan(explain: dict) -> dict:
+    planner = explain.get("queryPlanner") or {}
+    return planner.get("winningPlan") or {}
+
+
+def explain_query_shapes(db, shapes=None) -> dict:
+    """Explain each registered query shape and flag collection scans."""
+    shapes = QUERY_SHAPES if shapes is None else shapes
+    results = []
+    for shape in shapes:
+        entry = {"name": shape["name"], "collection": shape["collection"]}
+        try:
+            cursor = db[shape["collection"]].find(shape.get("filter") or {})
+            if shape.get("sort"):
+                cursor = cursor.sort(shape["sort"])
+            stages = list(_plan_stages(_winning_plan(cursor.limit(1).explain())))
+            entry["stages"] = stages
+            entry["collscan"] = "COLLSCAN" in stages
+            entry["in_memory_sort"] = "SORT" in stages
+        except Exception as exc:
+            entry["error"] = str(exc)
+        results.append(entry)
+    return {
+        "shapes": results,
+        "collscan_count": sum(1 for r in results if r.get("collscan")),
+        "collscans": [r["name"] for r in results if r.get("collscan")],
+    }
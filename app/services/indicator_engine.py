@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class IndicatorEngine:
+    """Vectorized multi-ticker indicators over a wide (bar x ticker) panel.
+
+    Produces the same values as the per-ticker helpers on
+    ``StockLiveComparison`` (EMA_20, HMA_20, TSMOM_60, RSI_14, ATR_14 and the
+    MA_30/60/120/200 SMAs), but computes every ticker in one NumPy pass.
+
+    Each ticker's history is right-aligned in the panel (last bar in the last
+    row, NaN padding on top) so tickers with different history lengths keep
+    their own per-ticker window semantics.
+    """
+
+    MA_WINDOWS = (30, 60, 120, 200)
+    EMA_SPAN = 20
+    HMA_WINDOW = 20
+    TSMOM_LOOKBACK = 60
+    RSI_PERIOD = 14
+    ATR_PERIOD = 14
+
+    @staticmethod
+    def build_panel(histories, fields=("Close", "High", "Low")):
+        """Return ({field: ndarray[bars, tickers]}, tickers, lengths) from per-ticker frames."""
+        tickers = []
+        frames = []
+        for ticker, hist in (histories or {}).items():
+            if hist is None or not isinstance(hist, pd.DataFrame) or hist.empty:
+                continue
+            if not set(fields).issubset(hist.columns):
+                continue
+            frame = hist[list(fields)].apply(pd.to_numeric, errors="coerce").dropna(subset=["Close"])
+            if frame.empty:
+                continue
+            tickers.append(ticker)
+            frames.append(frame.to_numpy(dtype="float64"))
+
+        lengths = np.array([len(f) for f in frames], dtype=int)
+        rows = int(lengths.max()) if len(lengths) else 0
+        panel = {field: np.full((rows, len(frames)), np.nan) for field in fields}
+        for col, frame in enumerate(frames):
+            for pos, field in enumerate(fields):
+                panel[field][rows - len(frame):, col] = frame[:, pos]
+        return panel, tickers, lengths
+
+    @staticmethod
+    def _wma(values, window):
+        """Rolling WMA along axis 0 (weights 1..window); NaN until a full window exists."""
+        out = np.full(values.shape, np.nan)
+        if window <= 0 or values.shape[0] < window:
+            return out
+        weights = np.arange(1, window + 1, dtype="float64")
+        windows = sliding_window_view(values, window, axis=0)  # (rows-w+1, tickers, w)
+        out[window - 1:] = windows @ weights / weights.sum()
+        return out
+
+    @staticmethod
+    def _round(values, digits):
+        return [None if not np.isfinite(v) else round(float(v), digits) for v in values]
+
+    @classmethod
+    def compute(cls, histories):
+        """Return {ticker: {indicator: value}} for every usable ticker history."""
+        panel, tickers, lengths = cls.build_panel(histories)
+        if not tickers:
+            return {}
+        close, high, low = panel["Close"], panel["High"], panel["Low"]
+        rows = close.shape[0]
+        results = {}
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # SMAs over the last w bars.
+            for w in cls.MA_WINDOWS:
+                vals = close[-w:].mean(axis=0) if rows >= w else np.full(len(tickers), np.nan)
+                results[f"MA_{w}"] = np.where(lengths >= w, vals, np.nan)
+
+            # EMA (adjust=False): recursion over bars, vectorized across tickers.
+            alpha = 2.0 / (cls.EMA_SPAN + 1.0)
+            ema = np.full(len(tickers), np.nan)
+            for row in close:
+                ema = np.where(np.isnan(ema), row, alpha * row + (1.0 - alpha) * ema)
+            results["EMA_20"] = np.where(lengths >= cls.EMA_SPAN, ema, np.nan)
+
+            # HMA = WMA(sqrt(n)) of 2*WMA(n/2) - WMA(n).
+            n = cls.HMA_WINDOW
+            raw = 2.0 * cls._wma(close, n // 2) - cls._wma(close, n)
+            hma = cls._wma(raw, int(np.sqrt(n)))[-1]
+            results["HMA_20"] = np.where(lengths >= n, hma, np.nan)
+
+            # TSMOM: Price_t / Price_{t-lookback} - 1.
+            lb = cls.TSMOM_LOOKBACK
+            if rows > lb:
+                past = close[-(lb + 1)]
+                tsmom = np.where(past == 0, np.nan, close[-1] / past - 1.0)
+            else:
+                tsmom = np.full(len(tickers), np.nan)
+            results["TSMOM_60"] = np.where(lengths > lb, tsmom, np.nan)
+
+            # RSI: simple means of gains/losses over the last `period` diffs.
+            # NaN diffs (before a ticker's first bar) count as 0, like where(delta > 0, 0).
+            p = cls.RSI_PERIOD
+            delta = np.vstack([np.full((1, len(tickers)), np.nan), np.diff(close, axis=0)])
+            if delta.shape[0] >= p:
+                recent = delta[-p:]
+                gain = np.where(recent > 0, recent, 0.0).mean(axis=0)
+                loss = np.where(recent < 0, -recent, 0.0).mean(axis=0)
+                rsi = 100.0 - 100.0 / (1.0 + gain / loss)
+            else:
+                rsi = np.full(len(tickers), np.nan)
+            results["RSI_14"] = np.where(lengths >= p, rsi, np.nan)
+
+            # ATR: mean of the last `period` true ranges; the first bar has no prior close.
+            p = cls.ATR_PERIOD
+            prev_close = np.vstack([np.full((1, len(tickers)), np.nan), close[:-1]])
+            tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+            atr = tr[-p:].mean(axis=0) if rows >= p else np.full(len(tickers), np.nan)
+            results["ATR_14"] = np.where(lengths >= p, atr, np.nan)
+
+        digits = {"TSMOM_60": 4}
+        rounded = {name: cls._round(vals, digits.get(name, 2)) for name, vals in results.items()}
+        return {
+            ticker: {name: rounded[name][col] for name in rounded}
+            for col, ticker in enumerate(tickers)
+        }
@@ -7,6 +7,9 @@ from typing import Any
 
 import yfinance as yf
 
+from app.services.holdings_latest import get_latest_holdings
+from app.services.response_cache import JUICYS, bump_response_cache_version
+
 
 @dataclass(frozen=True)
 class JuicyPreset:
@@ -177,7 +180,7 @@ def _apply_assignment_risk(row: dict, *, current_price: float | None, dividend_a
 
 def get_owned_symbols(db) -> set[str]:
     try:
-        latest = db.ibkr_holdings.find_one(sort=[("date", -1)])
+        latest = get_latest_holdings(db)
     except Exception:
         latest = None
     if not isinstance(latest, dict) or not latest:
@@ -706,6 +709,8 @@ def upsert_juicy_candidates(db, symbol: str, rows: list[dict], source: str = "op
         )
         out.append({**doc, "create_date": create_date})
 
+    if out:
+        bump_response_cache_version(db, JUICYS)
     return sorted(out, key=lambda d: (d.get("score") or 0), reverse=True)
 
 
@@ -1,6 +1,7 @@
 from app.models.opportunity import JuicyOpportunity, OpportunityStatus
 from pymongo import MongoClient
 from app.config import settings
+from app.database import get_mongo_client
 import logging
 from typing import List, Optional
 from datetime import datetime
@@ -10,15 +11,11 @@ logger = logging.getLogger(__name__)
 class OpportunityService:
     def __init__(self, db_client=None):
         # Allow injection or create new client
-        self.client = db_client or MongoClient(settings.MONGO_URI)
+        self.client = db_client or get_mongo_client(MongoClient)
         self.db = self.client.get_default_database("stock_analysis")
+        # Indexes are declared in app.services.index_registry and
+        # reconciled once at startup.
         self.collection = self.db.opportunities
-        
-        # Ensure Indexes
-        self.collection.create_index("symbol")
-        self.collection.create_index("timestamp")
-        self.collection.create_index("status")
-        self.collection.create_index("trigger_source")
 
     def create_opportunity(self, opportunity: JuicyOpportunity) -> str:
         """Persist a new opportunity to the database."""
@@ -1,5 +1,7 @@
 from pymongo import MongoClient
 from app.config import settings
+from app.database import get_mongo_client
+from app.services.holdings_latest import get_latest_holdings
 
 def get_ticker_pnl(ticker: str):
     """
@@ -9,7 +11,7 @@ def get_ticker_pnl(ticker: str):
     2. Unrealized PnL from HOLDINGS (Current snapshot).
     3. Dividends (from TRADES? Or Cash Transactions? - Pending implementation).
     """
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     
     # 1. Identify all related symbols (The stock itself + options)
@@ -39,7 +41,7 @@ def get_ticker_pnl(ticker: str):
     
     # --- Unrealized PnL (from Latest Holdings) ---
     # Fetch latest snapshot date first
-    latest_date_doc = db.ibkr_holdings.find_one(sort=[("date", -1)])
+    latest_date_doc = get_latest_holdings(db)
     unrealized_pnl = 0.0
     market_value = 0.0
     
@@ -2,6 +2,8 @@ from datetime import datetime, timedelta, timezone
 import logging
 from pymongo import MongoClient
 from app.config import settings
+from app.database import get_mongo_client
+from app.services.holdings_latest import get_latest_holdings
 from app.models import NavReportType
 
 
@@ -43,7 +45,7 @@ def _is_recent_live_timestamp(value, max_age_minutes: int = 5) -> bool:
 
 def get_latest_live_nav_snapshot(account_id: str | None = None):
     """Return the latest intraday TWS NAV snapshot if available."""
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     normalized_account = _normalize_account_id(account_id)
     match_filter = {"source": "tws"}
@@ -90,7 +92,7 @@ def get_report_stats(rtype: NavReportType, account_id: str | None = None):
     Get stats for a single report type.
     Returns dict with {start, end, change, mtm, date} or None.
     """
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     normalized_account = _normalize_account_id(account_id)
     base_query = {"ibkr_report_type": rtype.value}
@@ -139,7 +141,7 @@ def get_nav_history_stats(account_id: str | None = None):
     Calculate NAV Stats using authoritative 'ibkr_nav_history' collection.
     Uses specific IBKR Report Types (1D, 7D, 30D, etc) for precise calculations.
     """
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     from app.models import NavReportType
     normalized_account = _normalize_account_id(account_id)
@@ -341,12 +343,12 @@ def run_portfolio_analysis():
     2. Tax Harvesting Opportunities
     3. Execution Quality (Slippage)
     """
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     
     # 1. Fetch Latest Holdings Snapshot
     # Since we are time-series, we need the latest 'report_date'
-    latest_holding = db.ibkr_holdings.find_one(sort=[("date", -1)])
+    latest_holding = get_latest_holdings(db)
     if not latest_holding:
         logging.info("Analysis Skipped: No holdings data.")
         return
@@ -0,0 +1,40 @@
+import hashlib
+import json
+
+# Change-only persistence for the 30s TWS position sync. A new ibkr_holdings
+# snapshot is written only when an account's position set changes; otherwise
+# the holdings_latest pointer gets a heartbeat. The TWS position payload has
+# no price fields today; they are hashed anyway so that, should it carry
+# them, a price move writes a new snapshot instead of being dropped.
+STRUCTURAL_FIELDS = ("position_key", "secType", "quantity", "avg_cost")
+PRICE_FIELDS = ("market_price", "market_value", "unrealized_pnl", "realized_pnl")
+
+
+def position_set_hashes(docs: list[dict]) -> dict[str, str]:
+    """Per-account sha1 over the structural and price fields of each position."""
+    by_account: dict[str, list] = {}
+    for doc in docs:
+        row = [doc.get(field) for field in STRUCTURAL_FIELDS + PRICE_FIELDS]
+        by_account.setdefault(str(doc.get("account_id")), []).append(row)
+    return {
+        account: hashlib.sha1(
+            json.dumps(sorted(rows, key=lambda r: str(r[0])), default=str).encode("utf-8")
+        ).hexdigest()
+        for account, rows in by_account.items()
+    }
+
+
+def changed_accounts(previous: dict | None, current: dict) -> list[str]:
+    previous = previous or {}
+    return sorted(a for a in set(previous) | set(current) if previous.get(a) != current.get(a))
+
+
+def apply_snapshot_heartbeat(rows: list[dict], pointer: dict | None) -> list[dict]:
+    """Stamp rows of a TWS snapshot with the pointer's ``last_tws_update`` heartbeat."""
+    if not rows or not isinstance(pointer, dict):
+        return rows
+    heartbeat = pointer.get("last_tws_update")
+    if heartbeat is not None:
+        for row in rows:
+            row["last_tws_update"] = heartbeat
+    return rows
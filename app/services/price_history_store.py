@@ -0,0 +1,289 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from pymongo.errors import CollectionInvalid, OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# instrument_price_history is a MongoDB time-series collection (metaField
+# ``instrument_key``, timeField ``ts``) with native expireAfterSeconds
+# retention. Servers without time-series support keep a regular collection
+# with the same document shape (the "stand-in"); the daily retention job then
+# deletes expired rows itself. Rows keep their string ``timestamp`` for API
+# compatibility; ``ts`` is the real datetime. Rows written before ``ts``
+# existed only gain it when the migration (app/scripts/migrate_price_history.py)
+# runs, so readers sort on ``timestamp`` until the collection is time-series.
+# ``timestamp`` strings are local wall-clock time (writers format
+# ``datetime.now()``); ``ts`` holds the same instant in UTC.
+PRICE_HISTORY_COLLECTION = "instrument_price_history"
+PRICE_HISTORY_LEGACY_COLLECTION = "instrument_price_history_legacy"
+TIME_FIELD = "ts"
+META_FIELD = "instrument_key"
+DEFAULT_RETENTION_DAYS = 730
+MIGRATION_BATCH_SIZE = 1000
+TIMESTAMP_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d")
+# How long a process trusts its last list_collections answer; the migration
+# script clears the cache, other processes pick the change up within this.
+TIMESERIES_CACHE_SECONDS = 300.0
+
+# interval -> ($dateTrunc unit, binSize, bucket seconds)
+DOWNSAMPLE_INTERVALS = {
+    "1m": ("minute", 1, 60),
+    "5m": ("minute", 5, 300),
+    "1d": ("day", 1, 86400),
+}
+
+
+_timeseries_cache: dict = {}
+_timeseries_cache_lock = threading.Lock()
+
+
+def parse_history_timestamp(value) -> datetime | None:
+    """Best-effort parse of a stored ``timestamp`` into a UTC datetime.
+
+    Naive strings are local wall-clock time, as written by the ingest jobs;
+    naive datetimes are UTC, as returned by pymongo.
+    """
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    text = str(value or "").strip()
+    if not text:
+        return None
+    try:
+        parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        parsed = None
+        for fmt in TIMESTAMP_FORMATS:
+            try:
+                parsed = datetime.strptime(text, fmt)
+                break
+            except ValueError:
+                continue
+    if parsed is None:
+        return None
+    return parsed.astimezone(timezone.utc)
+
+
+def _inspect_timeseries(db, name: str) -> bool:
+    try:
+        for info in db.list_collections(filter={"name": name}):
+            return bool((info.get("options") or {}).get("timeseries"))
+    except Exception as exc:
+        logger.debug("Unable to inspect collection %s: %s", name, exc)
+    return False
+
+
+def is_timeseries_collection(db, name: str = PRICE_HISTORY_COLLECTION) -> bool:
+    """Whether ``name`` is time-series, cached per client/database for ``TIMESERIES_CACHE_SECONDS``."""
+    key = (id(getattr(db, "client", db)), getattr(db, "name", None), name)
+    now = time.monotonic()
+    with _timeseries_cache_lock:
+        cached = _timeseries_cache.get(key)
+        if cached is not None and now - cached[0] < TIMESERIES_CACHE_SECONDS:
+            return cached[1]
+    result = _inspect_timeseries(db, name)
+    with _timeseries_cache_lock:
+        _timeseries_cache[key] = (now, result)
+    return result
+
+
+def reset_timeseries_cache() -> None:
+    """Forget cached collection types (after a migration, and in tests)."""
+    with _timeseries_cache_lock:
+        _timeseries_cache.clear()
+
+
+def history_sort_field(db) -> str:
+    """``ts`` once the collection is time-series (every row has it), else ``timestamp``."""
+    return TIME_FIELD if is_timeseries_collection(db) else "timestamp"
+
+
+def _create_timeseries(db, retention_days: int) -> None:
+    db.create_collection(
+        PRICE_HISTORY_COLLECTION,
+        timeseries={"timeField": TIME_FIELD, "metaField": META_FIELD, "granularity": "minutes"},
+        expireAfterSeconds=int(retention_days) * 86400,
+    )
+
+
+def _copy_legacy_rows(db, source_name: str) -> int:
+    """Copy rows into the time-series collection, deriving ``ts`` from ``timestamp``."""
+    target = db[PRICE_HISTORY_COLLECTION]
+    copied = 0
+    batch = []
+    for row in db[source_name].find({}, {"_id": 0}):
+        ts = row.get(TIME_FIELD) or parse_history_timestamp(row.get("timestamp"))
+        if ts is None or not row.get(META_FIELD):
+            continue
+        batch.append(dict(row, **{TIME_FIELD: ts}))
+        if len(batch) >= MIGRATION_BATCH_SIZE:
+            target.insert_many(batch, ordered=False)
+            copied += len(batch)
+            batch = []
+    if batch:
+        target.insert_many(batch, ordered=False)
+        copied += len(batch)
+    return copied
+
+
+def backfill_standin_ts(db) -> int:
+    """Stand-in mode: set ``ts`` on rows written before it existed."""
+    collection = db[PRICE_HISTORY_COLLECTION]
+    updated = 0
+    for row in collection.find({TIME_FIELD: {"$exists": False}}, {"_id": 1, "timestamp": 1}):
+        ts = parse_history_timestamp(row.get("timestamp"))
+        if ts is not None:
+            collection.update_one({"_id": row["_id"]}, {"$set": {TIME_FIELD: ts}})
+            updated += 1
+    return updated
+
+
+def ensure_price_history_collection(
+    db, retention_days: int = DEFAULT_RETENTION_DAYS, timeseries_supported: bool | None = None
+) -> dict:
+    """Create (or migrate to) the time-series collection; return what happened.
+
+    An existing regular collection is renamed to
+    ``instrument_price_history_legacy`` and its rows are copied into the new
+    time-series collection; the legacy collection is left for manual drop.
+    When the server cannot create time-series collections (or
+    ``timeseries_supported`` is False) the regular collection stays in place
+    and missing ``ts`` values are backfilled.
+    """
+    reset_timeseries_cache()
+    if is_timeseries_collection(db):
+        return {"mode": "timeseries", "action": "none"}
+    if timeseries_supported is False:
+        return {"mode": "standin", "action": "backfill", "backfilled": backfill_standin_ts(db)}
+
+    existing = PRICE_HISTORY_COLLECTION in db.list_collection_names()
+    try:
+        if existing:
+            db[PRICE_HISTORY_COLLECTION].rename(PRICE_HISTORY_LEGACY_COLLECTION)
+        _create_timeseries(db, retention_days)
+    except (OperationFailure, CollectionInvalid, NotImplementedError, TypeError) as exc:
+        if existing and PRICE_HISTORY_LEGACY_COLLECTION in db.list_collection_names():
+            db[PRICE_HISTORY_LEGACY_COLLECTION].rename(PRICE_HISTORY_COLLECTION)
+        logger.warning("Time-series collections unavailable, keeping regular %s: %s", PRICE_HISTORY_COLLECTION, exc)
+        return {"mode": "standin", "action": "backfill", "backfilled": backfill_standin_ts(db)}
+
+    reset_timeseries_cache()
+    copied = _copy_legacy_rows(db, PRICE_HISTORY_LEGACY_COLLECTION) if existing else 0
+    logger.info("Created time-series %s (copied %s legacy rows).", PRICE_HISTORY_COLLECTION, copied)
+    return {"mode": "timeseries", "action": "migrated" if existing else "created", "copied": copied}
+
+
+def set_price_history_retention(db, retention_days: int) -> bool:
+    """Align the time-series expireAfterSeconds; False when not a time-series collection."""
+    if not is_timeseries_collection(db):
+        return False
+    db.command("collMod", PRICE_HISTORY_COLLECTION, expireAfterSeconds=int(retention_days) * 86400)
+    return True
+
+
+def insert_new_price_history_rows(collection, rows: list[dict]) -> int:
+    """Insert rows not already stored (time-series collections cannot upsert)."""
+    rows = [row for row in rows if row.get(META_FIELD) and row.get(TIME_FIELD)]
+    if not rows:
+        return 0
+    existing = {
+        (doc.get(META_FIELD), doc.get("source"), parse_history_timestamp(doc.get(TIME_FIELD)))
+        for doc in collection.find(
+            {
+                META_FIELD: {"$in": sorted({row[META_FIELD] for row in rows})},
+                TIME_FIELD: {"$in": [row[TIME_FIELD] for row in rows]},
+            },
+            {"_id": 0, META_FIELD: 1, TIME_FIELD: 1, "source": 1},
+        )
+    }
+    fresh = [
+        row for row in rows
+        if (row[META_FIELD], row.get("source"), parse_history_timestamp(row[TIME_FIELD])) not in existing
+    ]
+    if fresh:
+        collection.insert_many(fresh, ordered=False)
+    return len(fresh)
+
+
+def downsample_pipeline(keys: list[str], interval: str, since: datetime | None, limit: int) -> list[dict]:
+    unit, bin_size, _ = DOWNSAMPLE_INTERVALS[interval]
+    match = {META_FIELD: {"$in": list(keys)}}
+    if since is not None:
+        match[TIME_FIELD] = {"$gte": since}
+    return [
+        {"$match": match},
+        {"$sort": {TIME_FIELD: 1}},
+        {
+            "$group": {
+                "_id": {"$dateTrunc": {"date": f"${TIME_FIELD}", "unit": unit, "binSize": bin_size}},
+                "open": {"$first": "$price"},
+                "high": {"$max": "$price"},
+                "low": {"$min": "$price"},
+                "close": {"$last": "$price"},
+                "count": {"$sum": 1},
+            }
+        },
+        {"$sort": {"_id": -1}},
+        {"$limit": int(limit)},
+        {"$sort": {"_id": 1}},
+    ]
+
+
+def _bar(bucket: datetime, open_, high, low, close, count) -> dict:
+    return {
+        "timestamp": bucket.strftime("%Y-%m-%d %H:%M:%S"),
+        TIME_FIELD: bucket,
+        "open": open_,
+        "high": high,
+        "low": low,
+        "close": close,
+        "price": close,
+        "count": count,
+    }
+
+
+def downsample_rows(rows: list[dict], interval: str, limit: int) -> list[dict]:
+    """In-process equivalent of ``downsample_pipeline`` for the stand-in."""
+    _, _, seconds = DOWNSAMPLE_INTERVALS[interval]
+    buckets: dict[datetime, list] = {}
+    for row in rows:
+        ts = parse_history_timestamp(row.get(TIME_FIELD) or row.get("timestamp"))
+        price = row.get("price")
+        if ts is None or price is None:
+            continue
+        bucket = datetime.fromtimestamp(int(ts.timestamp()) // seconds * seconds, tz=timezone.utc)
+        buckets.setdefault(bucket, []).append((ts, price))
+    bars = []
+    for bucket in sorted(buckets)[-int(limit):]:
+        points = sorted(buckets[bucket], key=lambda p: p[0])
+        prices = [p for _, p in points]
+        bars.append(_bar(bucket, prices[0], max(prices), min(prices), prices[-1], len(prices)))
+    return bars
+
+
+def fetch_downsampled_history(db, keys: list[str], interval: str, days: int | None, limit: int) -> list[dict]:
+    """Server-side OHLC bars per ``interval``; falls back to in-process bucketing.
+
+    The ``$dateTrunc`` pipeline needs ``ts`` on every row, so it only runs
+    against the time-series collection; otherwise rows are selected by their
+    ``timestamp`` string and bucketed here.
+    """
+    since = datetime.now(timezone.utc) - timedelta(days=days) if days else None
+    collection = db[PRICE_HISTORY_COLLECTION]
+    if is_timeseries_collection(db):
+        try:
+            docs = list(collection.aggregate(downsample_pipeline(keys, interval, since, limit)))
+            return [
+                _bar(parse_history_timestamp(doc["_id"]), doc.get("open"), doc.get("high"), doc.get("low"),
+                     doc.get("close"), doc.get("count"))
+                for doc in docs
+                if isinstance(doc, dict) and doc.get("_id") is not None
+            ]
+        except (OperationFailure, NotImplementedError) as exc:
+            logger.info("Server-side downsampling unavailable (%s); bucketing in-process.", exc)
+    query = {META_FIELD: {"$in": list(keys)}}
+    if since is not None:
+        query["timestamp"] = {"$gte": since.astimezone().strftime(TIMESTAMP_FORMATS[0])}
+    return downsample_rows(list(collection.find(query, {"_id": 0})), interval, limit)
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# In-process TTL + LRU cache for read-heavy dashboard routes. Entries are
+# keyed by route and parameters and remember the data versions they were
+# computed from. Writers bump a per-namespace counter in system_config
+# (so writers in other processes invalidate too); an entry whose versions
+# no longer match is a miss. The TTL bounds staleness for data that changes
+# without a bump (e.g. freshness flags that age with the clock).
+CACHE_VERSIONS_ID = "response_cache_versions"
+STOCKS = "stocks"
+HOLDINGS = "holdings"
+JUICYS = "juicys"
+NAV = "nav"
+# How long a process trusts its last read of the version document.
+VERSION_POLL_SECONDS = 1.0
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 15.0, clock=time.monotonic):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self._clock = clock
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0, "invalidated": 0}
+
+    def get(self, key, versions: dict):
+        """Return ``(True, value)`` for a live entry computed at ``versions``, else ``(False, None)``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return False, None
+            stored_at, stored_versions, value = entry
+            if self._clock() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return False, None
+            if stored_versions != versions:
+                del self._entries[key]
+                self._stats["invalidated"] += 1
+                self._stats["misses"] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return True, value
+
+    def put(self, key, versions: dict, value) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock(), dict(versions), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            by_route: dict[str, int] = {}
+            for key in self._entries:
+                by_route[key[0]] = by_route.get(key[0], 0) + 1
+            return {
+                **self._stats,
+                "hit_ratio": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "entries_by_route": by_route,
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            for name in self._stats:
+                self._stats[name] = 0
+
+
+_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+)
+_local_versions: dict = {}
+_shared_versions: dict = {}
+_shared_read_at = None
+_versions_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    return _cache
+
+
+def bump_response_cache_version(db, *namespaces: str) -> None:
+    """Invalidate cached responses built from ``namespaces``; call after a write commits."""
+    global _shared_read_at
+    if not namespaces:
+        return
+    with _versions_lock:
+        for namespace in namespaces:
+            _local_versions[namespace] = _local_versions.get(namespace, 0) + 1
+        # Force the next reader to pick up the shared counters.
+        _shared_read_at = None
+    try:
+        db.system_config.update_one(
+            {"_id": CACHE_VERSIONS_ID},
+            {"$inc": {namespace: 1 for namespace in namespaces}},
+            upsert=True,
+        )
+    except Exception as exc:
+        logger.warning("Unable to bump response cache version %s: %s", namespaces, exc)
+
+
+def current_versions(db, namespaces) -> dict:
+    """Versions of ``namespaces``: the shared counters plus this process's own bumps."""
+    global _shared_versions, _shared_read_at
+    now = time.monotonic()
+    with _versions_lock:
+        stale = _shared_read_at is None or now - _shared_read_at >= VERSION_POLL_SECONDS
+    if stale:
+        doc = db.system_config.find_one({"_id": CACHE_VERSIONS_ID})
+        shared = {k: v for k, v in doc.items() if k != "_id"} if isinstance(doc, dict) else {}
+        with _versions_lock:
+            _shared_versions = shared
+            _shared_read_at = now
+    with _versions_lock:
+        return {ns: (_shared_versions.get(ns, 0), _local_versions.get(ns, 0)) for ns in namespaces}
+
+
+def _cache_key(route: str, params: dict) -> tuple:
+    return route, tuple(sorted((k, repr(v)) for k, v in params.items()))
+
+
+def _versions_or_none(db, route: str, namespaces):
+    try:
+        return current_versions(db, namespaces)
+    except Exception as exc:
+        logger.warning("Response cache bypassed for %s: %s", route, exc)
+        return None
+
+
+def cached_response(db, route: str, params: dict, namespaces, compute, cacheable=None):
+    """Return ``compute()`` through the cache; ``cacheable(value)`` False skips storing.
+
+    Cached values are shared between requests and must not be mutated.
+    """
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return compute()
+    key = _cache_key(route, params)
+    versions = _versions_or_none(db, route, namespaces)
+    if versions is None:
+        return compute()
+    hit, value = _cache.get(key, versions)
+    if hit:
+        return value
+    value = compute()
+    if cacheable is None or cacheable(value):
+        _cache.put(key, versions, value)
+    return value
+
+
+async def cached_response_async(db, route: str, params: dict, namespaces, compute, cacheable=None):
+    """``cached_response`` for ``async def`` routes; ``compute`` is a coroutine function."""
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return await compute()
+    key = _cache_key(route, params)
+    versions = await asyncio.to_thread(_versions_or_none, db, route, namespaces)
+    if versions is None:
+        return await compute()
+    hit, value = _cache.get(key, versions)
+    if hit:
+        return value
+    value = await compute()
+    if cacheable is None or cacheable(value):
+        _cache.put(key, versions, value)
+    return value
+
+
+def reset_response_cache() -> None:
+    """Drop every entry, statistic and remembered version (tests, admin)."""
+    global _shared_versions, _shared_read_at
+    _cache.clear()
+    _cache.reset_stats()
+    with _versions_lock:
+        _local_versions.clear()
+        _shared_versions = {}
+        _shared_read_at = None
@@ -1,12 +1,13 @@
 from pymongo import MongoClient
 from app.config import settings
+from app.database import get_mongo_client
 
 from app.services.opportunity_service import OpportunityService
 from app.models.opportunity import JuicyOpportunity, OpportunityStatus
 import logging
 
 def get_stock_collection():
-    client = MongoClient(settings.MONGO_URI)
+    client = get_mongo_client(MongoClient)
     db = client.get_default_database("stock_analysis")
     return db.stock_data
 
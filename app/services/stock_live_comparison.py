@@ -1,4 +1,6 @@
+import hashlib
 import logging
+import os
 from typing import List
 from datetime import datetime, timezone
 import time
@@ -6,14 +8,23 @@ from pymongo import MongoClient
 
 from stock_live_comparison import StockLiveComparison
 from app.config import settings
+from app.database import get_mongo_client
+
+# Lower bound for the adaptive interval when request_throttle_interval_sec is 0,
+# so a 429 can still double it.
+MIN_ADAPTIVE_INTERVAL_SEC = 0.25
 
 DEFAULT_STOCK_ANALYSIS_HTTP_SETTINGS = {
     "download_batch_size": 6,
     "batch_pause_sec": 8.0,
     "request_throttle_interval_sec": 1.5,
+    "fetch_max_workers": 4,
+    "price_action_workers": 0,
+    "adaptive_rate_enabled": True,
     "scheduler_sharding_enabled": False,
     "scheduler_shard_size": 25,
     "scheduler_shard_pause_sec": 20.0,
+    "scheduler_shard_workers": 1,
 }
 
 
@@ -27,6 +38,9 @@ def _coerce_stock_analysis_http_settings(doc: dict | None) -> dict:
         "request_throttle_interval_sec",
         source.get("min_request_interval_sec", payload["request_throttle_interval_sec"]),
     )
+    raw_fetch_workers = source.get("fetch_max_workers", payload["fetch_max_workers"])
+    raw_price_action_workers = source.get("price_action_workers", payload["price_action_workers"])
+    raw_adaptive_rate = source.get("adaptive_rate_enabled", payload["adaptive_rate_enabled"])
     raw_scheduler_enabled = source.get(
         "scheduler_sharding_enabled",
         payload["scheduler_sharding_enabled"],
@@ -39,6 +53,10 @@ def _coerce_stock_analysis_http_settings(doc: dict | None) -> dict:
         "scheduler_shard_pause_sec",
         payload["scheduler_shard_pause_sec"],
     )
+    raw_scheduler_shard_workers = source.get(
+        "scheduler_shard_workers",
+        payload["scheduler_shard_workers"],
+    )
 
     try:
         payload["download_batch_size"] = max(1, int(raw_batch_size))
@@ -55,6 +73,27 @@ def _coerce_stock_analysis_http_settings(doc: dict | None) -> dict:
     except (TypeError, ValueError):
         pass
 
+    try:
+        payload["fetch_max_workers"] = max(1, int(raw_fetch_workers))
+    except (TypeError, ValueError):
+        pass
+
+    try:
+        # 0 = one worker process per core.
+        payload["price_action_workers"] = max(0, int(raw_price_action_workers))
+    except (TypeError, ValueError):
+        pass
+
+    if isinstance(raw_adaptive_rate, str):
+        payload["adaptive_rate_enabled"] = raw_adaptive_rate.strip().lower() in {
+            "1",
+            "true",
+            "yes",
+            "on",
+        }
+    else:
+        payload["adaptive_rate_enabled"] = bool(raw_adaptive_rate)
+
     if isinstance(raw_scheduler_enabled, str):
         payload["scheduler_sharding_enabled"] = raw_scheduler_enabled.strip().lower() in {
             "1",
@@ -75,12 +114,17 @@ def _coerce_stock_analysis_http_settings(doc: dict | None) -> dict:
     except (TypeError, ValueError):
         pass
 
+    try:
+        payload["scheduler_shard_workers"] = max(1, int(raw_scheduler_shard_workers))
+    except (TypeError, ValueError):
+        pass
+
     return payload
 
 
 def _load_stock_analysis_http_settings() -> dict:
     try:
-        client = MongoClient(settings.MONGO_URI)
+        client = get_mongo_client(MongoClient)
         db = client.get_default_database("stock_analysis")
         doc = db.system_config.find_one({"_id": "stock_analysis_http_config"}) or {}
         return _coerce_stock_analysis_http_settings(doc)
@@ -89,15 +133,63 @@ def _load_stock_analysis_http_settings() -> dict:
         return dict(DEFAULT_STOCK_ANALYSIS_HTTP_SETTINGS)
 
 
+def _load_learned_request_interval() -> float | None:
+    """Return the request interval learned by the previous adaptive run, if any."""
+    try:
+        client = get_mongo_client(MongoClient)
+        db = client.get_default_database("stock_analysis")
+        doc = db.system_config.find_one({"_id": "stock_analysis_adaptive_rate"}) or {}
+        learned = float(doc.get("learned_request_interval_sec"))
+        return learned if learned > 0 else None
+    except (TypeError, ValueError):
+        return None
+    except Exception as exc:
+        logging.warning("stock analysis learned rate load failed: %s", exc)
+        return None
+
+
+def _persist_learned_request_interval(run_summary: dict) -> None:
+    """Store the controller's final interval so the next run starts near it."""
+    interval = run_summary.get("request_interval_sec")
+    if not run_summary.get("adaptive_rate_enabled") or not interval:
+        return
+    if not (run_summary.get("rate_success_count") or run_summary.get("rate_limited_count")):
+        return
+    try:
+        client = get_mongo_client(MongoClient)
+        db = client.get_default_database("stock_analysis")
+        db.system_config.update_one(
+            {"_id": "stock_analysis_adaptive_rate"},
+            {
+                "$set": {
+                    "learned_request_interval_sec": float(interval),
+                    "rate_success_count": int(run_summary.get("rate_success_count") or 0),
+                    "rate_limited_count": int(run_summary.get("rate_limited_count") or 0),
+                    "updated_at": datetime.now(timezone.utc),
+                }
+            },
+            upsert=True,
+        )
+    except Exception as exc:
+        logging.warning("stock analysis learned rate persist failed: %s", exc)
+
+
 def _persist_stock_ingest_telemetry(payload: dict) -> None:
     try:
-        client = MongoClient(settings.MONGO_URI)
+        client = get_mongo_client(MongoClient)
         db = client.get_default_database("stock_analysis")
         db.stock_ingest_runs.insert_one(payload)
     except Exception as exc:
         logging.warning("stock ingest telemetry persist failed: %s", exc)
 
 
+def _build_stock_fetch_run_id(tickers: List[str], trigger: str, now: datetime | None = None) -> str:
+    """Deterministic checkpoint run id: same trigger + ticker set on the same day resumes."""
+    now = now or datetime.now()
+    digest = hashlib.sha1(",".join(sorted({str(t) for t in tickers})).encode("utf-8")).hexdigest()[:12]
+    return f"{trigger}-{now.strftime('%Y%m%d')}-{digest}"
+
+
 def _build_ingest_telemetry_fields(
     trigger: str,
     source_used: str,
@@ -127,6 +219,18 @@ def _build_ingest_telemetry_fields(
         "failure_count": int(run_summary.get("failed_fetch_count") or len(failures)),
         "failures": failures,
         "ingest_mode": "realtime_sync" if trigger == "sync" else "batch",
+        "option_chain_cache_hits": int(run_summary.get("option_chain_cache_hits") or 0),
+        "option_chain_cache_misses": int(run_summary.get("option_chain_cache_misses") or 0),
+        "checkpoint_resumed_count": int(run_summary.get("checkpoint_resumed_count") or 0),
+        "adaptive_rate_enabled": bool(run_summary.get("adaptive_rate_enabled")),
+        "request_interval_sec": run_summary.get("request_interval_sec"),
+        "request_rate_per_sec": run_summary.get("request_rate_per_sec"),
+        "rate_success_count": int(run_summary.get("rate_success_count") or 0),
+        "rate_limited_count": int(run_summary.get("rate_limited_count") or 0),
+        "history_batch_count": int(run_summary.get("history_batch_count") or 0),
+        "history_batch_splits": int(run_summary.get("history_batch_splits") or 0),
+        "history_batch_failed_tickers": int(run_summary.get("history_batch_failed_tickers") or 0),
+        "history_batch_avg_latency_sec": run_summary.get("history_batch_avg_latency_sec"),
     }
 
 def run_stock_live_comparison(
@@ -134,6 +238,10 @@ def run_stock_live_comparison(
     trigger: str = "scheduled",
     force_new_file_override: bool | None = None,
     allow_create_if_missing_override: bool | None = None,
+    run_id: str | None = None,
+    shard_size: int | None = None,
+    shard_workers: int = 1,
+    rate_state: dict | None = None,
 ) -> dict:
     """Run stock comparison and control report-file creation by trigger.
 
@@ -141,6 +249,15 @@ def run_stock_live_comparison(
     - manual: user clicked "Run Live Comparison" -> always create new report file
     - scheduled: daily scheduler run -> at most one new report file per day
     - sync: background ticker sync/update -> refresh data without creating a new report file
+
+    `run_id` names the fetch checkpoint journal. When omitted it is derived from
+    trigger + ticker set + day, so a rerun after a crash resumes the same journal.
+
+    `shard_size`/`shard_workers` > 1 fetch shards concurrently inside one run
+    (shared rate budget, single save/upsert/export).
+
+    `rate_state` carries the yfinance limiter between sequential shard runs:
+    it is loaded into this run's instance and updated with its final state.
     """
     try:
         logging.info("run_stock_live_comparison.start trigger=%s explicit_tickers=%s", trigger, bool(tickers))
@@ -161,19 +278,38 @@ def run_stock_live_comparison(
         logging.info("run_stock_live_comparison.ticker_count=%s trigger=%s", len(tickers or []), trigger)
 
         http_settings = _load_stock_analysis_http_settings()
+        # The configured interval is the starting point. When adaptive, a run
+        # resumes from the previously learned interval (faster or slower) and
+        # may speed up to MIN_ADAPTIVE_INTERVAL_SEC until 429s push it back.
+        configured_interval_sec = http_settings["request_throttle_interval_sec"]
+        request_interval_sec = configured_interval_sec
+        if http_settings["adaptive_rate_enabled"]:
+            request_interval_sec = _load_learned_request_interval() or configured_interval_sec
         logging.info(
-            "run_stock_live_comparison.http_settings trigger=%s download_batch_size=%s batch_pause_sec=%s request_throttle_interval_sec=%s",
+            "run_stock_live_comparison.http_settings trigger=%s download_batch_size=%s batch_pause_sec=%s request_throttle_interval_sec=%s fetch_max_workers=%s adaptive_rate_enabled=%s start_interval_sec=%s",
             trigger,
             http_settings["download_batch_size"],
             http_settings["batch_pause_sec"],
             http_settings["request_throttle_interval_sec"],
+            http_settings["fetch_max_workers"],
+            http_settings["adaptive_rate_enabled"],
+            request_interval_sec,
         )
+        # price_action_workers 0 = one per CPU; runs smaller than
+        # StockLiveComparison.PRICE_ACTION_POOL_MIN_TICKERS still analyse inline.
         comp = StockLiveComparison(
             tickers,
             download_batch_size=http_settings["download_batch_size"],
             batch_pause_sec=http_settings["batch_pause_sec"],
-            min_request_interval_sec=http_settings["request_throttle_interval_sec"],
+            min_request_interval_sec=request_interval_sec,
+            max_fetch_workers=http_settings["fetch_max_workers"],
+            adaptive_rate=http_settings["adaptive_rate_enabled"],
+            min_adaptive_interval_sec=min(configured_interval_sec, MIN_ADAPTIVE_INTERVAL_SEC),
+            price_action_workers=http_settings["price_action_workers"] or os.cpu_count() or 1,
+            checkpoint_run_id=run_id or _build_stock_fetch_run_id(tickers or [], trigger),
         )
+        if rate_state:
+            comp.import_rate_state(rate_state)
 
         if trigger == "sync":
             latest_viable, _ = comp.get_latest_viable_spreadsheet(
@@ -208,12 +344,21 @@ def run_stock_live_comparison(
         started = datetime.now()
         force_new_file = (trigger == "manual") if force_new_file_override is None else bool(force_new_file_override)
         allow_create_if_missing = (trigger != "sync") if allow_create_if_missing_override is None else bool(allow_create_if_missing_override)
-        run_summary = comp.run(
-            force_new_file=force_new_file,
-            allow_create_if_missing=allow_create_if_missing,
-        )
+        run_kwargs = {}
+        if shard_size and shard_workers > 1:
+            run_kwargs = {"shard_size": shard_size, "shard_workers": shard_workers}
+        try:
+            run_summary = comp.run(
+                force_new_file=force_new_file,
+                allow_create_if_missing=allow_create_if_missing,
+                **run_kwargs,
+            )
+        finally:
+            if rate_state is not None:
+                rate_state.update(comp.export_rate_state())
         if not isinstance(run_summary, dict):
             run_summary = {}
+        _persist_learned_request_interval(run_summary)
         telemetry_fields = _build_ingest_telemetry_fields(
             trigger=trigger,
             source_used="yfinance_live",
@@ -275,6 +420,8 @@ def run_stock_live_comparison_with_optional_sharding(
     - `sync` always runs non-sharded.
     - `scheduled` and `manual` may shard when enabled in stock_analysis_http_config.
     - For `manual` sharding, shard 1 creates a new file and subsequent shards reuse it.
+    - With `scheduler_shard_workers` > 1, shards run concurrently inside a single
+      run: one report save, one Mongo upsert and one JSON export at the end.
     """
     if trigger not in {"manual", "scheduled", "sync"}:
         logging.warning(
@@ -290,6 +437,7 @@ def run_stock_live_comparison_with_optional_sharding(
     sharding_enabled = bool(settings_payload.get("scheduler_sharding_enabled"))
     shard_size = int(settings_payload.get("scheduler_shard_size", 25))
     shard_pause_sec = float(settings_payload.get("scheduler_shard_pause_sec", 20.0))
+    shard_workers = int(settings_payload.get("scheduler_shard_workers", 1))
 
     if not sharding_enabled:
         return run_stock_live_comparison(tickers=tickers, trigger=trigger)
@@ -317,6 +465,27 @@ def run_stock_live_comparison_with_optional_sharding(
         return run_stock_live_comparison(tickers=ticker_list, trigger=trigger)
 
     shards = [ticker_list[i : i + shard_size] for i in range(0, len(ticker_list), shard_size)]
+    if shard_workers > 1:
+        logging.info(
+            "Stock analysis: running %s %s shards with %s concurrent workers",
+            len(shards),
+            trigger,
+            shard_workers,
+        )
+        result = run_stock_live_comparison(
+            tickers=ticker_list,
+            trigger=trigger,
+            shard_size=shard_size,
+            shard_workers=shard_workers,
+        )
+        return {
+            **result,
+            "mode": "parallel_sharded",
+            "trigger": trigger,
+            "shard_count": len(shards),
+            "shard_workers": shard_workers,
+        }
+
     summary = {
         "status": "success",
         "mode": "sharded",
@@ -327,6 +496,9 @@ def run_stock_live_comparison_with_optional_sharding(
         "failure_count": 0,
         "results": [],
     }
+    # One limiter for the whole sequence: a 429 cooldown or backed-off
+    # interval in one shard still applies to the next.
+    rate_state = {}
     for idx, shard in enumerate(shards, start=1):
         logging.info(
             "Stock analysis: running %s shard %s/%s size=%s",
@@ -341,6 +513,7 @@ def run_stock_live_comparison_with_optional_sharding(
             # Preserve single-new-file semantics for manual runs.
             force_new_file_override=(idx == 1) if trigger == "manual" else None,
             allow_create_if_missing_override=True if trigger == "manual" else None,
+            rate_state=rate_state,
         )
         summary["results"].append(
             {
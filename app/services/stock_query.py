@@ -0,0 +1,162 @@
+import base64
+import hashlib
+import json
+import re
+
+# Server-side paging, projection and filtering for GET /stocks. The dashboard
+# grid only renders scalar columns, so the "grid" preset skips the nested
+# profile / Price Action / signals / thorp_audit payloads.
+GRID_FIELDS = (
+    "Ticker",
+    "Current Price",
+    "Call/Put Skew",
+    "1D % Change",
+    "YoY Price %",
+    "TSMOM_60",
+    "RSI_14",
+    "ATR_14",
+    "EMA_20",
+    "HMA_20",
+    "MA_30",
+    "MA_60",
+    "MA_120",
+    "MA_200",
+    "EMA_20_highlight",
+    "HMA_20_highlight",
+    "MA_30_highlight",
+    "MA_60_highlight",
+    "MA_120_highlight",
+    "MA_200_highlight",
+    "Annual Yield Put Prem",
+    "3-mo Call Yield",
+    "6-mo Call Yield",
+    "1-yr Call Yield",
+    "Div Yield",
+    "News Sentiment",
+    "Sentiment Score",
+    "Macro Impact Score",
+    "Last Update",
+    "_last_persisted_at",
+)
+FIELD_PRESETS = {"grid": GRID_FIELDS}
+MAX_PAGE_SIZE = 1000
+TIEBREAK_FIELD = "Ticker"
+
+
+class StockQueryError(ValueError):
+    """Invalid paging / sort / filter parameters (surfaced as HTTP 400)."""
+
+
+def build_stock_projection(fields: str | None) -> dict:
+    """Projection for a preset name or a comma-separated field list; None = every field."""
+    projection = {"_id": 0}
+    if not fields:
+        return projection
+    names = FIELD_PRESETS.get(fields.strip()) or [f.strip() for f in fields.split(",") if f.strip()]
+    for name in names:
+        if name.startswith("$") or name == "_id":
+            raise StockQueryError(f"Invalid field: {name}")
+        projection[name] = 1
+    projection[TIEBREAK_FIELD] = 1
+    return projection
+
+
+def build_stock_filter(tickers: str | None = None, search: str | None = None) -> dict:
+    """Filter by an explicit ticker list and/or a case-insensitive ticker prefix."""
+    query = {}
+    if tickers:
+        symbols = sorted({t.strip().upper() for t in tickers.split(",") if t.strip()})
+        if symbols:
+            query[TIEBREAK_FIELD] = {"$in": symbols}
+    if search and search.strip():
+        prefix = {"$regex": f"^{re.escape(search.strip().upper())}"}
+        if TIEBREAK_FIELD in query:
+            query = {"$and": [query, {TIEBREAK_FIELD: prefix}]}
+        else:
+            query[TIEBREAK_FIELD] = prefix
+    return query
+
+
+def parse_stock_sort(sort: str | None, order: str | None) -> tuple[str, int]:
+    field = (sort or TIEBREAK_FIELD).strip()
+    if not field or field.startswith("$"):
+        raise StockQueryError(f"Invalid sort field: {sort}")
+    direction = (order or "asc").strip().lower()
+    if direction not in {"asc", "desc"}:
+        raise StockQueryError("order must be 'asc' or 'desc'")
+    return field, 1 if direction == "asc" else -1
+
+
+def sort_spec(field: str, direction: int) -> list:
+    if field == TIEBREAK_FIELD:
+        return [(TIEBREAK_FIELD, direction)]
+    return [(field, direction), (TIEBREAK_FIELD, direction)]
+
+
+def encode_cursor(row: dict, field: str) -> str:
+    payload = {"v": row.get(field), "t": row.get(TIEBREAK_FIELD)}
+    return base64.urlsafe_b64encode(json.dumps(payload, default=str).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeError) as exc:
+        raise StockQueryError("Invalid cursor") from exc
+    if not isinstance(payload, dict) or "t" not in payload:
+        raise StockQueryError("Invalid cursor")
+    return payload
+
+
+def cursor_filter(cursor: dict, field: str, direction: int) -> dict:
+    """Keyset condition selecting rows strictly after ``cursor`` in sort order.
+
+    MongoDB sorts missing/null values first ascending and last descending;
+    comparison operators never match null, so the null band is handled
+    explicitly.
+    """
+    value, ticker = cursor.get("v"), cursor.get("t")
+    after = "$gt" if direction == 1 else "$lt"
+    if field == TIEBREAK_FIELD:
+        return {TIEBREAK_FIELD: {after: ticker}}
+    same_value = {field: value, TIEBREAK_FIELD: {after: ticker}}
+    if value is None:
+        if direction == 1:
+            return {"$or": [same_value, {field: {"$ne": None}}]}
+        return same_value
+    clauses = [{field: {after: value}}, same_value]
+    if direction == -1:
+        clauses.append({field: None})
+    return {"$or": clauses}
+
+
+def clamp_page_size(limit: int | None) -> int | None:
+    if limit is None:
+        return None
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+
+def etag_pipeline(query: dict) -> list:
+    return [
+        {"$match": query},
+        {"$group": {"_id": None, "max_persisted": {"$max": "$_last_persisted_at"}, "count": {"$sum": 1}}},
+    ]
+
+
+def stock_data_etag(summary: dict | None, params: dict) -> str:
+    """Weak ETag over the newest ``_last_persisted_at``, the row count and the request shape."""
+    summary = summary or {}
+    raw = json.dumps(
+        [summary.get("max_persisted"), summary.get("count", 0), params],
+        sort_keys=True,
+        default=str,
+    )
+    return f'W/"{hashlib.sha1(raw.encode("utf-8")).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip() for tag in if_none_match.split(",")}
+    bare = etag[2:] if etag.startswith("W/") else etag
+    return "*" in candidates or etag in candidates or bare in candidates
@@ -1,5 +1,7 @@
 from pymongo import MongoClient
 from app.config import settings
+from app.database import get_mongo_client
+from app.services.holdings_latest import get_latest_holdings
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,7 +13,7 @@ def discover_and_track_tickers():
     Returns the list of newly added tickers.
     """
     try:
-        client = MongoClient(settings.MONGO_URI)
+        client = get_mongo_client(MongoClient)
         db = client.get_default_database("stock_analysis")
 
         # 1. Get Current Tracked List
@@ -20,7 +22,7 @@ def discover_and_track_tickers():
         tracked_set = set(tracked_list)
 
         # 2. Find latest snapshot to get current holdings
-        latest = db.ibkr_holdings.find_one(sort=[("date", -1)])
+        latest = get_latest_holdings(db)
         if not latest:
             return []
 
@@ -1,8 +1,8 @@
-import os
 from pymongo import MongoClient
 
+from app import database
+
 
 def get_mongo_client() -> MongoClient:
-    """Return a MongoDB client using MONGO_URI environment variable."""
-    uri = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-    return MongoClient(uri)
+    """Return the process-wide shared MongoDB client for settings.MONGO_URI."""
+    return database.get_mongo_client(MongoClient)
@@ -1,43 +1,137 @@
-import json
+import argparse
+import gzip
 import os
 from datetime import datetime
 from bson import json_util
 from Ai_Stock_Database import AiStockDatabase
 
-def export_data(output_file="mongo_backup.json"):
+DEFAULT_CHUNK_SIZE = 1000
+NDJSON_SUFFIXES = (".ndjson", ".jsonl", ".ndjson.gz", ".jsonl.gz")
+
+
+def is_ndjson_path(path):
+    """True for newline-delimited backups (one extended-JSON document per line)."""
+    return str(path).lower().endswith(NDJSON_SUFFIXES)
+
+
+def open_backup_file(path, mode="r"):
+    """Open a backup for text I/O, transparently gzip-(de)compressing ``*.gz``."""
+    if str(path).lower().endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def stream_collection(collection, output_file, query=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Writes every document matching ``query`` to ``output_file`` without
+    materialising the collection. ``*.ndjson`` / ``*.jsonl`` (optionally
+    ``.gz``) get one extended-JSON document per line; anything else gets a
+    JSON array with one document per line, the format ``export_data`` has
+    always produced. Returns the number of documents written.
+    """
+    chunk_size = max(1, int(chunk_size))
+    ndjson = is_ndjson_path(output_file)
+    cursor = collection.find(query or {}, batch_size=chunk_size)
+    written = 0
+    chunk = []
+    with open_backup_file(output_file, "w") as f:
+        if not ndjson:
+            f.write("[\n")
+        for document in cursor:
+            line = json_util.dumps(document)
+            if not ndjson and written:
+                line = ",\n" + line
+            chunk.append(line + "\n" if ndjson else line)
+            written += 1
+            if len(chunk) >= chunk_size:
+                f.writelines(chunk)
+                chunk = []
+        f.writelines(chunk)
+        if not ndjson:
+            f.write("\n]\n" if written else "]\n")
+    return written
+
+
+def export_collections(db, collections, output_dir, compress=True, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Streams each named collection of ``db`` to ``<output_dir>/<name>.ndjson[.gz]``.
+    Returns ``{collection_name: documents_written}``.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    suffix = ".ndjson.gz" if compress else ".ndjson"
+    counts = {}
+    for name in collections:
+        path = os.path.join(output_dir, f"{name}{suffix}")
+        counts[name] = stream_collection(db[name], path, chunk_size=chunk_size)
+        print(f"Exported {counts[name]} documents from '{name}' to {path}")
+    return counts
+
+
+def export_data(output_file="mongo_backup.json", chunk_size=DEFAULT_CHUNK_SIZE):
     """
     Exports all data from the MongoDB collection to a JSON file.
     Uses bson.json_util to handle MongoDB specific types like ObjectId and datetime.
+    Documents are streamed in chunks of ``chunk_size`` so memory stays bounded;
+    use a ``.ndjson`` / ``.ndjson.gz`` output file for newline-delimited output.
     """
     print(f"Connecting to database...")
     try:
         # Use the existing helper to connect
         db_helper = AiStockDatabase()
-        
+
         # Get count to verify we have something
         count = db_helper.collection.count_documents({})
         print(f"Found {count} documents in collection '{db_helper.collection_name}'.")
-        
+
         if count == 0:
             print("Warning: Collection is empty. Nothing to export.")
             return
 
         print(f"Exporting data to {output_file}...")
-        
-        # Fetch all documents
-        cursor = db_helper.collection.find({})
-        
-        # Convert to list and dump to JSON using json_util for proper type handling
-        documents = list(cursor)
-        
-        with open(output_file, 'w') as f:
-            f.write(json_util.dumps(documents, indent=2))
-            
-        print(f"Successfully exported {len(documents)} records to {output_file}")
-        
+        written = stream_collection(db_helper.collection, output_file, chunk_size=chunk_size)
+        print(f"Successfully exported {written} records to {output_file}")
+
     except Exception as e:
         print(f"Error during export: {e}")
         raise
 
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Stream MongoDB collections to JSON / NDJSON backup files."
+    )
+    parser.add_argument(
+        "--output-file",
+        default="mongo_backup.json",
+        help="Backup file for the stock collection (.json, .ndjson or .ndjson.gz).",
+    )
+    parser.add_argument(
+        "--collections",
+        nargs="+",
+        default=None,
+        help="Export these collections to --output-dir instead of the stock collection.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        default=f"mongo_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+        help="Directory for --collections exports.",
+    )
+    parser.add_argument("--no-gzip", action="store_true", help="Write plain .ndjson files.")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    if args.collections:
+        db_helper = AiStockDatabase()
+        export_collections(
+            db_helper.db,
+            args.collections,
+            args.output_dir,
+            compress=not args.no_gzip,
+            chunk_size=args.chunk_size,
+        )
+    else:
+        export_data(output_file=args.output_file, chunk_size=args.chunk_size)
+
+
 if __name__ == "__main__":
-    export_data()
+    main()
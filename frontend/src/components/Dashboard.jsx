@@ -202,7 +202,8 @@ const Dashboard = () => {
     const loadLiveStocks = async () => {
         setLoading(true);
         try {
-            const response = await api.get('/stocks');
+            // "grid" projection: scalar columns only, no nested detail payloads.
+            const response = await api.get('/stocks', { params: { fields: 'grid' } });
             setData(response.data);
         } catch (error) {
             console.error("Failed to load live stocks:", error);
@@ -0,0 +1,198 @@
+import argparse
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from bson import json_util
+from Ai_Stock_Database import AiStockDatabase
+from export_mongo import DEFAULT_CHUNK_SIZE, open_backup_file, stream_collection
+from restore_mongo import iter_backup_documents
+
+DEFAULT_BACKUP_DIR = os.path.join("backups", "incremental")
+MANIFEST_NAME = "manifest.json"
+WATERMARK_FIELD = "_last_persisted_at"
+# A new base is written after this many deltas so reconstruction stays cheap
+# and rows deleted from the collection drop out of the chain.
+DEFAULT_MAX_DELTAS = 30
+
+
+def load_backup_manifest(chain_dir):
+    """Returns the chain manifest, or an empty chain when none exists yet."""
+    path = os.path.join(chain_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {"entries": []}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_manifest(chain_dir, manifest):
+    path = os.path.join(chain_dir, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _max_watermark(path):
+    watermark = None
+    for document in iter_backup_documents(path):
+        value = document.get(WATERMARK_FIELD)
+        if value is not None and (watermark is None or str(value) > watermark):
+            watermark = str(value)
+    return watermark
+
+
+def _deltas_since_base(entries):
+    count = 0
+    for entry in reversed(entries):
+        if entry["kind"] == "base":
+            return count
+        count += 1
+    return count
+
+
+def run_incremental_backup(
+    collection=None,
+    backup_dir=None,
+    full=False,
+    max_deltas=DEFAULT_MAX_DELTAS,
+    now=None,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+):
+    """
+    Backs up ``collection`` into a base + delta chain under
+    ``<backup_dir>/<collection name>/``.
+
+    The first run (or ``full``, or every ``max_deltas`` deltas) writes a base
+    file with every document. Later runs export only documents whose
+    ``_last_persisted_at`` is newer than the previous watermark; nothing is
+    written when nothing changed. Returns the manifest entry written, or None.
+    """
+    if collection is None:
+        collection = AiStockDatabase().collection
+    backup_dir = backup_dir or os.environ.get("INCREMENTAL_BACKUP_DIR", DEFAULT_BACKUP_DIR)
+    chain_dir = os.path.join(backup_dir, collection.name)
+    os.makedirs(chain_dir, exist_ok=True)
+
+    manifest = load_backup_manifest(chain_dir)
+    entries = manifest["entries"]
+    previous = entries[-1] if entries else None
+    watermark_from = previous.get("watermark") if previous else None
+    kind = "delta"
+    if full or previous is None or watermark_from is None or _deltas_since_base(entries) >= max_deltas:
+        kind = "base"
+
+    query = {}
+    if kind == "delta":
+        # _last_persisted_at is a "YYYY-MM-DD HH:MM:SS" string, so string order
+        # is time order. All rows of one upsert_to_mongo pass share a value.
+        query = {WATERMARK_FIELD: {"$gt": watermark_from}}
+        if collection.count_documents(query, limit=1) == 0:
+            print(f"No changes in '{collection.name}' since {watermark_from}; skipping backup.")
+            return None
+
+    now = now or datetime.now(timezone.utc)
+    file_name = f"{now.strftime('%Y%m%dT%H%M%S%fZ')}_{kind}.ndjson.gz"
+    path = os.path.join(chain_dir, file_name)
+    count = stream_collection(collection, path, query=query, chunk_size=chunk_size)
+    entry = {
+        "kind": kind,
+        "file": file_name,
+        "created_at": now.isoformat(),
+        "count": count,
+        "watermark_from": watermark_from if kind == "delta" else None,
+        "watermark": _max_watermark(path) or watermark_from,
+        "sha256": _sha256(path),
+    }
+    manifest["collection"] = collection.name
+    entries.append(entry)
+    _save_manifest(chain_dir, manifest)
+    print(f"Wrote {kind} backup of {count} documents to {path}")
+    return entry
+
+
+def _as_utc(value):
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def chain_for_point_in_time(manifest, until=None):
+    """
+    Returns the entries needed to rebuild state as of ``until`` (an ISO
+    timestamp; None means latest): the newest base at or before it and the
+    deltas that follow it.
+    """
+    until = _as_utc(until) if until is not None else None
+    entries = [
+        e for e in manifest.get("entries", [])
+        if until is None or _as_utc(e["created_at"]) <= until
+    ]
+    base_index = max((i for i, e in enumerate(entries) if e["kind"] == "base"), default=None)
+    if base_index is None:
+        raise ValueError("No base backup at or before the requested point in time.")
+    return entries[base_index:]
+
+
+def reconstruct_state(chain_dir, until=None, verify=True):
+    """
+    Replays base + deltas into ``{_id: document}``. Later versions of a
+    document replace earlier ones, so memory scales with the collection,
+    not with the number of backups.
+    """
+    manifest = load_backup_manifest(chain_dir)
+    state = {}
+    for entry in chain_for_point_in_time(manifest, until):
+        path = os.path.join(chain_dir, entry["file"])
+        if verify and entry.get("sha256") and _sha256(path) != entry["sha256"]:
+            raise ValueError(f"Checksum mismatch for {path}")
+        for document in iter_backup_documents(path):
+            key = document.get("_id", document.get("Ticker"))
+            state[json_util.dumps(key)] = document
+    return state
+
+
+def write_point_in_time(chain_dir, output_file, until=None):
+    """Writes the reconstructed state as NDJSON for ``restore_mongo.py --mode insert``."""
+    state = reconstruct_state(chain_dir, until)
+    with open_backup_file(output_file, "w") as f:
+        for document in state.values():
+            f.write(json_util.dumps(document) + "\n")
+    print(f"Reconstructed {len(state)} documents into {output_file}")
+    return len(state)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Incremental (watermark-based) backups of the stock collection."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    backup = subparsers.add_parser("backup", help="Write a base or delta backup.")
+    backup.add_argument("--backup-dir", default=None)
+    backup.add_argument("--full", action="store_true", help="Force a new base backup.")
+    backup.add_argument("--max-deltas", type=int, default=DEFAULT_MAX_DELTAS)
+
+    reconstruct = subparsers.add_parser(
+        "reconstruct", help="Rebuild a point-in-time NDJSON file from a backup chain."
+    )
+    reconstruct.add_argument("--chain-dir", required=True, help="e.g. backups/incremental/stock_data")
+    reconstruct.add_argument("--output-file", required=True, help="e.g. stock_data.ndjson.gz")
+    reconstruct.add_argument("--until", default=None, help="ISO timestamp; defaults to the latest backup.")
+
+    args = parser.parse_args()
+    if args.command == "backup":
+        run_incremental_backup(backup_dir=args.backup_dir, full=args.full, max_deltas=args.max_deltas)
+    else:
+        write_point_in_time(args.chain_dir, args.output_file, until=args.until)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,8 @@ MONGO_PASS="${MONGO_PASS:-admin123}"
 MONGO_AUTH_DB="${MONGO_AUTH_DB:-admin}"
 TARGET_DB="${TARGET_DB:-stock_analysis}"
 BACKUP_ROOT="${BACKUP_ROOT:-./backups/mongo}"
+# Incremental base/delta chains written by incremental_backup.py (optional).
+INCREMENTAL_BACKUP_DIR="${INCREMENTAL_BACKUP_DIR:-./backups/incremental}"
 
 if ! command -v docker >/dev/null 2>&1; then
   echo "ERROR: docker is not installed or not in PATH." >&2
@@ -70,6 +72,11 @@ cat > "$ARTIFACT_DIR/manifest.json" <<MANIFEST
 MANIFEST
 
 
+if [[ -d "$INCREMENTAL_BACKUP_DIR" ]]; then
+  echo "[3/5] Including incremental backup chains from $INCREMENTAL_BACKUP_DIR ..."
+  cp -R "$INCREMENTAL_BACKUP_DIR" "$ARTIFACT_DIR/incremental"
+fi
+
 echo "[4/5] Generating checksums..."
 (
   cd "$ARTIFACT_DIR"
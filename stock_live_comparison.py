@@ -1,22 +1,48 @@
 from pathlib import Path
+import json
+import os
 import re
 import yfinance as yf
 import pandas as pd
 import time
 import random
 import logging
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 import openpyxl
-from openpyxl.styles import Font, Alignment
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, PatternFill
 from Ai_Stock_Database import AiStockDatabase
-from export_mongo import export_data
+from incremental_backup import run_incremental_backup
+from app.services.index_registry import ensure_registered_indexes
+from app.services.price_history_store import (
+    insert_new_price_history_rows,
+    is_timeseries_collection,
+    parse_history_timestamp,
+)
 from app.services.price_action_service import PriceActionService
+from app.services.response_cache import STOCKS, bump_response_cache_version
+from app.services.indicator_engine import IndicatorEngine
 from app.services.instrument_identity import canonical_instrument_key
 
+# Optional columnar history cache backend; falls back to legacy CSV files.
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+HISTORY_PRICE_COLUMNS = ("Open", "High", "Low", "Close", "Adj Close")
+DEFAULT_HISTORY_CACHE_DIR = Path("data/yf_history")
+
 class StockLiveComparison:
     """Collect stock metrics and export them to an Excel sheet."""
     _price_history_indexes_ensured = False
     _instrument_snapshot_indexes_ensured = False
+    _stock_data_indexes_ensured = False
     CANONICAL_REPORT_COLUMNS = [
         "Ticker",
         "Company Name",
@@ -73,6 +99,17 @@ class StockLiveComparison:
         download_batch_size=6,
         batch_pause_sec=8.0,
         history_cache_ttl_hours=6.0,
+        max_fetch_workers=4,
+        request_burst=1,
+        incremental_history=True,
+        max_delta_gap_days=30,
+        checkpoint_run_id=None,
+        adaptive_rate=False,
+        min_adaptive_interval_sec=0.25,
+        max_adaptive_interval_sec=30.0,
+        price_action_workers=1,
+        max_download_batch_size=None,
+        history_cache_dir=None,
     ):
         self.tickers = list(dict.fromkeys(tickers))
         self.max_age_hours = max_age_hours
@@ -80,14 +117,43 @@ class StockLiveComparison:
         self.fetch_profile_news = bool(fetch_profile_news)
         self.min_request_interval_sec = float(min_request_interval_sec)
         self.download_batch_size = max(1, int(download_batch_size))
+        # Adaptive yf.download batching: starts at download_batch_size, grows on
+        # success up to max_download_batch_size, bisects failed batches.
+        self.max_download_batch_size = max(
+            self.download_batch_size,
+            int(max_download_batch_size) if max_download_batch_size else 4 * self.download_batch_size,
+        )
+        self._history_batch_size = self.download_batch_size
+        self.history_batch_metrics = []
         self.batch_pause_sec = max(0.0, float(batch_pause_sec))
         self.history_cache_ttl_hours = max(0.0, float(history_cache_ttl_hours))
+        self.max_fetch_workers = max(1, int(max_fetch_workers))
+        self.request_burst = max(1.0, float(request_burst))
+        self.incremental_history = bool(incremental_history)
+        self.max_delta_gap_days = max(0, int(max_delta_gap_days))
         self.records = []
+        # Precomputed per-ticker indicator rows from IndicatorEngine (set by fetch_data).
+        self.indicator_rows = {}
+        # CPU stage: PriceActionService runs in a process pool while the
+        # network loop continues (only inside price_action_stage()).
+        self.price_action_workers = max(1, int(price_action_workers))
+        self._price_action_pool = None
+        self._price_action_futures = {}
         self.output_dir = Path("report-results")
         if not self.output_dir.exists():
             self.output_dir.mkdir(parents=True, exist_ok=True)
-        self.history_cache_dir = Path("data/yf_history")
+        self.history_cache_dir = Path(history_cache_dir or DEFAULT_HISTORY_CACHE_DIR)
         self.history_cache_dir.mkdir(parents=True, exist_ok=True)
+        self._history_manifest = None
+        # Concurrent shards share one instance: guard the manifest and serialize
+        # yf.download, which keeps its batch results in module-level state.
+        self._history_manifest_lock = threading.RLock()
+        self._history_download_lock = threading.Lock()
+        # Per-run fetch journal (JSONL); disabled when no run id is given.
+        self.checkpoint_run_id = checkpoint_run_id
+        self.checkpoint_dir = Path("data/stock_fetch_checkpoints")
+        self._checkpoint_lock = threading.Lock()
+        self.checkpoint_resumed_count = 0
         self.now = datetime.now()
         self.filename = None
         self.latest_file = None
@@ -96,6 +162,27 @@ class StockLiveComparison:
         self.min_viable_report_bytes = 10 * 1024
         self._next_request_not_before_ts = 0.0
         self._consecutive_429 = 0
+        # Shared by fetch workers: token bucket + 429 cooldown window.
+        self._rate_lock = threading.Lock()
+        self._bucket_tokens = self.request_burst
+        self._bucket_updated_ts = None
+        # AIMD controller state: min_request_interval_sec is the live knob.
+        self.adaptive_rate = bool(adaptive_rate)
+        self.min_adaptive_interval_sec = max(0.0, float(min_adaptive_interval_sec))
+        self.max_adaptive_interval_sec = max(self.min_adaptive_interval_sec, float(max_adaptive_interval_sec))
+        self.initial_request_interval_sec = self.min_request_interval_sec
+        self._rate_success_streak = 0
+        self._rate_decrease_hold_until_ts = 0.0
+        self.rate_success_count = 0
+        self.rate_limited_count = 0
+        self.rate_increase_count = 0
+        self.rate_decrease_count = 0
+        # Per-run option-chain memo keyed by (ticker, expiry); entries for a
+        # ticker are dropped once its record is built.
+        self._option_chain_memo = {}
+        self._option_chain_lock = threading.Lock()
+        self.option_chain_cache_hits = 0
+        self.option_chain_cache_misses = 0
 
     @staticmethod
     def setup_logging(log_file="stock_live_comparison.log"):
@@ -223,7 +310,6 @@ class StockLiveComparison:
         - Ensures no duplicates.
         Returns the updated mapping dict.
         """
-        import json
         json_path = Path(json_path)
         try:
             if json_path.exists():
@@ -316,6 +402,52 @@ class StockLiveComparison:
             return None
         return min(dates, key=lambda d: abs((d - target).days)).strftime("%Y-%m-%d")
 
+    # ------------------------------------------------------------------
+    @staticmethod
+    def option_chain_memo_key(chain):
+        return getattr(chain, "ticker", None) or id(chain)
+
+    def get_option_expirations(self, chain):
+        """Return chain.options; the first access downloads, so it goes through the rate limiter."""
+        key = (self.option_chain_memo_key(chain), None)
+        with self._option_chain_lock:
+            cached = self._option_chain_memo.get(key)
+            if cached is not None:
+                return cached
+        self.throttle_yf_requests()
+        result = chain.options
+        with self._option_chain_lock:
+            self._option_chain_memo[key] = result
+        return result
+
+    def get_option_chain(self, chain, exp_date):
+        """Return chain.option_chain(exp_date), downloading each expiry once per ticker per run."""
+        key = (self.option_chain_memo_key(chain), exp_date)
+        with self._option_chain_lock:
+            cached = self._option_chain_memo.get(key)
+            if cached is not None:
+                self.option_chain_cache_hits += 1
+                return cached
+            self.option_chain_cache_misses += 1
+        self.throttle_yf_requests()
+        result = chain.option_chain(exp_date)
+        with self._option_chain_lock:
+            self._option_chain_memo[key] = result
+        return result
+
+    def release_option_chains(self, chain):
+        """Drop memoized expiries for one ticker once its record is built."""
+        memo_key = self.option_chain_memo_key(chain)
+        with self._option_chain_lock:
+            for key in [k for k in self._option_chain_memo if k[0] == memo_key]:
+                del self._option_chain_memo[key]
+
+    def reset_option_chain_memo(self):
+        with self._option_chain_lock:
+            self._option_chain_memo.clear()
+            self.option_chain_cache_hits = 0
+            self.option_chain_cache_misses = 0
+
     # ------------------------------------------------------------------
     def get_otm_call_yield(self, chain, current_price, target_days, otm_pct=6):
         premium, strike, exp_date = self.get_otm_call_contract(chain, current_price, target_days, otm_pct=otm_pct)
@@ -328,10 +460,10 @@ class StockLiveComparison:
     def get_otm_call_contract(self, chain, current_price, target_days, otm_pct=6):
         if chain is None or not hasattr(chain, "options"):
             return None, None, None
-        exp_date = self.closest_expiration(chain.options, target_days)
+        exp_date = self.closest_expiration(self.get_option_expirations(chain), target_days)
         if not exp_date:
             return None, None, None
-        calls = chain.option_chain(exp_date).calls
+        calls = self.get_option_chain(chain, exp_date).calls
         target_strike = current_price * (1 + otm_pct / 100)
         calls = calls[calls['strike'] >= target_strike]
         if calls.empty:
@@ -348,10 +480,10 @@ class StockLiveComparison:
     def get_otm_put_contract(self, chain, current_price, target_days, otm_pct=6):
         if chain is None or not hasattr(chain, "options"):
             return None, None, None
-        exp_date = self.closest_expiration(chain.options, target_days)
+        exp_date = self.closest_expiration(self.get_option_expirations(chain), target_days)
         if not exp_date:
             return None, None, None
-        puts = chain.option_chain(exp_date).puts
+        puts = self.get_option_chain(chain, exp_date).puts
         target_strike = current_price * (1 - otm_pct / 100)
         puts = puts[puts['strike'] <= target_strike]
         if puts.empty:
@@ -384,10 +516,13 @@ class StockLiveComparison:
         if current_price and prev_close:
             day_change = (current_price - prev_close) / prev_close * 100
 
-        call3, _, call_date3 = self.get_otm_call_yield(chain, current_price, 90)
-        call6, strike6, call_date6 = self.get_otm_call_yield(chain, current_price, 180)
-        call_price_12, call_strike_12, call_date12 = self.get_otm_call_contract(chain, current_price, 365)
-        put_price, put_strike_12, put_date12 = self.get_otm_put_contract(chain, current_price, 365)
+        try:
+            call3, _, call_date3 = self.get_otm_call_yield(chain, current_price, 90)
+            call6, strike6, call_date6 = self.get_otm_call_yield(chain, current_price, 180)
+            call_price_12, call_strike_12, call_date12 = self.get_otm_call_contract(chain, current_price, 365)
+            put_price, put_strike_12, put_date12 = self.get_otm_put_contract(chain, current_price, 365)
+        finally:
+            self.release_option_chains(chain)
         call12 = None
         if call_price_12 is not None and current_price not in [None, 0]:
             call12 = round((call_price_12 / current_price) * 100, 2)
@@ -415,25 +550,28 @@ class StockLiveComparison:
             call_put_skew = call_price_12 / put_price
 
         # New Indicators: EMA, HMA, TSMOM, RSI, ATR
-        ema_20 = self.calculate_ema(ticker_hist['Close'], span=20) if ticker_hist is not None else None
-        hma_20 = self.calculate_hma(ticker_hist['Close'], window=20) if ticker_hist is not None else None
-        # TSMOM 60-day lookback (Updated from 45)
-        tsmom_60 = self.calculate_tsmom(ticker_hist['Close'], lookback=60) if ticker_hist is not None else None
-        
-        rsi_14 = self.calculate_rsi(ticker_hist['Close'], period=14) if ticker_hist is not None else None
-        atr_14 = self.calculate_atr(ticker_hist['High'], ticker_hist['Low'], ticker_hist['Close'], period=14) if ticker_hist is not None else None
-
-        # Price Action Analysis
+        # Batch runs read the row IndicatorEngine computed for the whole panel;
+        # direct calls fall back to the per-ticker helpers.
+        indicators = self.indicator_rows.get(ticker)
+        if indicators is None:
+            indicators = self.calculate_indicators(ticker_hist)
+        ema_20 = indicators["EMA_20"]
+        hma_20 = indicators["HMA_20"]
+        tsmom_60 = indicators["TSMOM_60"]
+        rsi_14 = indicators["RSI_14"]
+        atr_14 = indicators["ATR_14"]
+
+        # Price Action Analysis (precomputed in the CPU stage when a pool is active)
         price_action = {}
         if ticker_hist is not None and not ticker_hist.empty:
             try:
-                price_action = PriceActionService.analyze_ticker(ticker_hist)
+                price_action = self.collect_price_action(ticker, ticker_hist)
             except Exception as e:
                 self.logger.error(f"Price Action Error for {ticker}: {e}")
 
         # Moving averages and highlight status
         ma_windows = (30, 60, 120, 200)
-        ma_dict = self.calculate_moving_averages(ticker_hist, windows=ma_windows)
+        ma_dict = {f"MA_{w}": indicators.get(f"MA_{w}") for w in ma_windows}
         highlight_dict = {f"MA_{w}_highlight": self.calculate_ma_delta(current_price, ma_dict[f"MA_{w}"])
                   for w in ma_windows}
         
@@ -539,6 +677,23 @@ class StockLiveComparison:
 
         return record
 
+    def calculate_indicators(self, ticker_hist):
+        """Per-ticker indicator row (same keys as IndicatorEngine.compute)."""
+        if ticker_hist is None:
+            row = {name: None for name in ("EMA_20", "HMA_20", "TSMOM_60", "RSI_14", "ATR_14")}
+        else:
+            closes = ticker_hist['Close']
+            row = {
+                "EMA_20": self.calculate_ema(closes, span=20),
+                "HMA_20": self.calculate_hma(closes, window=20),
+                # TSMOM 60-day lookback (Updated from 45)
+                "TSMOM_60": self.calculate_tsmom(closes, lookback=60),
+                "RSI_14": self.calculate_rsi(closes, period=14),
+                "ATR_14": self.calculate_atr(ticker_hist['High'], ticker_hist['Low'], closes, period=14),
+            }
+        row.update(self.calculate_moving_averages(ticker_hist, windows=IndicatorEngine.MA_WINDOWS))
+        return row
+
     @staticmethod
     def calculate_ema(series, span=20):
         """Calculate Exponential Moving Average."""
@@ -634,13 +789,223 @@ class StockLiveComparison:
             return None
 
     # ------------------------------------------------------------------
+    def checkpoint_path(self):
+        if not self.checkpoint_run_id:
+            return None
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", str(self.checkpoint_run_id))
+        return self.checkpoint_dir / f"{safe}.jsonl"
+
+    def load_checkpoint_records(self):
+        """Return {ticker: record} already journaled for this run id.
+
+        A torn last line (crash mid-write) is ignored, and so is any record
+        whose ``Last Update`` is ``max_age_hours`` old or older: a journal
+        resumed late must not bring back data that counts as stale.
+        """
+        path = self.checkpoint_path()
+        if path is None or not path.exists():
+            return {}
+        records = {}
+        expired = 0
+        try:
+            with path.open("r", encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if not isinstance(record, dict) or not record.get("Ticker"):
+                        continue
+                    if not self.is_recent(record):
+                        expired += 1
+                        records.pop(record["Ticker"], None)
+                        continue
+                    records[record["Ticker"]] = record
+        except OSError as e:
+            logging.warning("Stock analysis checkpoint read failed run_id=%s error=%s", self.checkpoint_run_id, e)
+            return {}
+        if expired:
+            logging.info(
+                "Stock analysis checkpoint run_id=%s skipped %s record(s) older than %sh",
+                self.checkpoint_run_id,
+                expired,
+                self.max_age_hours,
+            )
+        return records
+
+    @staticmethod
+    def _checkpoint_default(value):
+        if hasattr(value, "item"):
+            try:
+                return value.item()
+            except Exception:
+                pass
+        return str(value)
+
+    def append_checkpoint_record(self, record):
+        """Durably append one completed record to the run journal (error rows are not journaled)."""
+        path = self.checkpoint_path()
+        if path is None or not isinstance(record, dict) or record.get("Error") or not record.get("Ticker"):
+            return
+        line = json.dumps(record, default=self._checkpoint_default) + "\n"
+        with self._checkpoint_lock:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with path.open("a", encoding="utf-8") as fh:
+                    fh.write(line)
+                    fh.flush()
+                    os.fsync(fh.fileno())
+            except OSError as e:
+                logging.warning("Stock analysis checkpoint write failed ticker=%s error=%s", record.get("Ticker"), e)
+
+    def clear_checkpoint(self):
+        path = self.checkpoint_path()
+        if path is None:
+            return
+        try:
+            path.unlink(missing_ok=True)
+        except OSError as e:
+            logging.warning("Stock analysis checkpoint cleanup failed run_id=%s error=%s", self.checkpoint_run_id, e)
+
+    def prune_checkpoints(self, max_age_hours=48):
+        """Delete journals left behind by runs that never completed."""
+        if not self.checkpoint_dir.exists():
+            return 0
+        cutoff = time.time() - max_age_hours * 3600
+        removed = 0
+        for path in self.checkpoint_dir.glob("*.jsonl"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+    # Each spawned worker starts a fresh interpreter and imports pandas, so
+    # smaller runs (single-ticker and manual syncs) analyse inline.
+    PRICE_ACTION_POOL_MIN_TICKERS = 40
+
+    @contextmanager
+    def price_action_stage(self):
+        """Run PriceActionService in a process pool for the duration of the block.
+
+        Uses a spawn context: fetches run on threads, and forking a
+        multi-threaded process is unsafe.
+        """
+        workers = min(self.price_action_workers, len(self.tickers))
+        if (
+            workers <= 1
+            or len(self.tickers) < self.PRICE_ACTION_POOL_MIN_TICKERS
+            or self._price_action_pool is not None
+        ):
+            yield
+            return
+        try:
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        except Exception as e:
+            logging.warning("Stock analysis price-action pool unavailable, running inline: %s", e)
+            yield
+            return
+        self._price_action_pool = pool
+        logging.info("Stock analysis price-action stage: %s worker processes", workers)
+        try:
+            yield
+        finally:
+            self._price_action_pool = None
+            self._price_action_futures = {}
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def submit_price_action(self, hist):
+        """Queue price-action analysis for every downloaded history (no-op without a pool)."""
+        pool = self._price_action_pool
+        if pool is None:
+            return
+        for ticker, ticker_hist in (hist or {}).items():
+            if not isinstance(ticker_hist, pd.DataFrame) or ticker_hist.empty:
+                continue
+            try:
+                self._price_action_futures[ticker] = pool.submit(PriceActionService.analyze_ticker, ticker_hist)
+            except Exception as e:
+                logging.warning("Stock analysis price-action submit failed ticker=%s error=%s", ticker, e)
+                return
+
+    def collect_price_action(self, ticker, ticker_hist):
+        """Return the pooled result for a ticker, or analyze inline when none was queued."""
+        future = self._price_action_futures.pop(ticker, None)
+        if future is not None:
+            try:
+                return future.result()
+            except Exception as e:
+                logging.warning("Stock analysis price-action worker failed ticker=%s error=%s", ticker, e)
+        return PriceActionService.analyze_ticker(ticker_hist)
+
+    def fetch_data_sharded(self, tickers_to_fetch, shard_size=None, shard_workers=1):
+        """Fetch shards concurrently on this instance and merge records in input order.
+
+        Shards run on this instance and so share its one limiter (token bucket,
+        429 cooldown and adaptive rate state): running N at once stays within
+        one global request budget. ``checkpoint_resumed_count`` is the sum over
+        shards.
+        """
+        tickers_to_fetch = StockLiveComparison.unique_tickers(tickers_to_fetch)
+        shard_workers = max(1, int(shard_workers or 1))
+        with self.price_action_stage():
+            if not shard_size or shard_workers <= 1 or len(tickers_to_fetch) <= shard_size:
+                return self.fetch_data(tickers_to_fetch)
+            shard_size = max(1, int(shard_size))
+            shards = [tickers_to_fetch[i : i + shard_size] for i in range(0, len(tickers_to_fetch), shard_size)]
+            workers = min(shard_workers, len(shards))
+            logging.info(
+                "Stock analysis sharded fetch: %s shards of <=%s tickers, %s concurrent",
+                len(shards),
+                shard_size,
+                workers,
+            )
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="yf-shard") as pool:
+                shard_results = list(pool.map(self.fetch_data_resumable, shards))
+            self.checkpoint_resumed_count = sum(resumed for _, resumed in shard_results)
+            return [record for records, _ in shard_results for record in records]
+
     def fetch_data(self, tickers_to_fetch):
+        records, resumed_count = self.fetch_data_resumable(tickers_to_fetch)
+        self.checkpoint_resumed_count = resumed_count
+        return records
+
+    def fetch_data_resumable(self, tickers_to_fetch):
+        """Return ``(records, resumed_count)``; shards report their own count rather than sharing a field."""
         tickers_to_fetch = StockLiveComparison.unique_tickers(tickers_to_fetch)
         if not tickers_to_fetch:
-            return []
+            return [], 0
+        # Skip tickers already journaled by an interrupted run with the same run id.
+        resumed = self.load_checkpoint_records()
+        resumed = {t: resumed[t] for t in tickers_to_fetch if t in resumed}
+        if resumed:
+            logging.info(
+                "Stock analysis checkpoint resume run_id=%s completed=%s remaining=%s",
+                self.checkpoint_run_id,
+                len(resumed),
+                len(tickers_to_fetch) - len(resumed),
+            )
+            pending = [t for t in tickers_to_fetch if t not in resumed]
+            fetched = iter(self.fetch_pending_tickers(pending) if pending else [])
+            return [resumed[t] if t in resumed else next(fetched) for t in tickers_to_fetch], len(resumed)
+        return self.fetch_pending_tickers(tickers_to_fetch), 0
+
+    def fetch_pending_tickers(self, tickers_to_fetch):
+        """Download history and build one record per ticker, in input order."""
         total = len(tickers_to_fetch)
         logging.info(f"Downloading historical data for {total} tickers...")
         hist = self.download_history_batched(tickers_to_fetch)
+        self.submit_price_action(hist)
+        try:
+            # update(), not assignment: concurrent shards each add their own tickers.
+            self.indicator_rows.update(IndicatorEngine.compute(hist))
+        except Exception as e:
+            logging.warning("Stock analysis indicator engine failed, using per-ticker fallback: %s", e)
         time.sleep(1)
         try:
             tickers_obj = yf.Tickers(" ".join(tickers_to_fetch))
@@ -653,169 +1018,414 @@ class StockLiveComparison:
                 }
                 for t in tickers_to_fetch
             ]
-        records = []
-        max_attempts = 4
-        for idx, t in enumerate(tickers_to_fetch, start=1):
-            attempt = 0
-            while attempt < max_attempts:
-                attempt += 1
-                try:
-                    if attempt == 1 and (idx == 1 or idx % 10 == 0 or idx == total):
-                        logging.info("Stock analysis progress: %s/%s (ticker=%s)", idx, total, t)
-                    logging.debug(f"Processing ticker {t} (Attempt {attempt}/{max_attempts})...")
-                    # Visual interaction for console (optional, keeps user happy)
-                    # print(f"Processing {t}...", end="\r", flush=True) 
-                    # Actually logging.info might be too noisy if list is long, but user asked for visuals.
-                    # Best to stick to requested debug log for now, relying on YF progress bar for download.
-                    
-                    self.throttle_yf_requests()
-                    time.sleep(1 + max(0, attempt - 1))
-                    ticker_obj = tickers_obj.tickers.get(t)
-                    if ticker_obj is None:
-                        raise KeyError(f"Ticker '{t}' missing from yfinance.Tickers result")
-                    info = ticker_obj.info
-                    ticker_hist = hist.get(t)
-                    chain = ticker_obj
-                    record = self.fetch_ticker_record(t, info, ticker_hist, chain)
-                    records.append(record)
-                    self._consecutive_429 = 0
-                    break
-                except Exception as e:
-                    retryable = self.is_retryable_yf_error(e)
-                    if self.is_http_429_error(e):
-                        self._consecutive_429 += 1
-                        self.apply_rate_limit_cooldown(self._consecutive_429)
-                    should_retry = retryable and attempt < max_attempts
-                    if should_retry:
-                        backoff = min(90, 3 * (2 ** (attempt - 1))) + random.uniform(0.1, 0.9)
-                        logging.warning(
-                            "Stock analysis ticker retry: %s attempt=%s/%s backoff_sec=%s error=%s",
-                            t,
-                            attempt,
-                            max_attempts,
-                            round(backoff, 2),
-                            e,
-                        )
-                        time.sleep(backoff)
-                        continue
 
+        def fetch_one(item):
+            idx, t = item
+            record = self.fetch_single_ticker(t, tickers_obj, hist, idx=idx, total=total)
+            self.append_checkpoint_record(record)
+            return record
+
+        work = list(enumerate(tickers_to_fetch, start=1))
+        workers = min(self.max_fetch_workers, total)
+        if workers <= 1:
+            records = [fetch_one(item) for item in work]
+        else:
+            logging.info("Stock analysis fetch: %s workers for %s tickers", workers, total)
+            # map() preserves input order so output matches the sequential path.
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="yf-fetch") as pool:
+                records = list(pool.map(fetch_one, work))
+        logging.info("Stock analysis fetch complete: %s records produced for %s requested tickers.", len(records), total)
+        return records
+
+    def fetch_single_ticker(self, t, tickers_obj, hist, idx=1, total=1, max_attempts=4):
+        """Fetch one ticker with retry/backoff; always returns a record (error rows on failure)."""
+        attempt = 0
+        while attempt < max_attempts:
+            attempt += 1
+            try:
+                if attempt == 1 and (idx == 1 or idx % 10 == 0 or idx == total):
+                    logging.info("Stock analysis progress: %s/%s (ticker=%s)", idx, total, t)
+                logging.debug(f"Processing ticker {t} (Attempt {attempt}/{max_attempts})...")
+                self.throttle_yf_requests()
+                ticker_obj = tickers_obj.tickers.get(t)
+                if ticker_obj is None:
+                    raise KeyError(f"Ticker '{t}' missing from yfinance.Tickers result")
+                info = ticker_obj.info
+                ticker_hist = hist.get(t)
+                chain = ticker_obj
+                record = self.fetch_ticker_record(t, info, ticker_hist, chain)
+                self.record_rate_success()
+                return record
+            except Exception as e:
+                retryable = self.is_retryable_yf_error(e)
+                if self.is_http_429_error(e):
+                    consecutive = self.record_rate_limited()
+                    self.apply_rate_limit_cooldown(consecutive)
+                should_retry = retryable and attempt < max_attempts
+                if should_retry:
+                    backoff = min(90, 3 * (2 ** (attempt - 1))) + random.uniform(0.1, 0.9)
                     logging.warning(
-                        "Stock analysis ticker failed: %s attempt=%s/%s retryable=%s error=%s",
+                        "Stock analysis ticker retry: %s attempt=%s/%s backoff_sec=%s error=%s",
                         t,
                         attempt,
                         max_attempts,
-                        retryable,
+                        round(backoff, 2),
                         e,
                     )
-                    record = {
-                        "Ticker": t,
-                        "Error": str(e),
-                        "Last Update": self.now.strftime("%Y-%m-%d %H:%M:%S"),
-                    }
-                    records.append(record)
-                    break
-        logging.info("Stock analysis fetch complete: %s records produced for %s requested tickers.", len(records), total)
-        return records
+                    time.sleep(backoff)
+                    continue
+
+                logging.warning(
+                    "Stock analysis ticker failed: %s attempt=%s/%s retryable=%s error=%s",
+                    t,
+                    attempt,
+                    max_attempts,
+                    retryable,
+                    e,
+                )
+                return {
+                    "Ticker": t,
+                    "Error": str(e),
+                    "Last Update": self.now.strftime("%Y-%m-%d %H:%M:%S"),
+                }
 
     def download_history_batched(self, tickers_to_fetch):
-        """Download history in small batches, with local cache and paced pauses."""
+        """Download history in small batches, with local cache and paced pauses.
+
+        Fresh cache hits are returned as-is. With ``incremental_history`` on,
+        stale caches only request the bars from their last cached date onward
+        and append them; the overlapping bar guards against split/dividend
+        re-adjustment, which forces a full ``period="1y"`` refetch instead.
+        """
         hist_by_ticker = {}
         to_download = []
+        stale_cache = {}
         for ticker in tickers_to_fetch:
             cached = self.load_cached_history(ticker)
             if cached is not None:
                 hist_by_ticker[ticker] = cached
-            else:
-                to_download.append(ticker)
+                continue
+            to_download.append(ticker)
+            if self.incremental_history:
+                stale = self.load_cached_history(ticker, ignore_ttl=True)
+                if self.is_delta_candidate(stale):
+                    stale_cache[ticker] = stale
 
         if not to_download:
             return hist_by_ticker
 
-        batches = [
-            to_download[i : i + self.download_batch_size]
-            for i in range(0, len(to_download), self.download_batch_size)
-        ]
-        total_batches = len(batches)
+        full_refetch = [t for t in to_download if t not in stale_cache]
+        delta_applied = 0
+        if stale_cache:
+            by_start = {}
+            for ticker, stale in stale_cache.items():
+                by_start.setdefault(self.history_delta_start(stale), []).append(ticker)
+            for start_date, group in by_start.items():
+                delta_hist = self.download_history_group(group, label="delta", start=start_date)
+                for ticker in group:
+                    try:
+                        merged = self.merge_history_delta(stale_cache[ticker], delta_hist.get(ticker))
+                    except Exception as e:
+                        logging.warning("Stock analysis history delta merge failed ticker=%s error=%s", ticker, e)
+                        merged = None
+                    if merged is None:
+                        full_refetch.append(ticker)
+                        continue
+                    hist_by_ticker[ticker] = merged
+                    self.write_cached_history(ticker, merged)
+                    delta_applied += 1
+            logging.info(
+                "Stock analysis history delta: %s incremental, %s full refetch",
+                delta_applied,
+                len(full_refetch),
+            )
 
-        for idx, batch in enumerate(batches, start=1):
+        if full_refetch:
+            full_hist = self.download_history_group(full_refetch, label="full", period="1y")
+            for ticker in full_refetch:
+                ticker_hist = full_hist.get(ticker)
+                hist_by_ticker[ticker] = ticker_hist
+                if self.is_usable_history(ticker_hist):
+                    self.write_cached_history(ticker, ticker_hist)
+
+        self.save_history_manifest()
+        return {t: hist_by_ticker.get(t) for t in tickers_to_fetch}
+
+    def download_history_group(self, tickers, label="full", **window):
+        """Run paced yf.download batches for one window (period= or start=).
+
+        Batch size adapts: each successful batch grows the next one (up to
+        ``max_download_batch_size``); a batch that raises is bisected and both
+        halves are retried, so one bad symbol only loses its own history.
+        Every attempt is recorded in ``history_batch_metrics``.
+        """
+        out = {}
+        queue = list(tickers)
+        retry = []  # bisected halves, retried before new tickers
+        batch_size = self._history_batch_size
+        idx = 0
+        while retry or queue:
+            if retry:
+                batch = retry.pop(0)
+            else:
+                batch, queue = queue[:batch_size], queue[batch_size:]
+            idx += 1
             self.throttle_yf_requests()
             logging.info(
-                "Stock analysis history batch %s/%s size=%s",
+                "Stock analysis history batch %s size=%s mode=%s remaining=%s",
                 idx,
-                total_batches,
                 len(batch),
+                label,
+                len(queue) + sum(len(b) for b in retry),
             )
+            started = time.monotonic()
+            error = None
             try:
-                batch_hist = yf.download(
-                    batch,
-                    period="1y",
-                    group_by="ticker",
-                    threads=True,
-                    auto_adjust=False,  # explicit to avoid FutureWarning
-                    progress=False,
-                )
+                with self._history_download_lock:
+                    batch_hist = yf.download(
+                        batch,
+                        group_by="ticker",
+                        threads=True,
+                        auto_adjust=False,  # explicit to avoid FutureWarning
+                        progress=False,
+                        **window,
+                    )
             except Exception as e:
-                logging.warning(
-                    "Stock analysis history batch failed batch=%s/%s error=%s",
-                    idx,
-                    total_batches,
-                    e,
-                )
+                error = e
                 batch_hist = None
+            latency = round(time.monotonic() - started, 3)
 
-            for ticker in batch:
-                ticker_hist = self.extract_ticker_history(batch_hist, ticker, batch_len=len(batch))
-                hist_by_ticker[ticker] = ticker_hist
-                if ticker_hist is not None and not ticker_hist.empty:
-                    self.write_cached_history(ticker, ticker_hist)
+            if error is not None and len(batch) > 1:
+                mid = len(batch) // 2
+                retry[:0] = [batch[:mid], batch[mid:]]
+                batch_size = max(1, mid)
+                outcome = "split"
+                logging.warning(
+                    "Stock analysis history batch failed, bisecting size=%s mode=%s error=%s",
+                    len(batch),
+                    label,
+                    error,
+                )
+            elif error is not None:
+                out[batch[0]] = None
+                outcome = "failed"
+                logging.warning(
+                    "Stock analysis history failed ticker=%s mode=%s error=%s",
+                    batch[0],
+                    label,
+                    error,
+                )
+            else:
+                for ticker in batch:
+                    ticker_hist = self.extract_ticker_history(batch_hist, ticker, batch_len=len(batch))
+                    out[ticker] = ticker_hist if self.is_usable_history(ticker_hist) else None
+                outcome = "ok"
+                if len(batch) >= batch_size:
+                    batch_size = min(self.max_download_batch_size, batch_size + max(1, batch_size // 2))
+
+            empty = sum(1 for t in batch if out.get(t) is None)
+            self.history_batch_metrics.append(
+                {
+                    "mode": label,
+                    "size": len(batch),
+                    "latency_sec": latency,
+                    "outcome": outcome,
+                    "empty_tickers": empty if outcome == "ok" else len(batch),
+                }
+            )
 
-            if idx < total_batches and self.batch_pause_sec > 0:
+            if (retry or queue) and self.batch_pause_sec > 0:
                 time.sleep(self.batch_pause_sec)
 
-        return hist_by_ticker
+        self._history_batch_size = batch_size
+        return out
+
+    def history_batch_summary(self):
+        """Aggregate ``history_batch_metrics`` for the run summary."""
+        metrics = list(self.history_batch_metrics)
+        latencies = [m["latency_sec"] for m in metrics]
+        return {
+            "history_batch_count": len(metrics),
+            "history_batch_splits": sum(1 for m in metrics if m["outcome"] == "split"),
+            "history_batch_failed_tickers": sum(1 for m in metrics if m["outcome"] == "failed"),
+            "history_batch_max_size": max((m["size"] for m in metrics), default=0),
+            "history_batch_avg_latency_sec": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            "history_batch_max_latency_sec": max(latencies, default=0.0),
+            "history_batches": metrics,
+        }
+
+    def is_delta_candidate(self, cached):
+        """A stale cache can be topped up when it has a settled bar and is recent enough."""
+        if cached is None or len(cached) < 2 or not isinstance(cached.index, pd.DatetimeIndex):
+            return False
+        age_days = (pd.Timestamp(self.now).normalize() - cached.index[-1].tz_localize(None).normalize()).days
+        return 0 <= age_days <= self.max_delta_gap_days
+
+    @staticmethod
+    def history_delta_start(cached):
+        """First date a delta download must cover: the last settled cached bar."""
+        return cached.index[-2].strftime("%Y-%m-%d")
+
+    @staticmethod
+    def merge_history_delta(cached, delta, tolerance=1e-4, window_days=366):
+        """Append new bars to a cached frame; return None when a full refetch is needed.
+
+        The last cached bar may have been written mid-session (a partial
+        intraday bar), so it is dropped and replaced from ``delta``, which
+        must start at the last settled bar (``history_delta_start``). If that
+        overlapping bar's Close or Adj Close moved, a split or dividend
+        re-adjusted history and the cached prefix is no longer comparable.
+        """
+        if delta is None or delta.empty:
+            return None
+        delta = StockLiveComparison.normalize_history_frame(delta).dropna(subset=["Close"])
+        if delta.empty:
+            return None
+        cached = StockLiveComparison.normalize_history_frame(cached).iloc[:-1]
+        if cached.empty:
+            return None
+        overlap = cached.index[-1]
+        if overlap not in delta.index:
+            return None
+        for col in ("Close", "Adj Close"):
+            if col not in cached.columns or col not in delta.columns:
+                continue
+            old = cached.at[overlap, col]
+            new = delta.at[overlap, col]
+            if pd.isna(old) or pd.isna(new):
+                continue
+            if abs(new - old) > tolerance * max(abs(old), 1.0):
+                logging.info(
+                    "Stock analysis history delta rejected: %s changed on %s (%s -> %s)",
+                    col,
+                    overlap.date(),
+                    old,
+                    new,
+                )
+                return None
+        merged = pd.concat([cached, delta[delta.index > overlap]])
+        merged = merged[~merged.index.duplicated(keep="last")]
+        cutoff = merged.index[-1] - pd.Timedelta(days=window_days)
+        return merged[merged.index > cutoff]
 
     def history_cache_path(self, ticker):
+        """Legacy per-ticker CSV cache path (still read as a fallback)."""
         safe = re.sub(r"[^A-Za-z0-9_.-]", "_", str(ticker))
         return self.history_cache_dir / f"{safe}.csv"
 
+    def history_parquet_path(self, ticker):
+        safe = re.sub(r"[^A-Za-z0-9_.-]", "_", str(ticker))
+        return self.history_cache_dir / f"{safe}.parquet"
+
+    def history_manifest_path(self):
+        return self.history_cache_dir / "_manifest.json"
+
     def is_cache_fresh(self, cache_path):
         if not cache_path.exists():
             return False
         age_hours = (time.time() - cache_path.stat().st_mtime) / 3600.0
         return age_hours <= self.history_cache_ttl_hours
 
-    def load_cached_history(self, ticker):
-        cache_path = self.history_cache_path(ticker)
-        if not self.is_cache_fresh(cache_path):
-            return None
+    def load_history_manifest(self):
+        """Return {ticker: {"last_date", "rows", "fetched_at"}} for cached histories."""
+        if self._history_manifest is None:
+            try:
+                self._history_manifest = json.loads(self.history_manifest_path().read_text(encoding="utf-8"))
+                if not isinstance(self._history_manifest, dict):
+                    self._history_manifest = {}
+            except Exception:
+                self._history_manifest = {}
+        return self._history_manifest
+
+    def save_history_manifest(self):
+        manifest_path = self.history_manifest_path()
+        tmp_path = manifest_path.with_suffix(".json.tmp")
         try:
-            df = pd.read_csv(cache_path, index_col=0, parse_dates=True)
-            # We expect OHLCV columns; treat malformed cache as miss.
-            required = {"Open", "High", "Low", "Close"}
-            if not required.issubset(set(df.columns)):
-                return None
-            return df
-        except Exception:
-            return None
+            with self._history_manifest_lock:
+                tmp_path.write_text(json.dumps(self.load_history_manifest(), indent=2, sort_keys=True), encoding="utf-8")
+                tmp_path.replace(manifest_path)
+        except Exception as e:
+            logging.warning("Stock analysis cache manifest write failed error=%s", e)
+
+    @staticmethod
+    def normalize_history_frame(df):
+        """Coerce a history frame to a DatetimeIndex and float64 price columns."""
+        out = df.copy()
+        out.index = pd.to_datetime(out.index)
+        out.index.name = "Date"
+        out.columns = [str(c) for c in out.columns]
+        for col in HISTORY_PRICE_COLUMNS:
+            if col in out.columns:
+                out[col] = pd.to_numeric(out[col], errors="coerce").astype("float64")
+        if "Volume" in out.columns:
+            out["Volume"] = pd.to_numeric(out["Volume"], errors="coerce").astype("float64")
+        return out.sort_index()
+
+    def load_cached_history(self, ticker, ignore_ttl=False):
+        # Parquet first (typed columns, memory-mapped read), then legacy CSV.
+        candidates = []
+        if PARQUET_AVAILABLE:
+            candidates.append(("parquet", self.history_parquet_path(ticker)))
+        candidates.append(("csv", self.history_cache_path(ticker)))
+        for fmt, cache_path in candidates:
+            if not cache_path.exists() or not (ignore_ttl or self.is_cache_fresh(cache_path)):
+                continue
+            try:
+                if fmt == "parquet":
+                    df = pd.read_parquet(cache_path, memory_map=True)
+                else:
+                    df = pd.read_csv(cache_path, index_col=0, parse_dates=True)
+                # We expect OHLCV columns; treat malformed cache as miss.
+                required = {"Open", "High", "Low", "Close"}
+                if not required.issubset(set(df.columns)):
+                    continue
+                return df
+            except Exception:
+                continue
+        return None
 
     def write_cached_history(self, ticker, df):
-        cache_path = self.history_cache_path(ticker)
         try:
-            df.to_csv(cache_path)
+            frame = self.normalize_history_frame(df)
+            if PARQUET_AVAILABLE:
+                frame.to_parquet(self.history_parquet_path(ticker))
+                legacy_path = self.history_cache_path(ticker)
+                if legacy_path.exists():
+                    legacy_path.unlink()
+            else:
+                frame.to_csv(self.history_cache_path(ticker))
         except Exception as e:
             logging.warning("Stock analysis cache write failed ticker=%s error=%s", ticker, e)
+            return
+        if frame.empty:
+            return
+        with self._history_manifest_lock:
+            self.load_history_manifest()[str(ticker)] = {
+                "last_date": frame.index[-1].strftime("%Y-%m-%d"),
+                "rows": int(len(frame)),
+                "fetched_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            }
+
+    @staticmethod
+    def is_usable_history(frame):
+        """A downloaded frame can be cached and analysed: non-empty with a flat ``Close`` column."""
+        return isinstance(frame, pd.DataFrame) and not frame.empty and "Close" in frame.columns
 
     @staticmethod
     def extract_ticker_history(batch_hist, ticker, batch_len):
         if batch_hist is None:
             return None
         try:
-            # Single-ticker batch returns a regular OHLC DataFrame.
+            # yfinance returns MultiIndex columns keyed by ticker (level 0 with
+            # group_by="ticker", level 1 otherwise), even for one-ticker batches.
+            if isinstance(batch_hist, pd.DataFrame) and isinstance(batch_hist.columns, pd.MultiIndex):
+                for level in range(batch_hist.columns.nlevels):
+                    if ticker in batch_hist.columns.get_level_values(level):
+                        return batch_hist.xs(ticker, axis=1, level=level)
+                return None
+            # Older yfinance returns a flat OHLC frame for a single ticker.
             if batch_len == 1 and isinstance(batch_hist, pd.DataFrame):
                 return batch_hist
-            # Multi-ticker batch usually returns MultiIndex columns keyed by ticker.
-            if isinstance(batch_hist, pd.DataFrame) and isinstance(batch_hist.columns, pd.MultiIndex):
-                return batch_hist[ticker] if ticker in batch_hist.columns.get_level_values(0) else None
             # Fallback for dict-like stubs in tests.
             if isinstance(batch_hist, dict):
                 return batch_hist.get(ticker)
@@ -845,24 +1455,130 @@ class StockLiveComparison:
         return "429" in msg or "too many requests" in msg or "rate limit" in msg
 
     def throttle_yf_requests(self):
-        """Throttle outbound yfinance calls to avoid burst behavior."""
-        now_ts = time.time()
-        if now_ts < self._next_request_not_before_ts:
-            time.sleep(self._next_request_not_before_ts - now_ts)
+        """Throttle outbound yfinance calls to avoid burst behavior.
+
+        Token bucket shared by all fetch workers: refills at one token per
+        ``min_request_interval_sec`` up to ``request_burst``. A caller that finds
+        the bucket empty reserves the next token (balance goes negative) and
+        sleeps outside the lock, so concurrent workers queue in FIFO slots.
+        The 429 cooldown window still gates every caller.
+        """
+        interval = max(0.0, self.min_request_interval_sec)
+        with self._rate_lock:
             now_ts = time.time()
-        self._next_request_not_before_ts = now_ts + max(0.0, self.min_request_interval_sec)
+            if self._bucket_updated_ts is None:
+                self._bucket_updated_ts = now_ts
+            if interval > 0:
+                elapsed = max(0.0, now_ts - self._bucket_updated_ts)
+                self._bucket_tokens = min(self.request_burst, self._bucket_tokens + elapsed / interval)
+                self._bucket_updated_ts = now_ts
+                self._bucket_tokens -= 1.0
+                wait = -self._bucket_tokens * interval if self._bucket_tokens < 0 else 0.0
+            else:
+                wait = 0.0
+            wait = max(wait, self._next_request_not_before_ts - now_ts)
+        if wait > 0:
+            time.sleep(wait)
 
     def apply_rate_limit_cooldown(self, consecutive_hits):
         """Apply a global cooldown window after 429 responses."""
         cooldown = min(300, 20 * (2 ** max(0, consecutive_hits - 1)))
         cooldown += random.uniform(0.5, 2.0)
-        self._next_request_not_before_ts = max(self._next_request_not_before_ts, time.time() + cooldown)
+        with self._rate_lock:
+            self._next_request_not_before_ts = max(self._next_request_not_before_ts, time.time() + cooldown)
         logging.warning(
             "Stock analysis 429 cooldown engaged: consecutive=%s cooldown_sec=%s",
             consecutive_hits,
             round(cooldown, 2),
         )
 
+    # AIMD: add ADAPTIVE_RATE_STEP req/s after every ADAPTIVE_RATE_WINDOW
+    # successes, halve the rate on a 429. Fetch workers and concurrent shards
+    # share one controller and a burst of 429s arrives together, so at most
+    # one halving is applied per ADAPTIVE_RATE_DECREASE_COOLDOWN_SEC (the
+    # base 429 cooldown window).
+    ADAPTIVE_RATE_STEP = 0.05
+    ADAPTIVE_RATE_WINDOW = 5
+    ADAPTIVE_RATE_DECREASE_FACTOR = 0.5
+    ADAPTIVE_RATE_DECREASE_COOLDOWN_SEC = 20.0
+
+    def record_rate_success(self):
+        """Count a successful yfinance call; additively raise the rate when adaptive."""
+        with self._rate_lock:
+            self._consecutive_429 = 0
+            self.rate_success_count += 1
+            if not self.adaptive_rate:
+                return
+            self._rate_success_streak += 1
+            if self._rate_success_streak < self.ADAPTIVE_RATE_WINDOW:
+                return
+            self._rate_success_streak = 0
+            interval = self.min_request_interval_sec
+            if interval <= self.min_adaptive_interval_sec:
+                return
+            new_interval = max(self.min_adaptive_interval_sec, 1.0 / (1.0 / interval + self.ADAPTIVE_RATE_STEP))
+            self.min_request_interval_sec = new_interval
+            self.rate_increase_count += 1
+        logging.debug("Stock analysis adaptive rate increase interval_sec=%s", round(new_interval, 4))
+
+    def record_rate_limited(self):
+        """Count a 429; multiplicatively back off when adaptive. Returns the consecutive 429 count."""
+        with self._rate_lock:
+            self._consecutive_429 += 1
+            consecutive = self._consecutive_429
+            self.rate_limited_count += 1
+            self._rate_success_streak = 0
+            if not self.adaptive_rate:
+                return consecutive
+            now_ts = time.time()
+            if now_ts < self._rate_decrease_hold_until_ts:
+                return consecutive
+            self._rate_decrease_hold_until_ts = now_ts + self.ADAPTIVE_RATE_DECREASE_COOLDOWN_SEC
+            interval = max(self.min_request_interval_sec, self.min_adaptive_interval_sec)
+            new_interval = min(self.max_adaptive_interval_sec, interval / self.ADAPTIVE_RATE_DECREASE_FACTOR)
+            self.min_request_interval_sec = new_interval
+            self.rate_decrease_count += 1
+        logging.warning("Stock analysis adaptive rate backoff interval_sec=%s", round(new_interval, 4))
+        return consecutive
+
+    # Limiter state handed from one sequential shard's instance to the next.
+    RATE_STATE_FIELDS = (
+        "min_request_interval_sec",
+        "_next_request_not_before_ts",
+        "_consecutive_429",
+        "_bucket_tokens",
+        "_bucket_updated_ts",
+        "_rate_success_streak",
+        "_rate_decrease_hold_until_ts",
+    )
+
+    def export_rate_state(self):
+        """Snapshot of the token bucket, 429 cooldown and adaptive interval."""
+        with self._rate_lock:
+            return {name: getattr(self, name) for name in self.RATE_STATE_FIELDS}
+
+    def import_rate_state(self, state):
+        """Continue a previous instance's limiter instead of starting with a full bucket."""
+        with self._rate_lock:
+            for name in self.RATE_STATE_FIELDS:
+                if name in state:
+                    setattr(self, name, state[name])
+
+    def rate_controller_snapshot(self):
+        """Current controller state for run summaries and ingest telemetry."""
+        with self._rate_lock:
+            interval = self.min_request_interval_sec
+            return {
+                "adaptive_rate_enabled": self.adaptive_rate,
+                "request_interval_sec": round(interval, 4),
+                "request_rate_per_sec": round(1.0 / interval, 4) if interval > 0 else None,
+                "initial_request_interval_sec": round(self.initial_request_interval_sec, 4),
+                "rate_success_count": self.rate_success_count,
+                "rate_limited_count": self.rate_limited_count,
+                "rate_increase_count": self.rate_increase_count,
+                "rate_decrease_count": self.rate_decrease_count,
+            }
+
     # ------------------------------------------------------------------
     def merge_with_existing(self, df_existing, tickers_to_fetch):
         df_new = pd.DataFrame(self.records)
@@ -871,53 +1587,93 @@ class StockLiveComparison:
 
     # ------------------------------------------------------------------
     # ------------------------------------------------------------------
+    STALENESS_MA_COLUMNS = ["MA_30", "MA_60", "MA_120", "MA_200"]
+    STALENESS_INDICATOR_COLUMNS = ["EMA_20", "HMA_20", "TSMOM_60", "RSI_14", "ATR_14"]
+
+    @classmethod
+    def staleness_projection(cls):
+        """Fields needed to decide whether a stock_data doc must be refetched."""
+        fields = ["Ticker", "Last Update", "_PutExpDate_365"]
+        fields += cls.STALENESS_MA_COLUMNS + cls.STALENESS_INDICATOR_COLUMNS
+        fields += [f"{ma}_highlight" for ma in cls.STALENESS_MA_COLUMNS]
+        return {field: 1 for field in fields} | {"_id": 0}
+
+    def is_stale_record(self, row):
+        """Return True when a stored row is too old or missing indicator/expiry data."""
+        try:
+            # Check age
+            last = pd.to_datetime(row.get("Last Update"))
+            if pd.isna(last) or (self.now - last).total_seconds() / 3600 >= self.max_age_hours:
+                return True
+
+            # Missing Moving Averages and New Indicators (NaN) force a re-fetch
+            for col in self.STALENESS_MA_COLUMNS + self.STALENESS_INDICATOR_COLUMNS:
+                if col not in row or pd.isna(row[col]):
+                    return True
+
+            # Use _PutExpDate_365 as a proxy for all expiration date fields (YF links)
+            if "_PutExpDate_365" not in row or pd.isna(row["_PutExpDate_365"]):
+                return True
+
+            # Legacy "green"/"red" strings in highlight columns
+            for ma in self.STALENESS_MA_COLUMNS:
+                val = row.get(f"{ma}_highlight")
+                if isinstance(val, str) and val in ["green", "red"]:
+                    return True
+            return False
+        except Exception:
+            return True
+
+    def get_stale_tickers(self, existing_rows):
+        """Return tracked tickers missing from existing_rows or stale, in self.tickers order."""
+        by_ticker = {}
+        for row in existing_rows or []:
+            ticker = row.get("Ticker")
+            if ticker is not None and ticker not in by_ticker:
+                by_ticker[ticker] = row
+        return [
+            t for t in self.tickers
+            if t not in by_ticker or self.is_stale_record(by_ticker[t])
+        ]
+
     def get_missing_or_outdated_tickers(self, df_existing):
         """Return tickers missing form the DataFrame, older than max_age_hours, or having missing MA data."""
-        missing = []
-        ma_cols = ["MA_30", "MA_60", "MA_120", "MA_200"]
-        # Include new indicators in validity check
-        new_cols = ["EMA_20", "HMA_20", "TSMOM_60", "RSI_14", "ATR_14"]
-        all_required_cols = ma_cols + new_cols
-        
-        for t in self.tickers:
-            row = df_existing[df_existing["Ticker"] == t]
-            if row.empty:
-                missing.append(t)
-                continue
-            try:
-                # Check age
-                last = pd.to_datetime(row.iloc[0]["Last Update"])
-                if pd.isna(last) or (
-                    (self.now - last).total_seconds() / 3600 >= self.max_age_hours
-                ):
-                    missing.append(t)
-                    continue
-                
-                # Check for missing Moving Averages and New Indicators (NaN)
-                # If any required column is missing or NaN, consider it outdated to force re-fetch
-                for col in all_required_cols:
-                    if col not in row.columns or pd.isna(row.iloc[0][col]):
-                        missing.append(t)
-                        break
-                else:
-                    # Check for missing Expiration Date fields (Validation for YF Links)
-                    # Use _PutExpDate_365 as a proxy for all new date fields
-                    if "_PutExpDate_365" not in row.columns or pd.isna(row.iloc[0]["_PutExpDate_365"]):
-                         missing.append(t)
-                    else:
-                        # Check for legacy "green"/"red" strings in highlight columns
-                        # Only check if the previous check didn't already mark it as missing
-                        for ma in ma_cols:
-                            hl_col = f"{ma}_highlight"
-                            if hl_col in row.columns:
-                                val = row.iloc[0][hl_col]
-                                if isinstance(val, str) and val in ["green", "red"]:
-                                    missing.append(t)
-                                    break
-                        
-            except Exception:
-                missing.append(t)
-        return missing
+        return self.get_stale_tickers(df_existing.to_dict(orient="records"))
+
+    @classmethod
+    def ensure_stock_data_indexes(cls, collection):
+        if cls._stock_data_indexes_ensured:
+            return
+        try:
+            ensure_registered_indexes(collection, "stock_data")
+            cls._stock_data_indexes_ensured = True
+        except Exception as exc:
+            logging.warning("Unable to ensure stock_data indexes: %s", exc)
+
+    def get_stale_tickers_from_mongo(self, collection):
+        """One indexed projection query on stock_data -> stale tickers for this run."""
+        self.ensure_stock_data_indexes(collection)
+        docs = collection.find({"Ticker": {"$in": list(self.tickers)}}, self.staleness_projection())
+        return self.get_stale_tickers(docs)
+
+    def load_existing_records_from_mongo(self):
+        """Return (stale_tickers, existing report rows) from stock_data, or None when Mongo fails.
+
+        Report rows cover every stock_data row except the stale tickers about
+        to be refetched, so single-ticker syncs and shard runs rewrite the
+        full report rather than one limited to ``self.tickers``. Rows exclude
+        the nested `profile` payload; upsert_to_mongo keeps it on the
+        canonical doc.
+        """
+        try:
+            collection = AiStockDatabase(collection_name="stock_data").collection
+            stale = self.get_stale_tickers_from_mongo(collection)
+            projection = {col: 1 for col in self.CANONICAL_REPORT_COLUMNS} | {"Price Action": 1, "_id": 0}
+            rows = list(collection.find({"Ticker": {"$nin": stale}}, projection))
+            return stale, rows
+        except Exception as e:
+            logging.error(f"Failed to load existing stock_data from MongoDB: {e}")
+            return None
 
     # ------------------------------------------------------------------
     # ------------------------------------------------------------------
@@ -991,8 +1747,119 @@ class StockLiveComparison:
             return df
 
     # ------------------------------------------------------------------
-    def save_to_excel(self, df, put_col, call_col):
-        ma_windows = [30, 60, 120, 200]
+    EXCEL_GREEN_FILL = "C6EFCE"
+    EXCEL_RED_FILL = "FFC7CE"
+    EXCEL_MA_WINDOWS = (30, 60, 120, 200)
+    EXCEL_OPTION_LINK_MAP = {
+        "1-yr 6% OTM PUT Strike": "_PutExpDate_365",
+        "1-yr 6% OTM PUT Price": "_PutExpDate_365",
+        "1-yr 6% OTM CALL Strike": "_CallExpDate_365",
+        "1-yr 6% OTM CALL Price": "_CallExpDate_365",
+        "1-yr Call Yield": "_CallExpDate_365",
+        "3-mo Call Yield": "_CallExpDate_90",
+        "6-mo Call Yield": "_CallExpDate_180",
+        "6-mo Call Strike": "_CallExpDate_180",
+    }
+
+    @staticmethod
+    def excel_cell_value(value):
+        """Convert a DataFrame value to what openpyxl can write (mirrors ``df.to_excel``)."""
+        if value is None:
+            return None
+        if isinstance(value, (list, tuple, dict, set)):
+            return str(value)
+        try:
+            if pd.isna(value):
+                return None
+        except (TypeError, ValueError):
+            return str(value)
+        if isinstance(value, pd.Timestamp):
+            value = value.to_pydatetime()
+        if isinstance(value, datetime):
+            return value.replace(tzinfo=None) if value.tzinfo else value
+        if hasattr(value, "item") and not isinstance(value, (str, bytes)):
+            value = value.item()
+        if isinstance(value, (str, int, float, bool)):
+            return value
+        return str(value)
+
+    def excel_fill_for(self, col_name, value, row):
+        """Return "green"/"red"/None for the conditional colour of one report cell."""
+        def _num(v):
+            return v if isinstance(v, (int, float)) and not isinstance(v, bool) else None
+
+        if col_name == "Call/Put Skew":
+            val = _num(value)
+            if val is not None:
+                if val > 1.2:
+                    return "green"
+                if val < 0.75:
+                    return "red"
+        elif col_name in {f"MA_{w}" for w in self.EXCEL_MA_WINDOWS}:
+            try:
+                avg = value
+                price = row.get("Current Price")
+                if avg is not None and price is not None:
+                    if price <= avg * (1 - self.highlight_threshold):
+                        return "green"
+                    if price >= avg * (1 + self.highlight_threshold):
+                        return "red"
+            except Exception:
+                pass
+        elif col_name == "EMA_20":
+            # Price > 0.5% above EMA green, < -0.5% red.
+            val = _num(row.get("EMA_20_highlight"))
+            if val is not None:
+                if val > 0.005:
+                    return "green"
+                if val < -0.005:
+                    return "red"
+        elif col_name == "HMA_20":
+            # Price > HMA green, Price < HMA red.
+            val = _num(row.get("HMA_20_highlight"))
+            if val is not None:
+                if val > 0:
+                    return "green"
+                if val < 0:
+                    return "red"
+        elif col_name == "TSMOM_60":
+            # Green > 2%, Red < -2%.
+            val = _num(value)
+            if val is not None:
+                if val > 0.02:
+                    return "green"
+                if val < -0.02:
+                    return "red"
+        return None
+
+    def excel_link_columns(self, df, columns):
+        """Hyperlink targets per linked column, one entry per row (None = no link).
+
+        Built once per column before the row loop: a Google Finance link on
+        ``Ticker`` and a Yahoo option-chain link on each option column whose
+        expiration column is present.
+        """
+        if "Ticker" not in columns:
+            return {}
+        tickers = [self.excel_cell_value(v) for v in df["Ticker"]]
+        links = {"Ticker": [f"https://www.google.com/finance?q={t}" if t else None for t in tickers]}
+        for name, exp_col in self.EXCEL_OPTION_LINK_MAP.items():
+            if name not in columns or exp_col not in columns:
+                continue
+            expirations = [self.excel_cell_value(v) for v in df[exp_col]]
+            links[name] = [
+                self.generate_yf_option_url(ticker, exp_date) if ticker and exp_date else None
+                for ticker, exp_date in zip(tickers, expirations)
+            ]
+        return links
+
+    def save_to_excel(self, df):
+        """Write the report with a write-only openpyxl workbook in a single pass.
+
+        Rows are streamed from ``df.itertuples`` straight into styled
+        ``WriteOnlyCell``s (hyperlinks, conditional fills, number formats), so
+        the file is written once and never re-loaded into memory.
+        """
         # Ensure canonical report columns exist before reorder.
         for col in self.CANONICAL_REPORT_COLUMNS:
             if col not in df.columns:
@@ -1001,169 +1868,50 @@ class StockLiveComparison:
         ordered_cols = [c for c in self.CANONICAL_REPORT_COLUMNS if c in df.columns]
         remaining = [c for c in df.columns if c not in ordered_cols]
         df = df[ordered_cols + remaining]
-
         df = self.sort_dataframe_for_excel(df)
-        df.to_excel(self.filename, index=False)
-        wb = openpyxl.load_workbook(self.filename)
-        ws = wb.active
-        ws.row_dimensions[1].height = None
 
-        if "Ticker" in df.columns:
-            ticker_col_idx = df.columns.get_loc("Ticker") + 1
-        else:
-            ticker_col_idx = None
+        columns = [str(c) for c in df.columns]
+        fills = {
+            "green": PatternFill(start_color=self.EXCEL_GREEN_FILL, end_color=self.EXCEL_GREEN_FILL, fill_type="solid"),
+            "red": PatternFill(start_color=self.EXCEL_RED_FILL, end_color=self.EXCEL_RED_FILL, fill_type="solid"),
+        }
+        percent_cols = {f"MA_{w}_highlight" for w in self.EXCEL_MA_WINDOWS} | {"TSMOM_60"}
+        fill_cols = {"Call/Put Skew", "EMA_20", "HMA_20", "TSMOM_60"} | {f"MA_{w}" for w in self.EXCEL_MA_WINDOWS}
+        links = self.excel_link_columns(df, columns)
 
-        # Re-calc indices after reorder
-        put_col = df.columns.get_loc("Annual Yield Put Prem") + 1 if "Annual Yield Put Prem" in df.columns else None
-        call_col = df.columns.get_loc("Annual Yield Call Prem") + 1 if "Annual Yield Call Prem" in df.columns else None
-        ratio_col = df.columns.get_loc("Call/Put Skew") + 1 if "Call/Put Skew" in df.columns else None
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet("Sheet1")
+        ws.freeze_panes = "A2"  # Freeze the first row
 
-        # Hyperlinks ONLY (Removed IFERROR formula overwrite)
-        for i in range(2, ws.max_row + 1):
-            
-            # Add Google Finance Hyperlink to Ticker Column
-            if ticker_col_idx:
-                ticker_cell = ws.cell(row=i, column=ticker_col_idx)
-                ticker_val = ticker_cell.value
-                if ticker_val:
-                    url = f"https://www.google.com/finance?q={str(ticker_val)}"
-                    ticker_cell.hyperlink = url
-                    ticker_cell.style = "Hyperlink"
-
-            # Add Yahoo Finance Option Chain Hyperlinks to Yield Columns
-            # Define mapping of visible column name -> record key for expiration date
-            link_map = {
-                "1-yr 6% OTM PUT Strike": "_PutExpDate_365",
-                "1-yr 6% OTM PUT Price": "_PutExpDate_365",
-                "1-yr 6% OTM CALL Strike": "_CallExpDate_365",
-                "1-yr 6% OTM CALL Price": "_CallExpDate_365",
-                "1-yr Call Yield": "_CallExpDate_365",
-                "3-mo Call Yield": "_CallExpDate_90",
-                "6-mo Call Yield": "_CallExpDate_180",
-                "6-mo Call Strike": "_CallExpDate_180",
-            }
-            
-            # Pre-calculate column indices to avoid repeated lookups
-            col_indices = {}
-            for col_name, date_key in link_map.items():
-                if col_name in df.columns:
-                     # 1-based index for openpyxl corresponding to DF column
-                     col_indices[df.columns.get_loc(col_name) + 1] = date_key
-
-            # Apply links row by row
-            if col_indices:
-                for col_idx, date_key in col_indices.items():
-                    # Row i in Excel corresponds to df index i-2
-                    if 0 <= i-2 < len(df):
-                        row_data = df.iloc[i-2]
-                        exp_date = row_data.get(date_key)
-                        ticker = row_data.get("Ticker")
-                        
-                        if exp_date and ticker:
-                            yf_url = self.generate_yf_option_url(ticker, exp_date)
-                            if yf_url:
-                                cell = ws.cell(row=i, column=col_idx)
-                                if cell.value:
-                                    cell.hyperlink = yf_url
-                                    cell.style = "Hyperlink"
-
-        # Call/Put Skew Conditional Formatting
-        if ratio_col:
-            for i in range(2, ws.max_row + 1):
-                cell = ws.cell(row=i, column=ratio_col)
-                # Check value from DF (since Excel formula isn't evaluated by openpyxl reading)
-                if 0 <= i-2 < len(df):
-                    row_data = df.iloc[i-2]
-                    val = row_data.get("Call/Put Skew")
-                    # Should be a number.
-                    if val is not None and isinstance(val, (int, float)):
-                        if val > 1.2:
-                            cell.fill = openpyxl.styles.PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid") # Green
-                        elif val < 0.75:
-                            cell.fill = openpyxl.styles.PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid") # Red
-
-        # SMA Conditional Formatting
-        for w in ma_windows:
-            col_name = f"MA_{w}"
-            if col_name in df.columns:
-                col_idx = df.columns.get_loc(col_name) + 1
-                for i in range(2, ws.max_row + 1):
-                    avg_cell = ws.cell(row=i, column=col_idx)
-                    price_col_idx = df.columns.get_loc("Current Price") + 1 if "Current Price" in df.columns else None
-                    if price_col_idx:
-                        price_cell = ws.cell(row=i, column=price_col_idx)
-                        try:
-                            avg = avg_cell.value
-                            price = price_cell.value
-                            if avg is not None and price is not None:
-                                if price <= avg * (1 - self.highlight_threshold):
-                                    avg_cell.fill = openpyxl.styles.PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")  # green
-                                elif price >= avg * (1 + self.highlight_threshold):
-                                    avg_cell.fill = openpyxl.styles.PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")  # red
-                        except Exception:
-                            pass
-            
-            # Format highlight column as percentage
-            hl_col_name = f"MA_{w}_highlight"
-            if hl_col_name in df.columns:
-                hl_col_idx = df.columns.get_loc(hl_col_name) + 1
-                for i in range(2, ws.max_row + 1):
-                    cell = ws.cell(row=i, column=hl_col_idx)
-                    cell.number_format = '0.0%'
-
-        # EMA Color Coding (20 day)
-        # Price > 0.5% color green, < -0.5% RED
-        if "EMA_20" in df.columns:
-            ema_col_idx = df.columns.get_loc("EMA_20") + 1
-            hl_col_name = "EMA_20_highlight"
-            
-            for i in range(2, ws.max_row + 1):
-                cell = ws.cell(row=i, column=ema_col_idx)
-                if 0 <= i-2 < len(df) and hl_col_name in df.columns:
-                     val = df.iloc[i-2][hl_col_name]
-                     if val is not None:
-                         if val > 0.005: # > 0.5%
-                             cell.fill = openpyxl.styles.PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid") # Green
-                         elif val < -0.005: # < -0.5%
-                             cell.fill = openpyxl.styles.PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid") # Red
-
-        # HMA Color Coding (20 day)
-        # Price > HMA Green, Price < HMA Red
-        if "HMA_20" in df.columns:
-            hma_col_idx = df.columns.get_loc("HMA_20") + 1
-            hl_col_name = "HMA_20_highlight" # Price - HMA
-            
-            for i in range(2, ws.max_row + 1):
-                cell = ws.cell(row=i, column=hma_col_idx)
-                if 0 <= i-2 < len(df) and hl_col_name in df.columns:
-                     val = df.iloc[i-2][hl_col_name]
-                     if val is not None:
-                         if val > 0:
-                             cell.fill = openpyxl.styles.PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid") # Green
-                         elif val < 0:
-                             cell.fill = openpyxl.styles.PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid") # Red
-        
-        # TSMOM Color Coding (60 day)
-        # Green > 2%, Red < -2%
-        if "TSMOM_60" in df.columns:
-             tsmom_col_idx = df.columns.get_loc("TSMOM_60") + 1
-             # Format as percentage
-             for i in range(2, ws.max_row + 1):
-                cell = ws.cell(row=i, column=tsmom_col_idx)
-                cell.number_format = '0.0%'
-                if 0 <= i-2 < len(df):
-                    val = df.iloc[i-2]["TSMOM_60"] # TSMOM_60_highlight is same as TSMOM_60
-                    if val is not None:
-                        if val > 0.02: # > 2%
-                            cell.fill = openpyxl.styles.PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid") # Green
-                        elif val < -0.02: # < -2%
-                            cell.fill = openpyxl.styles.PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid") # Red
-
-        for cell in ws[1]:
+        header = []
+        for name in columns:
+            cell = WriteOnlyCell(ws, value=name)
             cell.font = Font(bold=True)
             cell.alignment = Alignment(wrap_text=True)
-
-        ws.freeze_panes = "A2"  # Freeze the first row
+            header.append(cell)
+        ws.append(header)
+
+        for i, values in enumerate(df.itertuples(index=False, name=None)):
+            converted = [self.excel_cell_value(v) for v in values]
+            row = dict(zip(columns, converted))
+            out = []
+            for name, value in zip(columns, converted):
+                if not (value or name in percent_cols or name in fill_cols):
+                    out.append(value)
+                    continue
+                cell = WriteOnlyCell(ws, value=value)
+                url = links[name][i] if value and name in links else None
+                if url:
+                    cell.hyperlink = url
+                    cell.style = "Hyperlink"
+                if name in percent_cols:
+                    cell.number_format = "0.0%"
+                if name in fill_cols:
+                    color = self.excel_fill_for(name, value, row)
+                    if color:
+                        cell.fill = fills[color]
+                out.append(cell)
+            ws.append(out)
 
         wb.save(self.filename)
 
@@ -1190,6 +1938,10 @@ class StockLiveComparison:
         This method preserves required detail payload fields (for modal reliability)
         when a row originated from spreadsheet merge data that omits nested fields
         such as `profile`.
+
+        Existing `stock_data` docs are prefetched with one `$in` query, merged in
+        memory, and each collection is written with one unordered `bulk_write`.
+        Failed rows are logged per ticker.
         """
         try:
             db = AiStockDatabase(collection_name="stock_data")
@@ -1200,6 +1952,20 @@ class StockLiveComparison:
             records = df.to_dict(orient="records")
             required = self.required_detail_fields()
             now_ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+            tickers = []
+            for record in records:
+                ticker = str(record.get("Ticker") or "").strip().upper()
+                if ticker:
+                    tickers.append(ticker)
+            existing_by_ticker = {}
+            if tickers:
+                for doc in db.collection.find({"Ticker": {"$in": list(dict.fromkeys(tickers))}}):
+                    existing_by_ticker[doc.get("Ticker")] = doc
+
+            stock_rows = []
+            snapshot_rows = []
+            history_rows = []
             for record in records:
                 try:
                     ticker = str(record.get("Ticker") or "").strip().upper()
@@ -1208,20 +1974,17 @@ class StockLiveComparison:
 
                     # Spreadsheet merge rows can omit nested detail fields; preserve
                     # existing canonical values when incoming row is sparse.
-                    existing = db.collection.find_one({"Ticker": ticker}) or {}
+                    existing = existing_by_ticker.get(ticker) or {}
                     merged = self.merge_detail_record(record, existing)
                     merged["Ticker"] = ticker
                     merged["_last_persisted_at"] = now_ts
-                    db.upsert_stock_record(merged, key_fields=("Ticker",))
+                    stock_rows.append(merged)
                     snapshot_record = self.build_instrument_snapshot_record(merged, default_ts=now_ts)
                     if snapshot_record:
-                        snapshot_db.upsert_stock_record(snapshot_record, key_fields=("instrument_key",))
+                        snapshot_rows.append(snapshot_record)
                     history_record = self.build_price_history_record(merged, default_ts=now_ts)
                     if history_record:
-                        price_history_db.upsert_stock_record(
-                            history_record,
-                            key_fields=("instrument_key", "timestamp", "source"),
-                        )
+                        history_rows.append(history_record)
 
                     missing = self.missing_required_detail_fields(merged, required_fields=required)
                     if missing:
@@ -1232,6 +1995,35 @@ class StockLiveComparison:
                         )
                 except Exception as e:
                     logging.error(f"Error upserting record for {record.get('Ticker')}: {e}")
+
+            writes = [
+                (db, stock_rows, ("Ticker",), "Ticker"),
+                (snapshot_db, snapshot_rows, ("instrument_key",), "symbol"),
+            ]
+            if history_rows and is_timeseries_collection(price_history_db.db):
+                # Time-series collections are append-only: insert rows not yet stored.
+                try:
+                    insert_new_price_history_rows(price_history_db.collection, history_rows)
+                except Exception as e:
+                    logging.error(f"Error inserting {price_history_db.collection_name}: {e}")
+            else:
+                writes.append(
+                    (price_history_db, history_rows, ("instrument_key", "timestamp", "source"), "instrument_key_legacy")
+                )
+            for target, rows, key_fields, label_field in writes:
+                if not rows:
+                    continue
+                try:
+                    failures = target.bulk_upsert_records(rows, key_fields=key_fields)
+                except Exception as e:
+                    logging.error(f"Error bulk upserting {target.collection_name}: {e}")
+                    continue
+                for failed_record, error in failures:
+                    logging.error(
+                        f"Error upserting record for {(failed_record or {}).get(label_field)} "
+                        f"into {target.collection_name}: {error}"
+                    )
+            bump_response_cache_version(db.db, STOCKS)
             logging.info(f"Upserted {len(records)} records to MongoDB.")
         except Exception as e:
             logging.error(f"Error connecting to MongoDB: {e}")
@@ -1241,9 +2033,7 @@ class StockLiveComparison:
         if cls._price_history_indexes_ensured:
             return
         try:
-            collection.create_index([("instrument_key", 1), ("timestamp", -1)])
-            collection.create_index([("source", 1), ("timestamp", -1)])
-            collection.create_index([("timestamp", -1)])
+            ensure_registered_indexes(collection, "instrument_price_history")
             cls._price_history_indexes_ensured = True
         except Exception as exc:
             logging.warning("Unable to ensure instrument_price_history indexes: %s", exc)
@@ -1253,8 +2043,7 @@ class StockLiveComparison:
         if cls._instrument_snapshot_indexes_ensured:
             return
         try:
-            collection.create_index([("instrument_key", 1)], unique=True)
-            collection.create_index([("symbol", 1), ("instrument_type", 1)])
+            ensure_registered_indexes(collection, "instrument_snapshot")
             cls._instrument_snapshot_indexes_ensured = True
         except Exception as exc:
             logging.warning("Unable to ensure instrument_snapshot indexes: %s", exc)
@@ -1296,6 +2085,7 @@ class StockLiveComparison:
             "instrument_key_legacy": ticker,
             "instrument_type": "STK",
             "timestamp": str(timestamp),
+            "ts": parse_history_timestamp(timestamp),
             "price": (record or {}).get("Current Price"),
             "day_change_pct": (record or {}).get("1D % Change"),
             "source": "stock_live_comparison",
@@ -1443,8 +2233,18 @@ class StockLiveComparison:
             "failed_tickers": failed_tickers,
         }
 
-    def run(self, force_new_file=False, allow_create_if_missing=True):
+    def run(self, force_new_file=False, allow_create_if_missing=True, shard_size=None, shard_workers=1):
+        """Refresh stale tickers, then write one report, one Mongo upsert and one JSON export.
+
+        With ``shard_size``/``shard_workers`` the fetch stage runs shards
+        concurrently (see ``fetch_data_sharded``); everything after the fetch
+        still happens once.
+        """
         self.now = datetime.now()
+        self.reset_option_chain_memo()
+        self.indicator_rows = {}
+        self.history_batch_metrics = []
+        self.prune_checkpoints()
         self.filename = self.select_output_report_file(
             force_new_file=force_new_file,
             allow_create_if_missing=allow_create_if_missing,
@@ -1461,15 +2261,12 @@ class StockLiveComparison:
             except OSError:
                 file_size = 0
             logging.warning(
-                "Latest spreadsheet %s (%s bytes) failed viability guard; using %s as merge source.",
+                "Latest spreadsheet %s (%s bytes) failed viability guard; using %s as fallback merge source.",
                 self.latest_file,
                 file_size,
                 self.latest_viable_file,
             )
         
-        final_records = []
-        put_col = None
-        call_col = None
         tickers_to_fetch = []
         fetched_summary = {
             "fetched_records_count": 0,
@@ -1477,46 +2274,48 @@ class StockLiveComparison:
             "failed_fetch_count": 0,
             "failed_tickers": [],
         }
-        
-        if self.latest_viable_file:
+
+        # stock_data is the source of truth; the spreadsheet is output only.
+        # The latest viable report is read only when Mongo is unreachable.
+        existing_source = "mongo"
+        loaded = self.load_existing_records_from_mongo()
+        if loaded is not None:
+            tickers_to_fetch, existing_records = loaded
+        elif self.latest_viable_file:
+            existing_source = "excel"
             df_existing = pd.read_excel(self.latest_viable_file)
             if "Last Update" not in df_existing.columns:
                 df_existing["Last Update"] = None
-            
-            missing_or_old = self.get_missing_or_outdated_tickers(df_existing)
-            
-            # Start with existing records converted to list of dicts
             existing_records = df_existing.to_dict(orient='records')
-            
-            if not missing_or_old:
-                logging.info("All tickers are up to date.")
-                final_records = existing_records
-                put_col = df_existing.columns.get_loc("Annual Yield Put Prem") + 1
-                call_col = df_existing.columns.get_loc("Annual Yield Call Prem") + 1
-            else:
-                tickers_to_fetch = missing_or_old
-                logging.info(f"Fetching data for {len(tickers_to_fetch)} tickers: {tickers_to_fetch}")
-                
-                # Filter out records that are about to be updated
-                # We keep only records for tickers NOT in tickers_to_fetch
-                preserved_records = [
-                    r for r in existing_records 
-                    if r.get("Ticker") not in tickers_to_fetch
-                ]
-                
-                fetched_records = self.fetch_data(tickers_to_fetch)
-                logging.info(f"fetched: {len(fetched_records)} records")
-                fetched_summary = self.summarize_fetched_records(fetched_records)
-                
-                # Combine preserved existing records with new fetched records
-                final_records = preserved_records + fetched_records
-                
+            tickers_to_fetch = self.get_stale_tickers(existing_records)
         else:
-            logging.info("No existing spreadsheet found. Fetching all data.")
-            tickers_to_fetch = self.tickers
-            fetched_records = self.fetch_data(tickers_to_fetch)
+            existing_source = "none"
+            existing_records = []
+            tickers_to_fetch = list(self.tickers)
+
+        if not tickers_to_fetch:
+            logging.info("All tickers are up to date.")
+            final_records = existing_records
+        else:
+            logging.info(f"Fetching data for {len(tickers_to_fetch)} tickers ({existing_source} source): {tickers_to_fetch}")
+
+            # Keep only records for tickers NOT about to be updated
+            fetch_set = set(tickers_to_fetch)
+            preserved_records = [
+                r for r in existing_records
+                if r.get("Ticker") not in fetch_set
+            ]
+
+            fetched_records = self.fetch_data_sharded(
+                tickers_to_fetch,
+                shard_size=shard_size,
+                shard_workers=shard_workers,
+            )
+            logging.info(f"fetched: {len(fetched_records)} records")
             fetched_summary = self.summarize_fetched_records(fetched_records)
-            final_records = fetched_records
+
+            # Combine preserved existing records with new fetched records
+            final_records = preserved_records + fetched_records
 
         # Create DataFrame from final combined list
         df = pd.DataFrame(final_records)
@@ -1542,7 +2341,7 @@ class StockLiveComparison:
         # Ensure we have column indices for formatting
         # If we didn't get them from existing DF, calculate them now
         # Note: add_ratio_column handles adding columns if missing
-        df, put_col, call_col = self.add_ratio_column(df)
+        df, _, _ = self.add_ratio_column(df)
 
         if self.is_suspicious_record_count(len(df)):
             raise RuntimeError(
@@ -1550,15 +2349,23 @@ class StockLiveComparison:
                 "Skipping save to avoid overwriting a healthy report with truncated data."
             )
             
-        self.save_to_excel(df, put_col, call_col)
-        self.upsert_to_mongo(df)
+        self.save_to_excel(df)
+        if existing_source == "mongo":
+            # Preserved rows came from stock_data; only write what was refetched.
+            refreshed = df[df["Ticker"].isin(set(tickers_to_fetch))] if "Ticker" in df.columns else df
+            if not refreshed.empty:
+                self.upsert_to_mongo(refreshed)
+        else:
+            self.upsert_to_mongo(df)
+        # Results are persisted; the fetch journal is no longer needed.
+        self.clear_checkpoint()
         
-        # Auto-export backup to JSON for git versioning
+        # Incremental backup: only rows persisted since the last watermark.
         try:
-            logging.info("Auto-exporting MongoDB data to JSON backup...")
-            export_data()
+            logging.info("Writing incremental MongoDB backup...")
+            run_incremental_backup()
         except Exception as e:
-            logging.error(f"Failed to auto-export JSON backup: {e}")
+            logging.error(f"Failed to write incremental backup: {e}")
         
         logging.info(f"Spreadsheet generated: {self.filename}")
         requested_count = len(self.tickers or [])
@@ -1573,6 +2380,12 @@ class StockLiveComparison:
             "stale_candidate_count": stale_candidate_count,
             "stale_hit_ratio": stale_hit_ratio,
             "rows_written": len(df),
+            "existing_source": existing_source,
+            "option_chain_cache_hits": self.option_chain_cache_hits,
+            "option_chain_cache_misses": self.option_chain_cache_misses,
+            "checkpoint_resumed_count": self.checkpoint_resumed_count,
+            **self.rate_controller_snapshot(),
+            **self.history_batch_summary(),
             **fetched_summary,
         }
 
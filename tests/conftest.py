@@ -54,3 +54,37 @@ def disable_scheduler(monkeypatch):
     monkeypatch.setattr("app.main.start_scheduler", lambda: None)
     monkeypatch.setattr("app.main.stop_scheduler", lambda: None)
 
+
+@pytest.fixture(autouse=True)
+def disable_response_cache(monkeypatch):
+    """Route tests swap Mongo mocks between calls; response cache tests opt back in."""
+    from app.config import settings
+    from app.services.response_cache import reset_response_cache
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", False)
+    reset_response_cache()
+    yield
+    reset_response_cache()
+
+
+@pytest.fixture(autouse=True)
+def isolate_history_cache(monkeypatch, tmp_path_factory):
+    """Keep StockLiveComparison's yfinance history cache out of data/yf_history."""
+    monkeypatch.setattr("stock_live_comparison.DEFAULT_HISTORY_CACHE_DIR", tmp_path_factory.mktemp("yf_history"))
+
+
+@pytest.fixture(autouse=True)
+def reset_mongo_clients():
+    """Drop shared clients so no test reuses another test's patched MongoClient."""
+    from app import database
+    database.close_mongo_clients()
+    yield
+    database.close_mongo_clients()
+
+
+@pytest.fixture(autouse=True)
+def reset_price_history_collection_cache():
+    """Tests swap databases freely; never reuse a cached time-series answer."""
+    from app.services.price_history_store import reset_timeseries_cache
+    reset_timeseries_cache()
+    yield
+    reset_timeseries_cache()
@@ -52,13 +52,13 @@ def test_get_open_orders_returns_active_rows_with_market_context():
                 "filled_quantity": 10,
             },
         ]
-        mock_db.stock_data.find_one.return_value = {
+        mock_db.stock_data.find.return_value = [{
             "Ticker": "AMD",
             "Current Price": 188.23,
             "1D % Change": 1.42,
             "Call/Put Skew": 2.11,
             "TSMOM_60": 0.33,
-        }
+        }]
 
         payload = asyncio.run(
             routes.get_open_orders(current_user=User(username="u", role="admin", disabled=False))
@@ -108,7 +108,7 @@ def test_get_open_orders_active_only_false_includes_filled_rows():
                 "filled_quantity": 10,
             }
         ]
-        mock_db.stock_data.find_one.return_value = {"Ticker": "AAPL", "Current Price": 200.0}
+        mock_db.stock_data.find.return_value = [{"Ticker": "AAPL", "Current Price": 200.0}]
 
         payload = asyncio.run(
             routes.get_open_orders(
@@ -201,7 +201,7 @@ def test_get_open_orders_hides_inactive_status_rows_by_default():
                 "filled_quantity": 10,
             }
         ]
-        mock_db.stock_data.find_one.return_value = {"Ticker": "AAPL", "Current Price": 200.0}
+        mock_db.stock_data.find.return_value = [{"Ticker": "AAPL", "Current Price": 200.0}]
 
         payload = asyncio.run(
             routes.get_open_orders(current_user=User(username="u", role="admin", disabled=False))
@@ -281,10 +281,10 @@ def test_get_open_orders_retains_roll_like_paired_rows_for_same_underlying():
                 "total_quantity": 1,
             },
         ]
-        mock_db.stock_data.find_one.return_value = {
+        mock_db.stock_data.find.return_value = [{
             "Ticker": "AMD",
             "Current Price": 188.23,
-        }
+        }]
 
         payload = asyncio.run(
             routes.get_open_orders(current_user=User(username="u", role="admin", disabled=False))
@@ -429,10 +429,10 @@ def test_get_open_orders_bag_rows_include_combo_legs_in_api_response():
                 "combo_legs_descrip": "BUY 1 AMD 18APR26 115C / SELL 1 AMD 16MAY26 120C",
             },
         ]
-        mock_db.stock_data.find_one.return_value = {
+        mock_db.stock_data.find.return_value = [{
             "Ticker": "AMD",
             "Current Price": 170.00,
-        }
+        }]
 
         payload = asyncio.run(
             routes.get_open_orders(
@@ -0,0 +1,18 @@
+import asyncio
+from unittest.mock import MagicMock
+
+from app import database
+from app.services.async_repository import AsyncMongoRepository
+
+
+def test_injected_factory_uses_threaded_pymongo_path():
+    factory = MagicMock()
+    db = factory.return_value.get_default_database.return_value
+    db.__getitem__.return_value.find.return_value = iter([{"Ticker": "AAA"}])
+
+    repo = AsyncMongoRepository(factory=factory)
+    rows = asyncio.run(repo.list_stock_data())
+
+    assert rows == [{"Ticker": "AAA"}]
+    db.__getitem__.assert_called_with("stock_data")
+    db.__getitem__.return_value.find.assert_called_with({}, {"_id": 0})
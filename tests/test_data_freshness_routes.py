@@ -3,8 +3,9 @@ import math
 from unittest.mock import patch
 from pydantic import ValidationError
 
-from fastapi import BackgroundTasks
+from fastapi import BackgroundTasks, HTTPException
 import pandas as pd
+import pytest
 
 from app.api import routes
 from app.models import User
@@ -264,6 +265,32 @@ def test_get_ticker_price_history_clamps_limit():
         routes.get_ticker_price_history("AAPL", admin, limit=999999)
 
     mock_cursor.sort.return_value.limit.assert_called_once_with(5000)
+    # Not a time-series collection (legacy rows may lack ts): sort on timestamp.
+    mock_cursor.sort.assert_called_once_with([("timestamp", -1)])
+
+
+def test_get_ticker_price_history_returns_downsampled_bars_for_interval():
+    admin = User(username="u", role="admin", disabled=False)
+    bars = [{"timestamp": "2026-04-04 10:00:00", "close": 201.0, "price": 201.0}]
+    with patch("app.api.routes.MongoClient") as mock_client, patch(
+        "app.api.routes.fetch_downsampled_history", return_value=bars
+    ) as mock_fetch:
+        mock_db = mock_client.return_value.get_default_database.return_value
+        mock_db.stock_data.find_one.return_value = {"Ticker": "AAPL"}
+
+        payload = routes.get_ticker_price_history("AAPL", admin, limit=100, interval="5m", days=30)
+
+    assert payload["interval"] == "5m"
+    assert payload["history"] == bars
+    args = mock_fetch.call_args.args
+    assert args[1] == ["STK:AAPL", "AAPL"] and args[2:] == ("5m", 30, 100)
+
+
+def test_get_ticker_price_history_rejects_unknown_interval():
+    admin = User(username="u", role="admin", disabled=False)
+    with patch("app.api.routes.MongoClient"), pytest.raises(HTTPException) as exc:
+        routes.get_ticker_price_history("AAPL", admin, interval="7m")
+    assert exc.value.status_code == 400
 
 
 def test_analyze_ticker_smart_rolls_include_meta_returns_freshness_payload():
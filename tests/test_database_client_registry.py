@@ -0,0 +1,60 @@
+from unittest.mock import MagicMock
+
+from app import database
+from app.config import settings
+
+
+def test_get_mongo_client_reuses_one_client_per_factory():
+    factory = MagicMock()
+    first = database.get_mongo_client(factory)
+    second = database.get_mongo_client(factory)
+
+    assert first is second
+    factory.assert_called_once()
+    args, kwargs = factory.call_args
+    assert args == (settings.MONGO_URI,)
+    assert kwargs["maxPoolSize"] == settings.MONGO_MAX_POOL_SIZE
+    assert kwargs["serverSelectionTimeoutMS"] == settings.MONGO_SERVER_SELECTION_TIMEOUT_MS
+
+
+def test_get_mongo_client_recreates_client_in_forked_child(monkeypatch):
+    factory = MagicMock(side_effect=lambda *a, **k: MagicMock())
+    parent_client = database.get_mongo_client(factory)
+
+    monkeypatch.setattr(database, "_clients_pid", -1)
+    child_client = database.get_mongo_client(factory)
+
+    assert child_client is not parent_client
+    parent_client.close.assert_not_called()
+
+
+def test_close_mongo_clients_closes_and_forgets():
+    factory = MagicMock()
+    client = database.get_mongo_client(factory)
+    database.close_mongo_clients()
+
+    client.close.assert_called_once()
+    database.get_mongo_client(factory)
+    assert factory.call_count == 2
+
+
+def test_get_db_dependency_yields_shared_database(monkeypatch):
+    factory = MagicMock()
+    monkeypatch.setattr(database, "MongoClient", factory)
+
+    db = next(database.get_db())
+
+    assert db is factory.return_value.get_default_database.return_value
+    factory.return_value.get_default_database.assert_called_with("stock_analysis")
+    factory.return_value.close.assert_not_called()
+
+
+def test_utils_mongo_client_returns_the_shared_client(monkeypatch):
+    from app.utils import mongo_client
+
+    factory = MagicMock()
+    monkeypatch.setattr(mongo_client, "MongoClient", factory)
+
+    assert mongo_client.get_mongo_client() is mongo_client.get_mongo_client()
+    assert mongo_client.get_mongo_client() is database.get_mongo_client(factory)
+    factory.assert_called_once()
@@ -93,3 +93,30 @@ def test_export_data_bson_serialization(mock_mongo, tmp_path):
     # Check that ObjectId was serialized (usually becomes specific dict structure or string depending on json_util)
     assert '$oid' in str(content) or '_id' in data[0]
 
+
+def test_export_data_streams_ndjson_gzip_in_chunks(mock_mongo, tmp_path):
+    """NDJSON(.gz) output holds one document per line, written chunk by chunk."""
+    import gzip
+    from bson import json_util
+
+    mock_mongo.insert_many([{"Ticker": f"T{i}", "Price": float(i)} for i in range(5)])
+    output_file = tmp_path / "backup.ndjson.gz"
+
+    export_data(output_file=str(output_file), chunk_size=2)
+
+    with gzip.open(output_file, "rt", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert [json_util.loads(line)["Ticker"] for line in lines] == [f"T{i}" for i in range(5)]
+
+
+def test_export_collections_writes_one_file_per_collection(tmp_path):
+    from export_mongo import export_collections
+
+    db = mongomock.MongoClient().db
+    db.stock_data.insert_many([{"Ticker": "AAPL"}, {"Ticker": "MSFT"}])
+    db.juicy_opportunities.insert_one({"symbol": "AAPL"})
+
+    counts = export_collections(db, ["stock_data", "juicy_opportunities"], str(tmp_path / "out"), compress=False)
+
+    assert counts == {"stock_data": 2, "juicy_opportunities": 1}
+    assert len((tmp_path / "out" / "stock_data.ndjson").read_text().splitlines()) == 2
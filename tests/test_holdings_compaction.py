@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta, timezone
+
+import mongomock
+
+from app.services.holdings_compaction import (
+    coerce_retention_config,
+    compact_tws_holdings,
+    diff_snapshot_rows,
+    select_snapshots_to_drop,
+)
+from app.services.holdings_latest import publish_holdings_snapshot
+
+NOW = datetime(2026, 3, 10, 12, 0, tzinfo=timezone.utc)
+
+
+def _snap(minutes_ago):
+    date = NOW - timedelta(minutes=minutes_ago)
+    return {"snapshot_id": f"tws_{minutes_ago}", "date": date}
+
+
+def test_select_keeps_raw_window_last_per_hour_and_eod():
+    config = coerce_retention_config({"raw_retention_minutes": 60, "interval_retention_days": 1})
+    snaps = [
+        _snap(10),  # raw window
+        _snap(150), _snap(149.5), _snap(125),  # 09:30, 09:30:30, 09:55 -> keep 09:55
+        _snap(60 * 24 * 3), _snap(60 * 24 * 3 - 30),  # three days ago -> keep later one (EOD bucket)
+    ]
+
+    dropped = {s["snapshot_id"] for s in select_snapshots_to_drop(snaps, NOW, config)}
+
+    assert dropped == {"tws_150", "tws_149.5", f"tws_{60 * 24 * 3}"}
+
+
+def test_select_drops_eod_snapshots_past_eod_retention():
+    config = coerce_retention_config({"interval_retention_days": 1, "eod_retention_days": 2})
+    dropped = select_snapshots_to_drop([_snap(60 * 24 * 5)], NOW, config)
+    assert [s["snapshot_id"] for s in dropped] == [f"tws_{60 * 24 * 5}"]
+
+
+def test_coerce_retention_config_rejects_bad_values():
+    config = coerce_retention_config({"archive_mode": "zip", "keep_interval_minutes": "x", "enabled": "off"})
+    assert config["archive_mode"] == "delete"
+    assert config["keep_interval_minutes"] == 60
+    assert config["enabled"] is False
+
+
+def test_diff_snapshot_rows_ignores_volatile_fields():
+    base = [
+        {"position_key": "A", "quantity": 1, "date": 1, "snapshot_id": "s1"},
+        {"position_key": "B", "quantity": 2, "date": 1, "snapshot_id": "s1"},
+    ]
+    rows = [
+        {"position_key": "A", "quantity": 1, "date": 2, "snapshot_id": "s2"},
+        {"position_key": "C", "quantity": 5, "date": 2, "snapshot_id": "s2"},
+    ]
+    diff = diff_snapshot_rows(base, rows)
+    assert diff == {"upserts": [{"position_key": "C", "quantity": 5}], "removed": ["B"]}
+
+
+def test_compact_tws_holdings_deletes_dropped_snapshots_and_archives_diffs():
+    db = mongomock.MongoClient().get_database("stock_analysis")
+    for snap, qty in [(_snap(200), 1), (_snap(190), 2), (_snap(5), 2)]:
+        db.ibkr_holdings.insert_one(
+            {"snapshot_id": snap["snapshot_id"], "date": snap["date"].replace(tzinfo=None), "source": "tws",
+             "position_key": "A", "quantity": qty}
+        )
+    db.ibkr_holdings.insert_one({"snapshot_id": "flex_1", "date": NOW.replace(tzinfo=None) - timedelta(days=1), "source": "flex"})
+    publish_holdings_snapshot(db, "tws_5", "2026-03-10", (NOW - timedelta(minutes=5)).replace(tzinfo=None), source="tws")
+
+    summary = compact_tws_holdings(db, NOW, {"archive_mode": "diff"})
+
+    assert summary["dropped"] == 1
+    assert summary["deleted_rows"] == 1
+    remaining = sorted(db.ibkr_holdings.distinct("snapshot_id"))
+    assert remaining == ["flex_1", "tws_190", "tws_5"]
+    diff = db.ibkr_holdings_diffs.find_one({"_id": "tws_200"})
+    assert diff["base_snapshot_id"] is None
+    assert diff["upserts"][0]["quantity"] == 1
+
+
+def _insert_tws(db, snap, qty=1):
+    db.ibkr_holdings.insert_one(
+        {"snapshot_id": snap["snapshot_id"], "date": snap["date"].replace(tzinfo=None), "source": "tws",
+         "position_key": "A", "quantity": qty}
+    )
+
+
+def test_compact_tws_holdings_only_loads_dropped_snapshots_and_predecessors(monkeypatch):
+    from app.services import holdings_compaction
+
+    db = mongomock.MongoClient().get_database("stock_analysis")
+    # Two settled EOD keepers, then an hour with two snapshots (one dropped).
+    for snap in [_snap(60 * 24 * 3), _snap(60 * 24 * 2), _snap(200), _snap(190)]:
+        _insert_tws(db, snap)
+    loaded = []
+    real_rows = holdings_compaction._snapshot_rows
+    monkeypatch.setattr(
+        holdings_compaction, "_snapshot_rows", lambda db, sid: loaded.append(sid) or real_rows(db, sid)
+    )
+
+    summary = compact_tws_holdings(db, NOW, {"archive_mode": "diff"})
+
+    assert summary["dropped"] == 1
+    assert loaded == [f"tws_{60 * 24 * 2}", "tws_200"]
+    assert db.ibkr_holdings_diffs.find_one({"_id": "tws_200"})["base_snapshot_id"] == f"tws_{60 * 24 * 2}"
+
+
+def test_compact_tws_holdings_skips_history_before_the_watermark():
+    db = mongomock.MongoClient().get_database("stock_analysis")
+    for snap in [_snap(60 * 24 * 30), _snap(60 * 24 * 20), _snap(200), _snap(190)]:
+        _insert_tws(db, snap)
+
+    first = compact_tws_holdings(db, NOW, {})
+    second = compact_tws_holdings(db, NOW + timedelta(hours=1), {})
+
+    assert first["scanned"] == 4 and first["dropped"] == 1
+    # Days older than the interval window are settled and no longer scanned.
+    assert second["scanned"] == 1
+    state = db.system_config.find_one({"_id": "tws_holdings_compaction_state"})
+    assert state["compacted_before"] == datetime(2026, 3, 3)
+
+
+def test_compact_tws_holdings_still_expires_eod_snapshots_before_the_watermark():
+    db = mongomock.MongoClient().get_database("stock_analysis")
+    _insert_tws(db, _snap(60 * 24 * 30))
+    compact_tws_holdings(db, NOW, {})
+
+    summary = compact_tws_holdings(db, NOW, {"eod_retention_days": 10})
+
+    assert summary["dropped"] == 1
+    assert db.ibkr_holdings.count_documents({}) == 0
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+import mongomock
+
+from app.services.holdings_latest import (
+    clear_holdings_pointers,
+    get_latest_holdings,
+    holdings_snapshot_query,
+    publish_holdings_snapshot,
+    touch_holdings_snapshot,
+)
+
+
+def _db():
+    return mongomock.MongoClient().get_database("stock_analysis")
+
+
+def test_publish_moves_latest_and_source_pointers_forward_only():
+    db = _db()
+    t0 = datetime(2026, 1, 5, 15, 0)
+    publish_holdings_snapshot(db, "tws_1", "2026-01-05", t0, source="tws", position_count=3)
+    publish_holdings_snapshot(db, "flex_old", "2026-01-04", t0 - timedelta(days=1), source="flex")
+
+    latest = get_latest_holdings(db)
+    assert latest["snapshot_id"] == "tws_1"
+    assert latest["position_count"] == 3
+    assert get_latest_holdings(db, "tws")["snapshot_id"] == "tws_1"
+    assert get_latest_holdings(db, "flex")["snapshot_id"] == "flex_old"
+
+    publish_holdings_snapshot(db, "tws_2", "2026-01-05", t0 + timedelta(seconds=30), source="tws")
+    assert get_latest_holdings(db)["snapshot_id"] == "tws_2"
+
+
+def test_heartbeat_repoints_latest_at_unchanged_tws_snapshot_after_flex_publish():
+    db = _db()
+    t0 = datetime(2026, 1, 5, 15, 0)
+    publish_holdings_snapshot(db, "tws_1", "2026-01-05", t0, source="tws", position_count=3)
+    publish_holdings_snapshot(db, "flex_1", "2026-01-05", t0 + timedelta(minutes=5), source="flex")
+    assert get_latest_holdings(db)["snapshot_id"] == "flex_1"
+
+    heartbeat = t0 + timedelta(minutes=6)
+    touch_holdings_snapshot(db, get_latest_holdings(db, "tws"), heartbeat)
+
+    latest = get_latest_holdings(db)
+    assert latest["snapshot_id"] == "tws_1"
+    assert latest["source"] == "tws"
+    assert latest["position_count"] == 3
+    assert latest["last_tws_update"] == heartbeat
+    assert get_latest_holdings(db, "tws")["last_tws_update"] == heartbeat
+    assert get_latest_holdings(db, "flex")["snapshot_id"] == "flex_1"
+
+    # A snapshot dated after the heartbeat keeps ``latest``.
+    publish_holdings_snapshot(db, "flex_2", "2026-01-05", t0 + timedelta(hours=1), source="flex")
+    touch_holdings_snapshot(db, get_latest_holdings(db, "tws"), t0 + timedelta(minutes=7))
+    assert get_latest_holdings(db)["snapshot_id"] == "flex_2"
+
+
+def test_get_latest_holdings_falls_back_to_scan_and_backfills_pointer():
+    db = _db()
+    now = datetime(2026, 1, 5, 15, 0)
+    db.ibkr_holdings.insert_many([
+        {"snapshot_id": "a", "report_date": "2026-01-04", "date": now - timedelta(days=1), "source": "flex"},
+        {"snapshot_id": "b", "report_date": "2026-01-05", "date": now, "source": "tws"},
+        {"report_date": "2026-01-03", "date": now - timedelta(days=2)},
+    ])
+
+    assert get_latest_holdings(db)["snapshot_id"] == "b"
+    assert db.holdings_latest.find_one({"_id": "latest"})["snapshot_id"] == "b"
+    assert get_latest_holdings(db, "flex")["snapshot_id"] == "a"
+
+    clear_holdings_pointers(db)
+    assert db.holdings_latest.count_documents({}) == 0
+
+
+def test_get_latest_holdings_returns_none_without_holdings():
+    assert get_latest_holdings(_db()) is None
+
+
+def test_holdings_snapshot_query_prefers_snapshot_id():
+    assert holdings_snapshot_query({"snapshot_id": "s", "report_date": "d"}) == {"snapshot_id": "s"}
+    assert holdings_snapshot_query({"snapshot_id": None, "report_date": "d"}) == {"report_date": "d"}
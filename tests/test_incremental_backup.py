@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta, timezone
+
+import mongomock
+import pytest
+
+from incremental_backup import (
+    chain_for_point_in_time,
+    load_backup_manifest,
+    reconstruct_state,
+    run_incremental_backup,
+    write_point_in_time,
+)
+from restore_mongo import iter_backup_documents
+
+T0 = datetime(2026, 4, 3, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def collection():
+    return mongomock.MongoClient().db.stock_data
+
+
+def _persist(collection, ticker, price, persisted_at):
+    collection.update_one(
+        {"Ticker": ticker},
+        {"$set": {"Ticker": ticker, "Price": price, "_last_persisted_at": persisted_at}},
+        upsert=True,
+    )
+
+
+def test_first_backup_is_base_then_deltas_hold_only_changed_rows(collection, tmp_path):
+    _persist(collection, "AAPL", 1.0, "2026-04-03 12:00:00")
+    _persist(collection, "MSFT", 2.0, "2026-04-03 12:00:00")
+
+    base = run_incremental_backup(collection, str(tmp_path), now=T0)
+    _persist(collection, "AAPL", 1.5, "2026-04-03 13:00:00")
+    delta = run_incremental_backup(collection, str(tmp_path), now=T0 + timedelta(hours=1))
+
+    assert (base["kind"], base["count"], base["watermark"]) == ("base", 2, "2026-04-03 12:00:00")
+    assert (delta["kind"], delta["count"], delta["watermark_from"]) == ("delta", 1, "2026-04-03 12:00:00")
+    delta_rows = list(iter_backup_documents(str(tmp_path / "stock_data" / delta["file"])))
+    assert [row["Ticker"] for row in delta_rows] == ["AAPL"]
+
+
+def test_backup_is_skipped_when_nothing_changed(collection, tmp_path):
+    _persist(collection, "AAPL", 1.0, "2026-04-03 12:00:00")
+    run_incremental_backup(collection, str(tmp_path), now=T0)
+
+    assert run_incremental_backup(collection, str(tmp_path), now=T0 + timedelta(hours=1)) is None
+    assert len(load_backup_manifest(str(tmp_path / "stock_data"))["entries"]) == 1
+
+
+def test_new_base_after_max_deltas(collection, tmp_path):
+    _persist(collection, "AAPL", 1.0, "2026-04-03 12:00:00")
+    run_incremental_backup(collection, str(tmp_path), now=T0, max_deltas=1)
+    _persist(collection, "AAPL", 2.0, "2026-04-03 13:00:00")
+    run_incremental_backup(collection, str(tmp_path), now=T0 + timedelta(hours=1), max_deltas=1)
+    _persist(collection, "AAPL", 3.0, "2026-04-03 14:00:00")
+    entry = run_incremental_backup(collection, str(tmp_path), now=T0 + timedelta(hours=2), max_deltas=1)
+
+    assert entry["kind"] == "base"
+
+
+def test_reconstruct_state_replays_chain_to_point_in_time(collection, tmp_path):
+    _persist(collection, "AAPL", 1.0, "2026-04-03 12:00:00")
+    _persist(collection, "MSFT", 2.0, "2026-04-03 12:00:00")
+    run_incremental_backup(collection, str(tmp_path), now=T0)
+    _persist(collection, "AAPL", 1.5, "2026-04-03 13:00:00")
+    run_incremental_backup(collection, str(tmp_path), now=T0 + timedelta(hours=1))
+    _persist(collection, "MSFT", 2.5, "2026-04-03 14:00:00")
+    run_incremental_backup(collection, str(tmp_path), now=T0 + timedelta(hours=2))
+    chain_dir = str(tmp_path / "stock_data")
+
+    at_one = {doc["Ticker"]: doc["Price"] for doc in reconstruct_state(chain_dir, until="2026-04-03T13:30:00").values()}
+    latest = {doc["Ticker"]: doc["Price"] for doc in reconstruct_state(chain_dir).values()}
+
+    assert at_one == {"AAPL": 1.5, "MSFT": 2.0}
+    assert latest == {"AAPL": 1.5, "MSFT": 2.5}
+
+    output = tmp_path / "restore.ndjson.gz"
+    assert write_point_in_time(chain_dir, str(output)) == 2
+    assert sorted(doc["Ticker"] for doc in iter_backup_documents(str(output))) == ["AAPL", "MSFT"]
+
+
+def test_reconstruct_rejects_tampered_files(collection, tmp_path):
+    _persist(collection, "AAPL", 1.0, "2026-04-03 12:00:00")
+    entry = run_incremental_backup(collection, str(tmp_path), now=T0)
+    (tmp_path / "stock_data" / entry["file"]).write_bytes(b"")
+
+    with pytest.raises(ValueError):
+        reconstruct_state(str(tmp_path / "stock_data"))
+
+
+def test_chain_requires_a_base_before_point_in_time():
+    manifest = {"entries": [{"kind": "base", "file": "b", "created_at": T0.isoformat()}]}
+    with pytest.raises(ValueError):
+        chain_for_point_in_time(manifest, until="2026-04-02T00:00:00")
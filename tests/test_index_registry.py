@@ -0,0 +1,78 @@
+from unittest.mock import MagicMock
+
+from pymongo.errors import ServerSelectionTimeoutError
+
+from app.services import index_registry
+from app.services.index_registry import (
+    ensure_registered_indexes,
+    explain_query_shapes,
+    reconcile_indexes,
+)
+
+
+def _db_with(collections):
+    db = MagicMock()
+    db.__getitem__.side_effect = lambda name: collections.setdefault(name, MagicMock())
+    return db
+
+
+def test_ensure_registered_indexes_creates_each_spec():
+    coll = MagicMock()
+    ensure_registered_indexes(coll, "instrument_snapshot")
+
+    assert coll.create_index.call_count == 2
+    coll.create_index.assert_any_call([("instrument_key", 1)], unique=True)
+    coll.create_index.assert_any_call([("symbol", 1), ("instrument_type", 1)])
+
+
+def test_reconcile_creates_missing_and_reports_existing_and_unregistered():
+    coll = MagicMock()
+    coll.index_information.return_value = {
+        "_id_": {"key": [("_id", 1)]},
+        "date_-1": {"key": [("date", -1)]},
+        "legacy_1": {"key": [("legacy", 1)]},
+    }
+    registry = {"ibkr_holdings": [{"keys": [("date", -1)]}, {"keys": [("snapshot_id", 1)]}]}
+
+    report = reconcile_indexes(_db_with({"ibkr_holdings": coll}), registry=registry)
+
+    assert report["existing"] == ["ibkr_holdings.date_-1"]
+    assert report["created"] == ["ibkr_holdings.snapshot_id_1"]
+    assert report["unregistered"] == ["ibkr_holdings.legacy_1"]
+    coll.create_index.assert_called_once_with([("snapshot_id", 1)])
+
+
+def test_reconcile_stops_when_server_unreachable():
+    first, second = MagicMock(), MagicMock()
+    first.index_information.side_effect = ServerSelectionTimeoutError("down")
+    registry = {"a": [{"keys": [("x", 1)]}], "b": [{"keys": [("y", 1)]}]}
+
+    report = reconcile_indexes(_db_with({"a": first, "b": second}), registry=registry)
+
+    assert len(report["errors"]) == 1
+    second.index_information.assert_not_called()
+
+
+def test_explain_query_shapes_flags_collscan():
+    scan, indexed = MagicMock(), MagicMock()
+    scan.find.return_value.sort.return_value.limit.return_value.explain.return_value = {
+        "queryPlanner": {"winningPlan": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}}
+    }
+    indexed.find.return_value.limit.return_value.explain.return_value = {
+        "queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}}
+    }
+    shapes = [
+        {"name": "scan", "collection": "a", "filter": {"s": 1}, "sort": [("t", -1)]},
+        {"name": "indexed", "collection": "b", "filter": {"s": 1}},
+    ]
+
+    report = explain_query_shapes(_db_with({"a": scan, "b": indexed}), shapes=shapes)
+
+    assert report["collscans"] == ["scan"]
+    assert report["shapes"][0]["in_memory_sort"] is True
+    assert report["shapes"][1]["stages"] == ["FETCH", "IXSCAN"]
+
+
+def test_every_query_shape_targets_a_registered_collection():
+    for shape in index_registry.QUERY_SHAPES:
+        assert shape["collection"] in index_registry.INDEX_REGISTRY
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.indicator_engine import IndicatorEngine
+from stock_live_comparison import StockLiveComparison
+
+
+def _random_history(length, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1.5, size=length))
+    high = close + rng.uniform(0.1, 2.0, size=length)
+    low = close - rng.uniform(0.1, 2.0, size=length)
+    return pd.DataFrame(
+        {"Open": close, "High": high, "Low": low, "Close": close, "Volume": 1000},
+        index=pd.bdate_range("2025-01-01", periods=length),
+    )
+
+
+def _close_enough(expected, actual):
+    if expected is None or (isinstance(expected, float) and np.isnan(expected)):
+        return actual is None
+    return actual == pytest.approx(float(expected), abs=0.011)
+
+
+def test_engine_matches_per_ticker_helpers_across_history_lengths():
+    histories = {
+        "LONG": _random_history(252, 1),
+        "MID": _random_history(90, 2),
+        "SHORT": _random_history(22, 3),
+        "TINY": _random_history(14, 4),
+    }
+    comp = StockLiveComparison(list(histories))
+
+    panel_rows = IndicatorEngine.compute(histories)
+
+    for ticker, hist in histories.items():
+        expected = comp.calculate_indicators(hist)
+        for name, value in expected.items():
+            assert _close_enough(value, panel_rows[ticker][name]), (ticker, name, value, panel_rows[ticker][name])
+
+
+def test_engine_skips_missing_or_empty_histories():
+    rows = IndicatorEngine.compute({"AAA": None, "BBB": pd.DataFrame(), "CCC": _random_history(30, 5)})
+    assert list(rows) == ["CCC"]
+    assert rows["CCC"]["MA_30"] is not None
+    assert rows["CCC"]["MA_60"] is None
+
+
+def test_fetch_ticker_record_reads_precomputed_indicator_row():
+    comp = StockLiveComparison(["AAA"])
+    comp.get_otm_call_yield = lambda *args, **kwargs: (None, None, None)
+    comp.get_otm_call_contract = lambda *args, **kwargs: (None, None, None)
+    comp.get_otm_put_contract = lambda *args, **kwargs: (None, None, None)
+    comp.indicator_rows = {
+        "AAA": {
+            "EMA_20": 1.0, "HMA_20": 2.0, "TSMOM_60": 0.5, "RSI_14": 40.0, "ATR_14": 3.0,
+            "MA_30": 4.0, "MA_60": 5.0, "MA_120": 6.0, "MA_200": 7.0,
+        }
+    }
+
+    record = comp.fetch_ticker_record("AAA", {"regularMarketPrice": 10}, _random_history(5, 6), None)
+
+    assert record["EMA_20"] == 1.0
+    assert record["RSI_14"] == 40.0
+    assert record["MA_200"] == 7.0
+
+
+def test_engine_rsi_matches_helper_when_panel_is_exactly_one_period_long():
+    hist = _random_history(14, 7)
+    rows = IndicatorEngine.compute({"AAA": hist})
+    assert _close_enough(StockLiveComparison.calculate_rsi(hist["Close"], period=14), rows["AAA"]["RSI_14"])
@@ -45,7 +45,7 @@ def test_opportunity_service_create(mock_mongo):
     opp_id = service.create_opportunity(opp)
     
     assert opp_id == "mock_id_123"
-    mock_collection.create_index.assert_called() # Should verify indexes created
+    mock_collection.create_index.assert_not_called() # Indexes are reconciled at startup
     mock_collection.insert_one.assert_called_once()
     
     # Check inserted data
@@ -199,12 +199,12 @@ def test_get_portfolio_holdings_marks_assignment_risk_for_short_calls(client):
         mock_db.ibkr_holdings.find_one.return_value = {"snapshot_id": "test_snap"}
         mock_db.ibkr_holdings.find.return_value = mock_holdings
         mock_db.ibkr_dividends.aggregate.return_value = []
-        mock_db.stock_data.find_one.return_value = {
+        mock_db.stock_data.find.return_value = [{
             "Ticker": "AAPL",
             "Current Price": 160.0,
             "Div Yield": 2.0,
             "exDividendDate": (now + timedelta(days=3)).isoformat(),
-        }
+        }]
 
         mock_analyzer = MagicMock()
         mock_analyzer_cls.return_value = mock_analyzer
@@ -1067,3 +1067,62 @@ def test_get_portfolio_holdings_marks_exact_account_underlying_200_shares_and_2_
 
         assert len(option_rows) == 2
         assert all(row["coverage_status"] == "Covered" for row in option_rows)
+
+
+def test_get_portfolio_holdings_batches_enrichment_reads_per_collection(client, caplog):
+    with patch("app.api.routes.MongoClient") as mock_mongo_cls:
+        mock_client = MagicMock()
+        mock_db = MagicMock()
+        mock_mongo_cls.return_value = mock_client
+        mock_client.get_default_database.return_value = mock_db
+
+        tickers = [f"T{i:03d}" for i in range(50)]
+        mock_holdings = [
+            {"symbol": t, "asset_class": "STK", "account_id": "U1", "quantity": 100, "mark_price": 10.0}
+            for t in tickers
+        ]
+        mock_db.ibkr_holdings.find_one.return_value = {"snapshot_id": "test_snap"}
+        mock_db.ibkr_holdings.find.return_value = mock_holdings
+        mock_db.ibkr_dividends.aggregate.return_value = [{"_id": "T000", "total_divs": 5.0}]
+        mock_db.ibkr_orders.find.return_value = []
+        mock_db.stock_data.find.return_value = [{"Ticker": "T001", "Current Price": 11.0}]
+
+        with caplog.at_level("DEBUG", logger="app.api.routes"):
+            data = client.get("/api/portfolio/holdings").json()
+
+    assert len(data) == 50
+    mock_db.stock_data.find_one.assert_not_called()
+    mock_db.stock_data.find.assert_called_once()
+    assert mock_db.stock_data.find.call_args[0][0] == {"Ticker": {"$in": tickers}}
+    mock_db.ibkr_orders.find.assert_called_once()
+    orders_query = mock_db.ibkr_orders.find.call_args[0][0]
+    assert orders_query["source"] == "tws_open_order"
+    assert {"underlying_symbol": {"$in": tickers}} in orders_query["$or"]
+    mock_db.ibkr_dividends.aggregate.assert_called_once()
+    assert next(row for row in data if row["symbol"] == "T000")["divs_earned"] == 5.0
+
+    timing = [r.getMessage() for r in caplog.records if "portfolio/holdings timing" in r.getMessage()]
+    assert len(timing) == 1
+    for stage in ("holdings=", "dividends=", "coverage=", "orders=", "market_context=", "enrich="):
+        assert stage in timing[0]
+    assert "rows=50" in timing[0]
+
+
+def test_market_context_is_joined_by_ticker(client):
+    with patch("app.api.routes.MongoClient") as mock_mongo_cls:
+        mock_client = MagicMock()
+        mock_db = MagicMock()
+        mock_mongo_cls.return_value = mock_client
+        mock_client.get_default_database.return_value = mock_db
+        mock_db.stock_data.find.return_value = [
+            {"Ticker": "AAPL", "Current Price": 200.0, "Div Yield": "0.5%"},
+            {"Ticker": "MSFT", "Current Price": 400.0},
+        ]
+
+        context = routes._load_market_context(mock_db, ["MSFT", "AAPL", "NOPE", None])
+
+    assert context["AAPL"]["last_price"] == 200.0
+    assert context["AAPL"]["div_yield"] == 0.5
+    assert context["MSFT"]["last_price"] == 400.0
+    assert context["NOPE"]["last_price"] is None
+    mock_db.stock_data.find.assert_called_once()
@@ -0,0 +1,31 @@
+from app.services.position_marks import (
+    apply_snapshot_heartbeat,
+    changed_accounts,
+    position_set_hashes,
+)
+
+
+def _doc(account="DU1", key="DU1:STK:AAPL", qty=10, **extra):
+    return {"account_id": account, "position_key": key, "secType": "STK", "quantity": qty, **extra}
+
+
+def test_position_set_hashes_ignore_row_order_and_track_changes():
+    a = position_set_hashes([_doc(market_price=1.0), _doc(key="DU1:STK:MSFT")])
+    b = position_set_hashes([_doc(key="DU1:STK:MSFT"), _doc(market_price=1.0)])
+    c = position_set_hashes([_doc(qty=11), _doc(key="DU1:STK:MSFT")])
+    d = position_set_hashes([_doc(market_price=2.0), _doc(key="DU1:STK:MSFT")])
+
+    assert a == b
+    assert changed_accounts(a, c) == ["DU1"]
+    # Price moves are not dropped: they produce a new snapshot.
+    assert changed_accounts(a, d) == ["DU1"]
+    assert changed_accounts(a, {**a, "DU2": "x"}) == ["DU2"]
+
+
+def test_apply_snapshot_heartbeat_stamps_rows():
+    rows = [_doc(), _doc(key="DU1:STK:MSFT")]
+
+    apply_snapshot_heartbeat(rows, {"snapshot_id": "s1", "last_tws_update": "hb"})
+
+    assert all(row["last_tws_update"] == "hb" for row in rows)
+    assert apply_snapshot_heartbeat(rows, None) is rows
@@ -0,0 +1,192 @@
+import time
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+import mongomock
+import pytest
+from pymongo.errors import OperationFailure
+
+from app.services.price_history_store import (
+    downsample_rows,
+    ensure_price_history_collection,
+    fetch_downsampled_history,
+    history_sort_field,
+    insert_new_price_history_rows,
+    is_timeseries_collection,
+    parse_history_timestamp,
+    reset_timeseries_cache,
+    set_price_history_retention,
+)
+
+
+def _set_local_tz(monkeypatch, tz):
+    monkeypatch.setenv("TZ", tz)
+    time.tzset()
+
+
+@pytest.fixture(autouse=True)
+def utc_local_time(monkeypatch):
+    """Stored ``timestamp`` strings are local time; pin the zone so buckets are deterministic."""
+    _set_local_tz(monkeypatch, "UTC")
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def _timeseries_db():
+    db = MagicMock()
+    db.list_collections.side_effect = lambda **_: iter(
+        [{"name": "instrument_price_history", "options": {"timeseries": {"timeField": "ts"}}}]
+    )
+    return db
+
+
+def _row(key, ts, price):
+    return {"instrument_key": key, "timestamp": ts, "ts": parse_history_timestamp(ts), "price": price, "source": "s"}
+
+
+def test_parse_history_timestamp_handles_repo_formats():
+    expected = datetime(2026, 4, 3, 13, 20, tzinfo=timezone.utc)
+    assert parse_history_timestamp("2026-04-03 13:20:00") == expected
+    assert parse_history_timestamp("2026-04-03T13:20:00Z") == expected
+    assert parse_history_timestamp("not a date") is None
+
+
+def test_parse_history_timestamp_treats_naive_strings_as_local_time(monkeypatch):
+    _set_local_tz(monkeypatch, "America/New_York")
+    # 09:20 EDT is 13:20 UTC; naive datetimes (as returned by pymongo) stay UTC.
+    assert parse_history_timestamp("2026-04-03 09:20:00") == datetime(2026, 4, 3, 13, 20, tzinfo=timezone.utc)
+    assert parse_history_timestamp(datetime(2026, 4, 3, 13, 20)) == datetime(2026, 4, 3, 13, 20, tzinfo=timezone.utc)
+
+
+def test_is_timeseries_collection_caches_until_reset():
+    db = _timeseries_db()
+    assert is_timeseries_collection(db) is True
+    assert is_timeseries_collection(db) is True
+    assert db.list_collections.call_count == 1
+
+    reset_timeseries_cache()
+    assert is_timeseries_collection(db) is True
+    assert db.list_collections.call_count == 2
+
+
+def test_ensure_creates_timeseries_collection_and_migrates_legacy_rows():
+    db = MagicMock()
+    db.list_collections.return_value = iter([{"name": "instrument_price_history", "options": {}}])
+    db.list_collection_names.return_value = ["instrument_price_history"]
+    db.__getitem__.return_value.find.return_value = [
+        {"instrument_key": "STK:AAPL", "timestamp": "2026-04-03 13:20:00", "price": 1.0},
+        {"instrument_key": "STK:AAPL", "timestamp": "garbage", "price": 2.0},
+    ]
+
+    result = ensure_price_history_collection(db, retention_days=30)
+
+    assert result == {"mode": "timeseries", "action": "migrated", "copied": 1}
+    db.__getitem__.return_value.rename.assert_called_once_with("instrument_price_history_legacy")
+    kwargs = db.create_collection.call_args.kwargs
+    assert kwargs["timeseries"] == {"timeField": "ts", "metaField": "instrument_key", "granularity": "minutes"}
+    assert kwargs["expireAfterSeconds"] == 30 * 86400
+
+
+def test_ensure_restores_regular_collection_when_timeseries_unsupported():
+    db = MagicMock()
+    db.list_collections.return_value = iter([])
+    db.list_collection_names.side_effect = [["instrument_price_history"], ["instrument_price_history_legacy"]]
+    db.create_collection.side_effect = OperationFailure("unsupported")
+    db.__getitem__.return_value.find.return_value = []
+
+    result = ensure_price_history_collection(db)
+
+    assert result["mode"] == "standin"
+    db.__getitem__.return_value.rename.assert_called_with("instrument_price_history")
+
+
+def test_standin_backfills_ts_and_retention_is_not_native():
+    db = mongomock.MongoClient().get_database("stock_analysis")
+    db.instrument_price_history.insert_one({"instrument_key": "STK:AAPL", "timestamp": "2026-04-03 13:20:00"})
+
+    result = ensure_price_history_collection(db)
+
+    assert result == {"mode": "standin", "action": "backfill", "backfilled": 1}
+    assert db.instrument_price_history.find_one()["ts"] == datetime(2026, 4, 3, 13, 20)
+    assert set_price_history_retention(db, 30) is False
+    assert history_sort_field(db) == "timestamp"
+
+
+def test_ensure_skips_creation_when_timeseries_flagged_unsupported():
+    db = MagicMock()
+    db.list_collections.return_value = iter([])
+    db.__getitem__.return_value.find.return_value = []
+
+    result = ensure_price_history_collection(db, timeseries_supported=False)
+
+    assert result["mode"] == "standin"
+    db.create_collection.assert_not_called()
+    db.__getitem__.return_value.rename.assert_not_called()
+
+
+def test_history_sort_field_uses_ts_only_for_timeseries_collection():
+    assert history_sort_field(_timeseries_db()) == "ts"
+
+
+def test_insert_new_price_history_rows_skips_already_stored_points():
+    db = mongomock.MongoClient().get_database("stock_analysis")
+    rows = [_row("STK:AAPL", "2026-04-03 13:20:00", 1.0), _row("STK:AAPL", "2026-04-03 13:21:00", 2.0)]
+    assert insert_new_price_history_rows(db.instrument_price_history, rows[:1]) == 1
+    assert insert_new_price_history_rows(db.instrument_price_history, rows) == 1
+    assert db.instrument_price_history.count_documents({}) == 2
+
+
+def test_downsample_rows_builds_ohlc_bars():
+    rows = [
+        _row("k", "2026-04-03 13:20:10", 10.0),
+        _row("k", "2026-04-03 13:22:00", 12.0),
+        _row("k", "2026-04-03 13:21:00", 9.0),
+        _row("k", "2026-04-03 13:26:00", 11.0),
+    ]
+    bars = downsample_rows(rows, "5m", limit=10)
+
+    assert [b["timestamp"] for b in bars] == ["2026-04-03 13:20:00", "2026-04-03 13:25:00"]
+    assert (bars[0]["open"], bars[0]["high"], bars[0]["low"], bars[0]["close"], bars[0]["count"]) == (10.0, 12.0, 9.0, 12.0, 3)
+    assert downsample_rows(rows, "5m", limit=1)[0]["close"] == 11.0
+
+
+@pytest.mark.parametrize("error", [OperationFailure("no $dateTrunc"), NotImplementedError()])
+def test_fetch_downsampled_history_falls_back_to_in_process_bucketing(error):
+    db = _timeseries_db()
+    collection = db.__getitem__.return_value
+    collection.aggregate.side_effect = error
+    collection.find.return_value = [_row("k", "2026-04-03 13:20:10", 10.0), _row("k", "2026-04-03 13:20:50", 11.0)]
+
+    bars = fetch_downsampled_history(db, ["k"], "1m", days=None, limit=5)
+
+    assert len(bars) == 1 and bars[0]["close"] == 11.0
+
+
+def test_fetch_downsampled_history_uses_server_pipeline():
+    db = _timeseries_db()
+    bucket = datetime(2026, 4, 3)
+    db.__getitem__.return_value.aggregate.return_value = [
+        {"_id": bucket, "open": 1.0, "high": 3.0, "low": 0.5, "close": 2.0, "count": 4}
+    ]
+
+    bars = fetch_downsampled_history(db, ["k"], "1d", days=30, limit=5)
+
+    pipeline = db.__getitem__.return_value.aggregate.call_args.args[0]
+    assert pipeline[0]["$match"]["ts"]["$gte"] is not None
+    assert pipeline[2]["$group"]["_id"]["$dateTrunc"]["unit"] == "day"
+    assert bars[0]["timestamp"] == "2026-04-03 00:00:00" and bars[0]["price"] == 2.0
+
+
+def test_fetch_downsampled_history_buckets_legacy_rows_by_timestamp_string():
+    db = mongomock.MongoClient().get_database("stock_analysis")
+    db.instrument_price_history.insert_many(
+        [
+            {"instrument_key": "k", "timestamp": "2026-04-03 13:20:10", "price": 10.0},
+            {"instrument_key": "k", "timestamp": "2026-04-03 13:20:50", "price": 11.0},
+        ]
+    )
+
+    bars = fetch_downsampled_history(db, ["k"], "1m", days=None, limit=5)
+
+    assert [(b["timestamp"], b["open"], b["close"]) for b in bars] == [("2026-04-03 13:20:00", 10.0, 11.0)]
@@ -0,0 +1,147 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import mongomock
+import pytest
+from fastapi import HTTPException
+
+from app.api import routes
+from app.config import settings
+from app.models import User
+from app.services import response_cache
+from app.services.response_cache import (
+    ResponseCache,
+    bump_response_cache_version,
+    cached_response,
+    current_versions,
+    get_response_cache,
+)
+
+ADMIN = User(username="admin", role="admin", disabled=False)
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", True)
+    monkeypatch.setattr(response_cache, "VERSION_POLL_SECONDS", 0.0)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_expires_entries_after_ttl():
+    clock = FakeClock()
+    cache = ResponseCache(max_entries=4, ttl_seconds=10, clock=clock)
+    cache.put("k", {"stocks": 1}, "v")
+
+    clock.now = 5
+    assert cache.get("k", {"stocks": 1}) == (True, "v")
+    clock.now = 16
+    assert cache.get("k", {"stocks": 1}) == (False, None)
+    assert cache.stats()["expired"] == 1
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2, ttl_seconds=60)
+    cache.put(("a",), {}, 1)
+    cache.put(("b",), {}, 2)
+    cache.get(("a",), {})
+    cache.put(("c",), {}, 3)
+
+    assert cache.get(("b",), {}) == (False, None)
+    assert cache.get(("a",), {}) == (True, 1)
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["size"] == 2
+
+
+def test_version_mismatch_is_a_miss():
+    cache = ResponseCache()
+    cache.put(("k",), {"stocks": (0, 1)}, "old")
+
+    assert cache.get(("k",), {"stocks": (0, 2)}) == (False, None)
+    assert cache.stats()["invalidated"] == 1
+
+
+def test_writer_bump_invalidates_cached_response(enabled):
+    db = mongomock.MongoClient().db
+    compute = MagicMock(side_effect=["first", "second"])
+
+    assert cached_response(db, "stocks", {"a": 1}, ["stocks"], compute) == "first"
+    assert cached_response(db, "stocks", {"a": 1}, ["stocks"], compute) == "first"
+    bump_response_cache_version(db, "stocks")
+    assert cached_response(db, "stocks", {"a": 1}, ["stocks"], compute) == "second"
+
+    assert compute.call_count == 2
+    assert db.system_config.find_one({"_id": "response_cache_versions"})["stocks"] == 1
+
+
+def test_bump_from_another_process_is_seen_through_shared_counter(enabled):
+    db = mongomock.MongoClient().db
+    before = current_versions(db, ["holdings"])
+    # Another process (e.g. a sharded ingest) bumps the shared counter only.
+    db.system_config.update_one({"_id": "response_cache_versions"}, {"$inc": {"holdings": 1}}, upsert=True)
+
+    assert current_versions(db, ["holdings"]) != before
+
+
+def test_uncacheable_values_are_recomputed(enabled):
+    db = mongomock.MongoClient().db
+    compute = MagicMock(return_value={"count": 0})
+
+    cached_response(db, "juicys", {}, ["juicys"], compute, cacheable=lambda p: p["count"] > 0)
+    cached_response(db, "juicys", {}, ["juicys"], compute, cacheable=lambda p: p["count"] > 0)
+
+    assert compute.call_count == 2
+
+
+def test_disabled_cache_always_computes():
+    compute = MagicMock(return_value=1)
+    cached_response(MagicMock(), "stocks", {}, ["stocks"], compute)
+    cached_response(MagicMock(), "stocks", {}, ["stocks"], compute)
+    assert compute.call_count == 2
+
+
+def test_portfolio_stats_route_is_served_from_cache_until_nav_bump(enabled):
+    client = mongomock.MongoClient()
+    db = client.get_default_database("stock_analysis")
+    with patch("app.api.routes.MongoClient", return_value=client), patch(
+        "app.services.portfolio_analysis.get_nav_history_stats", side_effect=[{"nav": 1}, {"nav": 2}]
+    ) as stats:
+        assert asyncio.run(routes.get_portfolio_stats(ADMIN, account_id="U1")) == {"nav": 1}
+        assert asyncio.run(routes.get_portfolio_stats(ADMIN, account_id="U1")) == {"nav": 1}
+        bump_response_cache_version(db, "nav")
+        assert asyncio.run(routes.get_portfolio_stats(ADMIN, account_id="U1")) == {"nav": 2}
+    assert stats.call_count == 2
+
+
+def test_admin_response_cache_endpoint_reports_and_resets(enabled):
+    db = mongomock.MongoClient().db
+    cached_response(db, "stocks", {}, ["stocks"], lambda: 1)
+    cached_response(db, "stocks", {}, ["stocks"], lambda: 1)
+
+    stats = routes.get_response_cache_stats(ADMIN, reset=True)
+
+    assert stats["enabled"] is True
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+    assert stats["entries_by_route"] == {"stocks": 1}
+    assert get_response_cache().stats()["size"] == 0
+
+
+def test_admin_response_cache_endpoint_requires_admin():
+    with pytest.raises(HTTPException) as exc:
+        routes.get_response_cache_stats(User(username="u", role="portfolio", disabled=False))
+    assert exc.value.status_code == 403
+
+
+def test_upsert_juicy_candidates_bumps_juicys_version():
+    from app.services.juicy_service import upsert_juicy_candidates
+
+    db = mongomock.MongoClient().db
+    upsert_juicy_candidates(db, "AAPL", [{"symbol": "AAPL", "strategy": "csp", "strike": 100, "expiration": "2026-05-15"}])
+
+    assert db.system_config.find_one({"_id": "response_cache_versions"})["juicys"] == 1
@@ -0,0 +1,72 @@
+import gzip
+import json
+from unittest.mock import MagicMock, patch
+
+import mongomock
+import pytest
+from bson import json_util
+
+from export_mongo import stream_collection
+from restore_mongo import iter_backup_documents, restore_data, restore_documents
+
+
+def _seed(count):
+    collection = mongomock.MongoClient().db.stock_data
+    collection.insert_many([{"Ticker": f"T{i}", "Last Update": f"2026-01-0{i + 1}"} for i in range(count)])
+    return collection
+
+
+@pytest.mark.parametrize("name", ["backup.json", "backup.ndjson", "backup.ndjson.gz"])
+def test_iter_backup_documents_round_trips_streamed_exports(tmp_path, name):
+    path = tmp_path / name
+    stream_collection(_seed(3), str(path), chunk_size=2)
+
+    assert [doc["Ticker"] for doc in iter_backup_documents(str(path))] == ["T0", "T1", "T2"]
+
+
+def test_iter_backup_documents_reads_legacy_indented_array(tmp_path):
+    path = tmp_path / "legacy.json"
+    path.write_text(json_util.dumps([{"Ticker": "AAPL"}, {"Ticker": "MSFT"}], indent=2))
+
+    assert [doc["Ticker"] for doc in iter_backup_documents(str(path))] == ["AAPL", "MSFT"]
+
+
+def test_restore_documents_inserts_in_batches_and_skips_existing_ids():
+    source = _seed(5)
+    target = mongomock.MongoClient().db.stock_data
+    target.insert_one(source.find_one({"Ticker": "T0"}))
+    spy = MagicMock(wraps=target)
+
+    restored = restore_documents(spy, source.find({}), mode="insert", batch_size=2)
+
+    assert restored == 4
+    assert spy.insert_many.call_count == 3
+    assert target.count_documents({}) == 5
+
+
+def test_restore_documents_upserts_by_ticker_and_last_update():
+    collection = MagicMock()
+
+    restored = restore_documents(collection, iter([{"Ticker": "A"}, {"Ticker": "B"}, {"Ticker": "C"}]), batch_size=2)
+
+    assert restored == 3
+    batches = [call.args[0] for call in collection.bulk_write.call_args_list]
+    assert [len(batch) for batch in batches] == [2, 1]
+    assert batches[0][0]._filter == {"Ticker": "A"}
+
+
+def test_restore_documents_rejects_records_without_keys():
+    with pytest.raises(ValueError):
+        restore_documents(MagicMock(), iter([{"Price": 1.0}]))
+
+
+def test_restore_data_streams_gzip_ndjson_into_collection(tmp_path):
+    path = tmp_path / "stock_data.ndjson.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write("\n".join(json.dumps({"Ticker": t}) for t in ("AAPL", "MSFT")) + "\n")
+    client = mongomock.MongoClient()
+
+    with patch("restore_mongo.MongoClient", return_value=client):
+        restore_data(input_file=str(path), db_name="stock_analysis", collection_name="stock_data", mode="insert")
+
+    assert sorted(doc["Ticker"] for doc in client.stock_analysis.stock_data.find()) == ["AAPL", "MSFT"]
@@ -84,6 +84,7 @@ def test_start_scheduler_registers_price_history_retention_job():
 
     job_ids = [call.kwargs.get("id") for call in mock_scheduler.add_job.call_args_list]
     assert "instrument_price_history_retention_daily" in job_ids
+    assert "tws_holdings_compaction_hourly" in job_ids
 
 
 def test_run_stock_live_comparison_scheduled_runs_single_job_when_sharding_disabled():
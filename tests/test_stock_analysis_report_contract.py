@@ -25,8 +25,8 @@ def test_save_to_excel_enforces_canonical_report_column_order(tmp_path):
         ]
     )
 
-    df, put_col, call_col = comp.add_ratio_column(df)
-    comp.save_to_excel(df, put_col, call_col)
+    df, _, _ = comp.add_ratio_column(df)
+    comp.save_to_excel(df)
 
     exported = pd.read_excel(comp.filename, engine='openpyxl')
     headers = list(exported.columns)
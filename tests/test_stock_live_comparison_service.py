@@ -214,6 +214,8 @@ def test_optional_sharding_manual_uses_single_new_file_then_reuses(monkeypatch):
     assert calls[1]["kwargs"]["trigger"] == "manual"
     assert calls[1]["kwargs"]["force_new_file_override"] is False
     assert calls[1]["kwargs"]["allow_create_if_missing_override"] is True
+    # Sequential shards hand one limiter state from run to run.
+    assert calls[0]["kwargs"]["rate_state"] is calls[1]["kwargs"]["rate_state"]
     mock_sleep.assert_called_once()
 
 
@@ -239,3 +241,152 @@ def test_optional_sharding_sync_bypasses_sharding(monkeypatch):
     assert result["status"] == "success"
     assert len(calls) == 1
     assert calls[0]["kwargs"] == {"tickers": ["AAPL"], "trigger": "sync"}
+
+
+def test_service_passes_fetch_max_workers_from_system_config(monkeypatch):
+    created = {}
+
+    def fake_ctor(tickers, **kwargs):
+        created["comp"] = DummyComparison(tickers, **kwargs)
+        return created["comp"]
+
+    monkeypatch.setattr(svc, "StockLiveComparison", fake_ctor)
+    with patch("app.services.stock_live_comparison.MongoClient") as mock_mongo:
+        mock_db = mock_mongo.return_value.get_default_database.return_value
+        mock_db.system_config.find_one.return_value = {
+            "_id": "stock_analysis_http_config",
+            "fetch_max_workers": "0",
+        }
+        svc.run_stock_live_comparison(["AAPL"], trigger="manual")
+
+    assert created["comp"].kwargs["max_fetch_workers"] == 1
+
+
+def test_service_passes_deterministic_checkpoint_run_id(monkeypatch):
+    created = []
+
+    def fake_ctor(tickers, **kwargs):
+        created.append(DummyComparison(tickers, **kwargs))
+        return created[-1]
+
+    monkeypatch.setattr(svc, "StockLiveComparison", fake_ctor)
+    with patch("app.services.stock_live_comparison.MongoClient"):
+        svc.run_stock_live_comparison(["MSFT", "AAPL"], trigger="scheduled")
+        svc.run_stock_live_comparison(["AAPL", "MSFT"], trigger="scheduled")
+        svc.run_stock_live_comparison(["AAPL"], trigger="scheduled", run_id="custom-run")
+
+    first, second, third = (c.kwargs["checkpoint_run_id"] for c in created)
+    assert first == second
+    assert first.startswith("scheduled-")
+    assert third == "custom-run"
+
+
+def test_service_starts_from_learned_rate_and_persists_it(monkeypatch):
+    created = {}
+
+    class AdaptiveComparison(DummyComparison):
+        def run(self, force_new_file=False, allow_create_if_missing=True):
+            summary = super().run(force_new_file, allow_create_if_missing)
+            summary.update(
+                {
+                    "adaptive_rate_enabled": True,
+                    "request_interval_sec": 0.8,
+                    "request_rate_per_sec": 1.25,
+                    "rate_success_count": 10,
+                    "rate_limited_count": 1,
+                }
+            )
+            return summary
+
+    def fake_ctor(tickers, **kwargs):
+        created["comp"] = AdaptiveComparison(tickers, **kwargs)
+        return created["comp"]
+
+    def fake_find_one(query):
+        if query["_id"] == "stock_analysis_adaptive_rate":
+            return {"_id": "stock_analysis_adaptive_rate", "learned_request_interval_sec": 0.9}
+        return {"_id": "stock_analysis_http_config", "request_throttle_interval_sec": 0.5}
+
+    monkeypatch.setattr(svc, "StockLiveComparison", fake_ctor)
+    with patch("app.services.stock_live_comparison.MongoClient") as mock_mongo:
+        mock_db = mock_mongo.return_value.get_default_database.return_value
+        mock_db.system_config.find_one.side_effect = fake_find_one
+        result = svc.run_stock_live_comparison(["AAPL"], trigger="manual")
+
+    assert created["comp"].kwargs["min_request_interval_sec"] == 0.9
+    assert created["comp"].kwargs["min_adaptive_interval_sec"] == svc.MIN_ADAPTIVE_INTERVAL_SEC
+    assert created["comp"].kwargs["adaptive_rate"] is True
+    update = mock_db.system_config.update_one.call_args
+    assert update.args[0] == {"_id": "stock_analysis_adaptive_rate"}
+    assert update.args[1]["$set"]["learned_request_interval_sec"] == 0.8
+    telemetry = mock_db.stock_ingest_runs.insert_one.call_args.args[0]
+    assert telemetry["request_interval_sec"] == 0.8
+    assert telemetry["rate_limited_count"] == 1
+    assert result["request_rate_per_sec"] == 1.25
+
+
+def _run_with_rate_settings(monkeypatch, learned, configured):
+    created = {}
+
+    def fake_ctor(tickers, **kwargs):
+        created["comp"] = DummyComparison(tickers, **kwargs)
+        return created["comp"]
+
+    def fake_find_one(query):
+        if query["_id"] == "stock_analysis_adaptive_rate":
+            return {"_id": "stock_analysis_adaptive_rate", "learned_request_interval_sec": learned} if learned else None
+        return {"_id": "stock_analysis_http_config", "request_throttle_interval_sec": configured}
+
+    monkeypatch.setattr(svc, "StockLiveComparison", fake_ctor)
+    with patch("app.services.stock_live_comparison.MongoClient") as mock_mongo:
+        mock_db = mock_mongo.return_value.get_default_database.return_value
+        mock_db.system_config.find_one.side_effect = fake_find_one
+        svc.run_stock_live_comparison(["AAPL"], trigger="manual")
+    return created["comp"].kwargs
+
+
+def test_service_resumes_a_learned_rate_faster_than_configured(monkeypatch):
+    kwargs = _run_with_rate_settings(monkeypatch, learned=0.3, configured=1.5)
+
+    assert kwargs["min_request_interval_sec"] == 0.3
+    assert kwargs["min_adaptive_interval_sec"] == svc.MIN_ADAPTIVE_INTERVAL_SEC
+
+
+def test_service_starts_at_configured_interval_without_learned_rate(monkeypatch):
+    kwargs = _run_with_rate_settings(monkeypatch, learned=None, configured=1.5)
+
+    assert kwargs["min_request_interval_sec"] == 1.5
+    assert kwargs["min_adaptive_interval_sec"] == svc.MIN_ADAPTIVE_INTERVAL_SEC
+
+
+def test_optional_sharding_parallel_workers_run_once_with_shards(monkeypatch):
+    monkeypatch.setattr(
+        svc,
+        "_load_stock_analysis_http_settings",
+        lambda: {
+            "scheduler_sharding_enabled": True,
+            "scheduler_shard_size": 2,
+            "scheduler_shard_pause_sec": 5.0,
+            "scheduler_shard_workers": 3,
+        },
+    )
+    calls = []
+
+    def fake_run(*args, **kwargs):
+        calls.append(kwargs)
+        return {"status": "success", "rows_updated": 5, "failure_count": 0}
+
+    monkeypatch.setattr(svc, "run_stock_live_comparison", fake_run)
+    with patch("app.services.stock_live_comparison.time.sleep") as mock_sleep:
+        result = svc.run_stock_live_comparison_with_optional_sharding(
+            tickers=["A", "B", "C", "D", "E"],
+            trigger="scheduled",
+        )
+
+    assert calls == [
+        {"tickers": ["A", "B", "C", "D", "E"], "trigger": "scheduled", "shard_size": 2, "shard_workers": 3}
+    ]
+    assert result["mode"] == "parallel_sharded"
+    assert result["shard_count"] == 3
+    assert result["rows_updated"] == 5
+    mock_sleep.assert_not_called()
@@ -132,8 +132,7 @@ def test_download_history_batched_prefers_fresh_cache(monkeypatch, tmp_path):
     monkeypatch.setattr(slc.yf, "download", fake_download)
     monkeypatch.setattr(slc.time, "sleep", lambda x: None)
 
-    comp = StockLiveComparison(["AAA", "BBB"], history_cache_ttl_hours=24)
-    comp.history_cache_dir = tmp_path
+    comp = StockLiveComparison(["AAA", "BBB"], history_cache_ttl_hours=24, history_cache_dir=tmp_path)
 
     fresh_df = pd.DataFrame(
         {
@@ -343,8 +342,8 @@ def test_save_to_excel(tmp_path):
         "Annual Yield Put Prem": [5],
         "Annual Yield Call Prem": [10],
     })
-    df, put_col, call_col = comp.add_ratio_column(df)
-    comp.save_to_excel(df, put_col, call_col)
+    df, _, _ = comp.add_ratio_column(df)
+    comp.save_to_excel(df)
     wb = openpyxl.load_workbook(comp.filename)
     ws = wb.active
     assert ws.freeze_panes == "A2"
@@ -362,6 +361,42 @@ def test_save_to_excel(tmp_path):
     assert ticker_cell.style == "Hyperlink"
 
 
+def test_save_to_excel_streams_links_fills_and_formats(tmp_path):
+    comp = StockLiveComparison(["AAA", "BBB"])
+    comp.filename = str(tmp_path / "out.xlsx")
+    df = pd.DataFrame({
+        "Ticker": ["AAA", "BBB"],
+        "Current Price": [100.0, 100.0],
+        "Call/Put Skew": [1.5, 0.5],
+        "MA_30": [120.0, 80.0],
+        "MA_30_highlight": [-0.2, 0.25],
+        "TSMOM_60": [0.05, float("nan")],
+        "1-yr 6% OTM CALL Strike": [106.0, None],
+        "_CallExpDate_365": ["2027-01-15", None],
+        "Last Update": ["2026-01-02", "2026-01-01"],
+    })
+    comp.save_to_excel(df)
+
+    ws = openpyxl.load_workbook(comp.filename).active
+    headers = [c.value for c in ws[1]]
+    col = {name: headers.index(name) + 1 for name in headers}
+    assert ws.freeze_panes == "A2"
+    assert ws.cell(row=2, column=col["Ticker"]).value == "AAA"
+
+    strike = ws.cell(row=2, column=col["1-yr 6% OTM CALL Strike"])
+    assert strike.hyperlink is not None
+    assert strike.hyperlink.target == comp.generate_yf_option_url("AAA", "2027-01-15")
+    assert ws.cell(row=3, column=col["1-yr 6% OTM CALL Strike"]).hyperlink is None
+
+    assert ws.cell(row=2, column=col["Call/Put Skew"]).fill.start_color.rgb.endswith("C6EFCE")
+    assert ws.cell(row=3, column=col["Call/Put Skew"]).fill.start_color.rgb.endswith("FFC7CE")
+    assert ws.cell(row=2, column=col["MA_30"]).fill.start_color.rgb.endswith("C6EFCE")
+    assert ws.cell(row=3, column=col["MA_30"]).fill.start_color.rgb.endswith("FFC7CE")
+    assert ws.cell(row=2, column=col["MA_30_highlight"]).number_format == "0.0%"
+    assert ws.cell(row=2, column=col["TSMOM_60"]).number_format == "0.0%"
+    assert ws.cell(row=3, column=col["TSMOM_60"]).value is None
+
+
 def test_run(monkeypatch, tmp_path):
     sample_record = {
         "Ticker": "AAA",
@@ -378,10 +413,8 @@ def test_run(monkeypatch, tmp_path):
 
     saved = {}
 
-    def fake_save(self, df, put_col, call_col):
+    def fake_save(self, df):
         saved["df"] = df.copy()
-        saved["put_col"] = put_col
-        saved["call_col"] = call_col
 
     monkeypatch.setattr(StockLiveComparison, "save_to_excel", fake_save)
 
@@ -391,7 +424,6 @@ def test_run(monkeypatch, tmp_path):
     df = saved["df"]
     assert "Call/Put Skew" in df.columns
     assert df.iloc[0]["Call/Put Skew"] == 2.0
-    assert saved["put_col"] == 2 and saved["call_col"] == 3
 
 
 def test_is_recent():
@@ -497,6 +529,8 @@ def test_run_merge_logic(monkeypatch, tmp_path, caplog):
     def fake_get_latest(directory, base_name="AI_Stock_Live_Comparison_"):
         return existing_file, pd.Timestamp("2025-01-01 10:00:00")
     monkeypatch.setattr(comp, "get_latest_spreadsheet", fake_get_latest)
+    # Mongo unreachable -> legacy spreadsheet merge fallback
+    monkeypatch.setattr(comp, "load_existing_records_from_mongo", lambda: None)
     
     # Mock fetch_data to return only "NEW" ticker data
     def fake_fetch(tickers):
@@ -510,11 +544,11 @@ def test_run_merge_logic(monkeypatch, tmp_path, caplog):
     
     # Mock save_to_excel avoid actual excel ops
     saved_df = []
-    monkeypatch.setattr(comp, "save_to_excel", lambda df, p, c: saved_df.append(df))
+    monkeypatch.setattr(comp, "save_to_excel", lambda df: saved_df.append(df))
     monkeypatch.setattr(comp, "upsert_to_mongo", lambda df: None)
     
-    # Mock json export
-    monkeypatch.setattr("stock_live_comparison.export_data", lambda: None)
+    # Mock incremental backup
+    monkeypatch.setattr("stock_live_comparison.run_incremental_backup", lambda: None)
     
     # Mock datetime to control self.now inside run()
     import datetime
@@ -610,7 +644,7 @@ def test_run_uses_latest_viable_file_as_merge_source(monkeypatch, tmp_path):
     monkeypatch.setattr(comp, "fetch_data", lambda tickers: [{"Ticker": "BBB", "Annual Yield Put Prem": 2, "Annual Yield Call Prem": 4, "Last Update": "2026-04-03 11:00:00"}])
     monkeypatch.setattr(comp, "save_to_excel", lambda *args, **kwargs: None)
     monkeypatch.setattr(comp, "upsert_to_mongo", lambda *args, **kwargs: None)
-    monkeypatch.setattr("stock_live_comparison.export_data", lambda: None)
+    monkeypatch.setattr("stock_live_comparison.run_incremental_backup", lambda: None)
 
     comp.run()
     assert comp.latest_file in {tiny_latest, viable_source}
@@ -625,7 +659,7 @@ def test_run_rejects_suspiciously_small_result_set(monkeypatch, tmp_path):
     monkeypatch.setattr(comp, "fetch_data", lambda tickers: [{"Ticker": "ONLY1", "Annual Yield Put Prem": 1, "Annual Yield Call Prem": 2, "Last Update": "2026-04-03 11:00:00"}])
     monkeypatch.setattr(comp, "save_to_excel", lambda *args, **kwargs: None)
     monkeypatch.setattr(comp, "upsert_to_mongo", lambda *args, **kwargs: None)
-    monkeypatch.setattr("stock_live_comparison.export_data", lambda: None)
+    monkeypatch.setattr("stock_live_comparison.run_incremental_backup", lambda: None)
 
     with pytest.raises(RuntimeError, match="Suspicious stock-analysis output"):
         comp.run()
@@ -670,7 +704,7 @@ def test_upsert_to_mongo_writes_canonical_stock_data_by_ticker(monkeypatch):
     )
 
     fake_collection = MagicMock()
-    fake_collection.find_one.return_value = {}
+    fake_collection.find.return_value = []
     fake_db = MagicMock()
     fake_db.collection = fake_collection
     fake_snapshot_db = MagicMock()
@@ -689,32 +723,38 @@ def test_upsert_to_mongo_writes_canonical_stock_data_by_ticker(monkeypatch):
     assert db_ctor.call_args_list[0].kwargs["collection_name"] == "stock_data"
     assert db_ctor.call_args_list[1].kwargs["collection_name"] == "instrument_snapshot"
     assert db_ctor.call_args_list[2].kwargs["collection_name"] == "instrument_price_history"
-    fake_db.upsert_stock_record.assert_called_once()
-    args, kwargs = fake_db.upsert_stock_record.call_args
-    persisted = args[0]
+    fake_collection.find.assert_called_once_with({"Ticker": {"$in": ["AAPL"]}})
+    fake_db.bulk_upsert_records.assert_called_once()
+    args, kwargs = fake_db.bulk_upsert_records.call_args
+    assert len(args[0]) == 1
+    persisted = args[0][0]
     assert persisted["Ticker"] == "AAPL"
     assert "profile" in persisted
     assert "Price Action" in persisted
     assert kwargs["key_fields"] == ("Ticker",)
-    fake_snapshot_db.upsert_stock_record.assert_called_once()
-    snapshot_args, snapshot_kwargs = fake_snapshot_db.upsert_stock_record.call_args
-    persisted_snapshot = snapshot_args[0]
+    fake_snapshot_db.bulk_upsert_records.assert_called_once()
+    snapshot_args, snapshot_kwargs = fake_snapshot_db.bulk_upsert_records.call_args
+    persisted_snapshot = snapshot_args[0][0]
     assert persisted_snapshot["instrument_key"] == "STK:AAPL"
     assert persisted_snapshot["symbol"] == "AAPL"
     assert snapshot_kwargs["key_fields"] == ("instrument_key",)
-    fake_price_db.upsert_stock_record.assert_called_once()
-    hist_args, hist_kwargs = fake_price_db.upsert_stock_record.call_args
-    persisted_hist = hist_args[0]
+    fake_price_db.bulk_upsert_records.assert_called_once()
+    hist_args, hist_kwargs = fake_price_db.bulk_upsert_records.call_args
+    persisted_hist = hist_args[0][0]
     assert persisted_hist["instrument_key"] == "STK:AAPL"
     assert persisted_hist["instrument_key_legacy"] == "AAPL"
     assert persisted_hist["source"] == "stock_live_comparison"
     assert hist_kwargs["key_fields"] == ("instrument_key", "timestamp", "source")
     assert fake_snapshot_collection.create_index.call_count == 2
-    assert fake_price_collection.create_index.call_count == 3
+    assert fake_price_collection.create_index.call_count == 4
     assert any(
         call.args and call.args[0] == [("timestamp", -1)]
         for call in fake_price_collection.create_index.call_args_list
     )
+    assert any(
+        call.args and call.args[0] == [("instrument_key", 1), ("ts", -1)]
+        for call in fake_price_collection.create_index.call_args_list
+    )
 
 
 def test_missing_required_detail_fields_requires_profile_news_key():
@@ -730,3 +770,673 @@ def test_missing_required_detail_fields_requires_profile_news_key():
     }
     missing = StockLiveComparison.missing_required_detail_fields(record)
     assert "profile.news" in missing
+
+
+def test_fetch_data_parallel_workers_preserve_ticker_order(monkeypatch):
+    import stock_live_comparison as slc
+
+    symbols = ["AAA", "BBB", "CCC", "DDD", "EEE"]
+
+    class DummyTicker:
+        def __init__(self, symbol):
+            self.symbol = symbol
+
+        @property
+        def info(self):
+            return {"regularMarketPrice": len(self.symbol)}
+
+    class DummyTickers:
+        def __init__(self):
+            self.tickers = {s: DummyTicker(s) for s in symbols}
+
+    monkeypatch.setattr(slc.yf, "download", lambda *args, **kwargs: {})
+    monkeypatch.setattr(slc.yf, "Tickers", lambda joined: DummyTickers())
+    monkeypatch.setattr(slc.time, "sleep", lambda x: None)
+    monkeypatch.setattr(
+        StockLiveComparison,
+        "fetch_ticker_record",
+        lambda self, ticker, info, ticker_hist, chain: {"Ticker": ticker, "Error": None},
+    )
+
+    comp = StockLiveComparison(symbols, max_fetch_workers=3, min_request_interval_sec=0)
+    records = comp.fetch_data(symbols)
+
+    assert [r["Ticker"] for r in records] == symbols
+
+
+def test_throttle_yf_requests_token_bucket_reserves_slots(monkeypatch):
+    comp = StockLiveComparison(["AAA"], min_request_interval_sec=2.0, request_burst=2)
+    sleeps = []
+    monkeypatch.setattr("stock_live_comparison.time.time", lambda: 1000.0)
+    monkeypatch.setattr("stock_live_comparison.time.sleep", lambda s: sleeps.append(s))
+
+    for _ in range(4):
+        comp.throttle_yf_requests()
+
+    # Two burst tokens are free, then each caller reserves the next 2s slot.
+    assert sleeps == [2.0, 4.0]
+
+
+def test_throttle_yf_requests_respects_429_cooldown(monkeypatch):
+    comp = StockLiveComparison(["AAA"], min_request_interval_sec=0)
+    sleeps = []
+    monkeypatch.setattr("stock_live_comparison.time.time", lambda: 1000.0)
+    monkeypatch.setattr("stock_live_comparison.time.sleep", lambda s: sleeps.append(s))
+    comp._next_request_not_before_ts = 1030.0
+
+    comp.throttle_yf_requests()
+
+    assert sleeps == [30.0]
+
+
+def test_option_chain_memo_fetches_shared_expiry_once(monkeypatch):
+    comp = StockLiveComparison(["AAA"])
+    throttled = []
+    monkeypatch.setattr(comp, "throttle_yf_requests", lambda: throttled.append(1))
+
+    class CountingChain:
+        ticker = "AAA"
+        options = ["2027-01-15"]
+
+        def __init__(self):
+            self.requests = []
+
+        def option_chain(self, exp):
+            self.requests.append(exp)
+
+            class OC:
+                calls = pd.DataFrame({"strike": [110.0], "lastPrice": [4.0]})
+                puts = pd.DataFrame({"strike": [90.0], "lastPrice": [3.0]})
+            return OC()
+
+    chain = CountingChain()
+    comp.get_otm_call_contract(chain, 100, 365)
+    comp.get_otm_put_contract(chain, 100, 365)
+
+    assert chain.requests == ["2027-01-15"]
+    assert comp.option_chain_cache_misses == 1
+    assert comp.option_chain_cache_hits == 1
+    # One token for the expirations download and one for the chain download.
+    assert len(throttled) == 2
+
+    comp.release_option_chains(chain)
+    comp.get_otm_put_contract(chain, 100, 365)
+    assert chain.requests == ["2027-01-15", "2027-01-15"]
+    assert len(throttled) == 4
+
+
+def test_history_cache_roundtrip_uses_parquet_and_tracks_last_date(tmp_path):
+    import stock_live_comparison as slc
+
+    if not slc.PARQUET_AVAILABLE:
+        pytest.skip("pyarrow not installed")
+
+    comp = StockLiveComparison(["AAA"], history_cache_ttl_hours=24, history_cache_dir=tmp_path)
+    legacy = comp.history_cache_path("AAA")
+    legacy.write_text("stale", encoding="utf-8")
+
+    df = pd.DataFrame(
+        {
+            "Open": [1, 2],
+            "High": [1.5, 2.5],
+            "Low": [0.5, 1.5],
+            "Close": [1.2, 2.2],
+            "Volume": [100, 200],
+        },
+        index=pd.to_datetime(["2026-04-02", "2026-04-03"]),
+    )
+    comp.write_cached_history("AAA", df)
+    comp.save_history_manifest()
+
+    assert comp.history_parquet_path("AAA").exists()
+    assert not legacy.exists()
+    loaded = comp.load_cached_history("AAA")
+    assert loaded["Open"].dtype == "float64"
+    assert list(loaded["Close"]) == [1.2, 2.2]
+
+    reopened = StockLiveComparison(["AAA"], history_cache_dir=tmp_path)
+    assert reopened.load_history_manifest()["AAA"]["last_date"] == "2026-04-03"
+
+
+def _history_frame(dates, closes):
+    return pd.DataFrame(
+        {
+            "Open": closes,
+            "High": closes,
+            "Low": closes,
+            "Close": closes,
+            "Adj Close": closes,
+            "Volume": [100] * len(closes),
+        },
+        index=pd.to_datetime(dates),
+    )
+
+
+def _yf_download_frame(frames):
+    """Shape ``{ticker: frame}`` like ``yf.download(..., group_by="ticker")``: MultiIndex columns."""
+    return pd.concat(frames, axis=1)
+
+
+def test_download_history_batched_requests_only_delta_for_stale_cache(monkeypatch, tmp_path):
+    import stock_live_comparison as slc
+
+    calls = []
+
+    def fake_download(batch, **kwargs):
+        calls.append((list(batch), kwargs))
+        return _yf_download_frame(
+            {"AAA": _history_frame(["2026-04-01", "2026-04-02", "2026-04-03"], [10.0, 11.5, 12.0])}
+        )
+
+    monkeypatch.setattr(slc.yf, "download", fake_download)
+    monkeypatch.setattr(slc.time, "sleep", lambda x: None)
+
+    comp = StockLiveComparison(["AAA"], history_cache_ttl_hours=0, history_cache_dir=tmp_path)
+    comp.now = pd.Timestamp("2026-04-03 18:00:00")
+    # The 04-02 bar was cached mid-session at 11.0 and settled at 11.5.
+    comp.write_cached_history("AAA", _history_frame(["2026-04-01", "2026-04-02"], [10.0, 11.0]))
+    monkeypatch.setattr(comp, "is_cache_fresh", lambda path: False)
+
+    out = comp.download_history_batched(["AAA"])
+
+    assert len(calls) == 1
+    assert calls[0][1]["start"] == "2026-04-01"
+    assert "period" not in calls[0][1]
+    assert list(out["AAA"]["Close"]) == [10.0, 11.5, 12.0]
+
+
+def test_merge_history_delta_validates_against_last_settled_bar():
+    cached = _history_frame(["2026-04-01", "2026-04-02"], [10.0, 11.0])
+
+    # A changed partial bar is replaced, not treated as a re-adjustment.
+    merged = StockLiveComparison.merge_history_delta(
+        cached, _history_frame(["2026-04-01", "2026-04-02"], [10.0, 11.7])
+    )
+    assert list(merged["Close"]) == [10.0, 11.7]
+    # A delta that does not reach back to the settled bar forces a refetch.
+    assert StockLiveComparison.merge_history_delta(cached, _history_frame(["2026-04-02"], [11.0])) is None
+    assert StockLiveComparison.merge_history_delta(cached.iloc[:1], _history_frame(["2026-04-01"], [10.0])) is None
+
+
+def test_download_history_batched_full_refetch_when_adjusted_prices_change(monkeypatch, tmp_path):
+    import stock_live_comparison as slc
+
+    calls = []
+
+    def fake_download(batch, **kwargs):
+        calls.append(kwargs)
+        # Settled overlap bar re-adjusted (e.g. a 2:1 split) -> delta must be rejected.
+        return _yf_download_frame({"AAA": _history_frame(["2026-04-01", "2026-04-02", "2026-04-03"], [5.0, 5.5, 6.0])})
+
+    monkeypatch.setattr(slc.yf, "download", fake_download)
+    monkeypatch.setattr(slc.time, "sleep", lambda x: None)
+
+    comp = StockLiveComparison(["AAA"], history_cache_dir=tmp_path)
+    comp.now = pd.Timestamp("2026-04-03 18:00:00")
+    comp.write_cached_history("AAA", _history_frame(["2026-04-01", "2026-04-02"], [10.0, 11.0]))
+    monkeypatch.setattr(comp, "is_cache_fresh", lambda path: False)
+
+    out = comp.download_history_batched(["AAA"])
+
+    assert [("start" in c, c.get("period")) for c in calls] == [(True, None), (False, "1y")]
+    assert list(out["AAA"]["Close"]) == [5.0, 5.5, 6.0]
+
+
+def test_download_history_batched_falls_back_to_full_refetch_when_merge_fails(monkeypatch, tmp_path):
+    import stock_live_comparison as slc
+
+    calls = []
+
+    def fake_download(batch, **kwargs):
+        calls.append(kwargs)
+        return _yf_download_frame({"AAA": _history_frame(["2026-04-01", "2026-04-02", "2026-04-03"], [10.0, 11.5, 12.0])})
+
+    def broken_merge(cached, delta, **kwargs):
+        raise KeyError("Close")
+
+    monkeypatch.setattr(slc.yf, "download", fake_download)
+    monkeypatch.setattr(slc.time, "sleep", lambda x: None)
+    monkeypatch.setattr(StockLiveComparison, "merge_history_delta", staticmethod(broken_merge))
+
+    comp = StockLiveComparison(["AAA"], history_cache_dir=tmp_path)
+    comp.now = pd.Timestamp("2026-04-03 18:00:00")
+    comp.write_cached_history("AAA", _history_frame(["2026-04-01", "2026-04-02"], [10.0, 11.0]))
+    monkeypatch.setattr(comp, "is_cache_fresh", lambda path: False)
+
+    out = comp.download_history_batched(["AAA"])
+
+    assert [c.get("period") for c in calls] == [None, "1y"]
+    assert list(out["AAA"]["Close"]) == [10.0, 11.5, 12.0]
+
+
+def test_extract_ticker_history_selects_single_ticker_from_multiindex():
+    frame = _history_frame(["2026-04-01"], [10.0])
+
+    by_ticker = StockLiveComparison.extract_ticker_history(_yf_download_frame({"AAA": frame}), "AAA", batch_len=1)
+    by_column = StockLiveComparison.extract_ticker_history(
+        _yf_download_frame({"AAA": frame}).swaplevel(axis=1), "AAA", batch_len=1
+    )
+
+    assert list(by_ticker.columns) == list(frame.columns)
+    assert list(by_column.columns) == list(frame.columns)
+    assert StockLiveComparison.extract_ticker_history(frame, "AAA", batch_len=1) is frame
+
+
+def test_upsert_to_mongo_bulk_path_merges_existing_docs(monkeypatch):
+    import mongomock
+    from Ai_Stock_Database import AiStockDatabase
+
+    client = mongomock.MongoClient()
+
+    class MockDatabase(AiStockDatabase):
+        def setup(self):
+            self.client = client
+            self.db = client["stock_analysis"]
+            self.collection = self.db[self.collection_name]
+
+    monkeypatch.setattr("stock_live_comparison.AiStockDatabase", MockDatabase)
+    client["stock_analysis"]["stock_data"].insert_one(
+        {"Ticker": "AAPL", "profile": {"sector": "Technology", "news": []}, "Current Price": 1.0}
+    )
+
+    comp = StockLiveComparison(["AAPL", "MSFT"])
+    df = pd.DataFrame(
+        [
+            {"Ticker": "AAPL", "Current Price": 200.0, "Last Update": "2026-04-03 13:20:00", "profile": {}},
+            {"Ticker": "msft", "Current Price": 400.0, "Last Update": "2026-04-03 13:20:00"},
+        ]
+    )
+    comp.upsert_to_mongo(df)
+
+    stock = client["stock_analysis"]["stock_data"]
+    assert stock.count_documents({}) == 2
+    aapl = stock.find_one({"Ticker": "AAPL"})
+    assert aapl["Current Price"] == 200.0
+    assert aapl["profile"]["sector"] == "Technology"
+    assert stock.find_one({"Ticker": "MSFT"})["Current Price"] == 400.0
+    assert client["stock_analysis"]["instrument_snapshot"].count_documents({}) == 2
+    assert client["stock_analysis"]["instrument_price_history"].count_documents({}) == 2
+
+
+def test_bulk_upsert_records_reports_rows_without_keys():
+    import mongomock
+    from Ai_Stock_Database import AiStockDatabase
+
+    db = AiStockDatabase.__new__(AiStockDatabase)
+    db.collection = mongomock.MongoClient()["x"]["y"]
+
+    failures = db.bulk_upsert_records([{"Ticker": "AAA", "v": 1}, {"v": 2}])
+
+    assert db.collection.count_documents({"Ticker": "AAA"}) == 1
+    assert len(failures) == 1
+    assert failures[0][0] == {"v": 2}
+
+
+def test_bulk_upsert_records_maps_bulk_write_errors_to_rows():
+    from pymongo.errors import BulkWriteError
+    from Ai_Stock_Database import AiStockDatabase
+
+    db = AiStockDatabase.__new__(AiStockDatabase)
+    db.collection = MagicMock()
+    db.collection.bulk_write.side_effect = BulkWriteError(
+        {"writeErrors": [{"index": 1, "errmsg": "duplicate key"}]}
+    )
+
+    failures = db.bulk_upsert_records([{"Ticker": "AAA"}, {"Ticker": "BBB"}])
+
+    ops = db.collection.bulk_write.call_args.args[0]
+    assert len(ops) == 2
+    assert db.collection.bulk_write.call_args.kwargs["ordered"] is False
+    assert failures == [({"Ticker": "BBB"}, "duplicate key")]
+
+
+def test_run_uses_stock_data_as_merge_source_and_upserts_only_refetched(monkeypatch, tmp_path):
+    comp = StockLiveComparison(["AAA", "BBB"])
+    comp.output_dir = tmp_path
+    fresh_row = {
+        "Ticker": "AAA",
+        "Last Update": "2026-04-03 10:00:00",
+        "Annual Yield Put Prem": 1,
+        "Annual Yield Call Prem": 2,
+    }
+    monkeypatch.setattr(comp, "load_existing_records_from_mongo", lambda: (["BBB"], [fresh_row]))
+    fetched = []
+    monkeypatch.setattr(
+        comp,
+        "fetch_data",
+        lambda tickers: fetched.append(list(tickers)) or [
+            {"Ticker": "BBB", "Annual Yield Put Prem": 2, "Annual Yield Call Prem": 4, "Last Update": "2026-04-03 11:00:00"}
+        ],
+    )
+    saved, upserted = [], []
+    monkeypatch.setattr(comp, "save_to_excel", lambda df: saved.append(df))
+    monkeypatch.setattr(comp, "upsert_to_mongo", lambda df: upserted.append(df))
+    monkeypatch.setattr("stock_live_comparison.run_incremental_backup", lambda: None)
+    monkeypatch.setattr("stock_live_comparison.pd.read_excel", MagicMock(side_effect=AssertionError("excel read")))
+
+    summary = comp.run()
+
+    assert fetched == [["BBB"]]
+    assert sorted(saved[0]["Ticker"]) == ["AAA", "BBB"]
+    assert list(upserted[0]["Ticker"]) == ["BBB"]
+    assert summary["existing_source"] == "mongo"
+
+
+def test_load_existing_records_from_mongo_keeps_untracked_rows(monkeypatch):
+    import mongomock
+    import stock_live_comparison as slc
+
+    comp = StockLiveComparison(["BBB"])
+    comp.now = pd.Timestamp("2025-01-01 12:00:00")
+    collection = mongomock.MongoClient()["db"]["stock_data"]
+    collection.insert_many(
+        [
+            {"Ticker": "AAA", "Last Update": "2025-01-01 11:00:00", "profile": {"x": 1}},
+            {"Ticker": "BBB", "Last Update": "2024-01-01 11:00:00"},
+            {"Ticker": "CCC", "Last Update": "2025-01-01 11:00:00"},
+        ]
+    )
+    monkeypatch.setattr(slc, "AiStockDatabase", lambda collection_name: MagicMock(collection=collection))
+    monkeypatch.setattr(StockLiveComparison, "_stock_data_indexes_ensured", True)
+
+    stale, rows = comp.load_existing_records_from_mongo()
+
+    # A single-ticker sync still rewrites the full report: every other row is preserved.
+    assert stale == ["BBB"]
+    assert sorted(r["Ticker"] for r in rows) == ["AAA", "CCC"]
+    assert all("profile" not in r for r in rows)
+
+
+def test_get_stale_tickers_from_mongo_uses_projection_query():
+    import mongomock
+
+    comp = StockLiveComparison(["AAA", "BBB", "CCC"])
+    comp.now = pd.Timestamp("2025-01-01 12:00:00")
+    collection = mongomock.MongoClient()["db"]["stock_data"]
+    complete = {
+        "MA_30": 1, "MA_60": 1, "MA_120": 1, "MA_200": 1,
+        "EMA_20": 1, "HMA_20": 1, "TSMOM_60": 0.1, "RSI_14": 50, "ATR_14": 1,
+        "_PutExpDate_365": "2026-01-01",
+    }
+    collection.insert_many(
+        [
+            {"Ticker": "AAA", "Last Update": "2025-01-01 11:00:00", **complete},
+            {"Ticker": "BBB", "Last Update": "2025-01-01 11:00:00", **complete, "RSI_14": None},
+        ]
+    )
+    StockLiveComparison._stock_data_indexes_ensured = False
+
+    assert comp.get_stale_tickers_from_mongo(collection) == ["BBB", "CCC"]
+    assert "Ticker_1" in collection.index_information()
+
+
+def test_fetch_data_resumes_from_checkpoint_journal(monkeypatch, tmp_path):
+    import stock_live_comparison as slc
+
+    symbols = ["AAA", "BBB", "CCC"]
+    fetched = []
+
+    class DummyTickers:
+        def __init__(self, joined):
+            self.tickers = {s: object() for s in joined.split()}
+
+    monkeypatch.setattr(slc.yf, "download", lambda *args, **kwargs: {})
+    monkeypatch.setattr(slc.yf, "Tickers", DummyTickers)
+    monkeypatch.setattr(slc.time, "sleep", lambda x: None)
+
+    def fake_single(self, t, tickers_obj, hist, idx=1, total=1, max_attempts=4):
+        fetched.append(t)
+        if t == "CCC":
+            return {"Ticker": t, "Error": "boom"}
+        return {"Ticker": t, "Current Price": 1.5, "Last Update": self.now.strftime("%Y-%m-%d %H:%M:%S")}
+
+    monkeypatch.setattr(StockLiveComparison, "fetch_single_ticker", fake_single)
+
+    comp = StockLiveComparison(symbols, max_fetch_workers=1, checkpoint_run_id="scheduled-20260101-abc")
+    comp.checkpoint_dir = tmp_path
+    comp.fetch_data(symbols)
+    assert fetched == symbols
+    # Error rows are not journaled; append a torn line as if the process died mid-write.
+    with comp.checkpoint_path().open("a", encoding="utf-8") as fh:
+        fh.write('{"Ticker": "CC')
+    assert set(comp.load_checkpoint_records()) == {"AAA", "BBB"}
+
+    fetched.clear()
+    resumed = StockLiveComparison(symbols, max_fetch_workers=1, checkpoint_run_id="scheduled-20260101-abc")
+    resumed.checkpoint_dir = tmp_path
+    records = resumed.fetch_data(symbols)
+
+    assert fetched == ["CCC"]
+    assert [r["Ticker"] for r in records] == symbols
+    assert records[0]["Current Price"] == 1.5
+    assert resumed.checkpoint_resumed_count == 2
+
+    resumed.clear_checkpoint()
+    assert not resumed.checkpoint_path().exists()
+
+
+def test_load_checkpoint_records_skips_records_older_than_max_age(tmp_path):
+    comp = StockLiveComparison(["AAA", "BBB", "CCC"], max_age_hours=4, checkpoint_run_id="scheduled-x")
+    comp.checkpoint_dir = tmp_path
+    comp.now = pd.Timestamp("2026-01-02 12:00:00")
+    comp.append_checkpoint_record({"Ticker": "AAA", "Last Update": "2026-01-02 11:00:00"})
+    comp.append_checkpoint_record({"Ticker": "BBB", "Last Update": "2026-01-02 07:00:00"})
+    comp.append_checkpoint_record({"Ticker": "CCC"})
+    # A later stale copy of a ticker supersedes the earlier fresh one.
+    comp.append_checkpoint_record({"Ticker": "AAA", "Last Update": "2026-01-01 11:00:00"})
+    comp.append_checkpoint_record({"Ticker": "BBB", "Last Update": "2026-01-02 11:30:00"})
+
+    assert set(comp.load_checkpoint_records()) == {"BBB"}
+
+
+def test_checkpoint_disabled_without_run_id(tmp_path):
+    comp = StockLiveComparison(["AAA"])
+    comp.checkpoint_dir = tmp_path
+    comp.append_checkpoint_record({"Ticker": "AAA"})
+    assert comp.checkpoint_path() is None
+    assert comp.load_checkpoint_records() == {}
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_adaptive_rate_aimd_increases_on_success_and_halves_on_429():
+    comp = StockLiveComparison(
+        ["AAA"],
+        min_request_interval_sec=2.0,
+        adaptive_rate=True,
+        min_adaptive_interval_sec=0.5,
+        max_adaptive_interval_sec=5.0,
+    )
+    for _ in range(comp.ADAPTIVE_RATE_WINDOW):
+        comp.record_rate_success()
+    # 0.5 req/s + 0.05 req/s additive step.
+    assert comp.min_request_interval_sec == pytest.approx(1.0 / 0.55)
+    assert comp.rate_increase_count == 1
+
+    before = comp.min_request_interval_sec
+    assert comp.record_rate_limited() == 1
+    assert comp.min_request_interval_sec == pytest.approx(before * 2)
+    # Another 429 inside the same cooldown window is counted but not applied.
+    assert comp.record_rate_limited() == 2
+    assert comp.min_request_interval_sec == pytest.approx(before * 2)
+    assert comp.rate_decrease_count == 1
+    comp._rate_decrease_hold_until_ts = 0.0  # window elapsed
+    comp.record_rate_limited()
+    assert comp.min_request_interval_sec == 5.0  # capped
+
+    snapshot = comp.rate_controller_snapshot()
+    assert snapshot["adaptive_rate_enabled"] is True
+    assert snapshot["request_interval_sec"] == 5.0
+    assert snapshot["rate_limited_count"] == 3
+    assert snapshot["rate_success_count"] == comp.ADAPTIVE_RATE_WINDOW
+
+
+def test_fixed_rate_counts_outcomes_without_changing_interval():
+    comp = StockLiveComparison(["AAA"], min_request_interval_sec=1.5)
+    for _ in range(20):
+        comp.record_rate_success()
+    comp.record_rate_limited()
+    assert comp.min_request_interval_sec == 1.5
+    assert comp.rate_controller_snapshot()["rate_limited_count"] == 1
+
+
+def test_fetch_data_sharded_runs_shards_concurrently_and_keeps_order(monkeypatch):
+    import threading
+
+    symbols = ["A1", "A2", "B1", "B2", "C1"]
+    seen_shards = []
+    barrier = threading.Barrier(3, timeout=5)
+
+    def fake_fetch(self, tickers):
+        seen_shards.append(list(tickers))
+        barrier.wait()  # all three shards must be in flight at once
+        # Pretend the first ticker of every shard came from the checkpoint journal.
+        return [{"Ticker": t} for t in tickers], 1
+
+    monkeypatch.setattr(StockLiveComparison, "fetch_data_resumable", fake_fetch)
+    comp = StockLiveComparison(symbols)
+
+    records = comp.fetch_data_sharded(symbols, shard_size=2, shard_workers=3)
+
+    assert [r["Ticker"] for r in records] == symbols
+    assert sorted(seen_shards) == [["A1", "A2"], ["B1", "B2"], ["C1"]]
+    assert comp.checkpoint_resumed_count == 3
+
+
+def test_fetch_data_sharded_single_worker_is_plain_fetch(monkeypatch):
+    calls = []
+    monkeypatch.setattr(StockLiveComparison, "fetch_data", lambda self, tickers: calls.append(tickers) or [])
+    StockLiveComparison(["A", "B", "C"]).fetch_data_sharded(["A", "B", "C"], shard_size=1, shard_workers=1)
+    assert calls == [["A", "B", "C"]]
+
+
+def test_rate_state_carries_cooldown_and_interval_to_next_instance():
+    first = StockLiveComparison(["A"], min_request_interval_sec=1.5, adaptive_rate=True)
+    first.record_rate_limited()
+    first._next_request_not_before_ts = 5000.0
+    first._bucket_tokens = -2.0
+
+    second = StockLiveComparison(["B"], min_request_interval_sec=1.5, adaptive_rate=True)
+    second.import_rate_state(first.export_rate_state())
+
+    assert second.min_request_interval_sec == first.min_request_interval_sec
+    assert second._next_request_not_before_ts == 5000.0
+    assert second._bucket_tokens == -2.0
+    assert second._consecutive_429 == 1
+
+
+def _price_action_history(rows=60):
+    import numpy as np
+
+    idx = pd.date_range("2026-01-01", periods=rows, freq="D")
+    close = 100 + 10 * np.sin(np.linspace(0, 6 * np.pi, rows))
+    return pd.DataFrame(
+        {"Open": close, "High": close + 1, "Low": close - 1, "Close": close + 0.5},
+        index=idx,
+    )
+
+
+def test_price_action_stage_matches_inline_analysis():
+    from app.services.price_action_service import PriceActionService
+
+    hist = {"AAA": _price_action_history(), "BBB": None}
+    comp = StockLiveComparison(["AAA", "BBB"], price_action_workers=2)
+    comp.PRICE_ACTION_POOL_MIN_TICKERS = 2
+    with comp.price_action_stage():
+        comp.submit_price_action(hist)
+        assert set(comp._price_action_futures) == {"AAA"}
+        pooled = comp.collect_price_action("AAA", hist["AAA"])
+    assert comp._price_action_pool is None
+    assert pooled == PriceActionService.analyze_ticker(hist["AAA"])
+
+
+def test_price_action_stage_stays_inline_for_small_runs(monkeypatch):
+    import stock_live_comparison as slc
+
+    monkeypatch.setattr(slc, "ProcessPoolExecutor", lambda *a, **k: pytest.fail("pool started"))
+    comp = StockLiveComparison(["AAA", "BBB"], price_action_workers=8)
+    with comp.price_action_stage():
+        comp.submit_price_action({"AAA": _price_action_history()})
+        assert comp._price_action_pool is None
+    assert comp._price_action_futures == {}
+
+
+def test_collect_price_action_without_pool_runs_inline(monkeypatch):
+    comp = StockLiveComparison(["AAA"])
+    comp.submit_price_action({"AAA": _price_action_history()})
+    assert comp._price_action_futures == {}
+    monkeypatch.setattr(
+        "stock_live_comparison.PriceActionService.analyze_ticker",
+        staticmethod(lambda df: {"trend": "inline"}),
+    )
+    assert comp.collect_price_action("AAA", _price_action_history()) == {"trend": "inline"}
+
+
+def test_download_history_group_bisects_failed_batch_and_isolates_bad_symbol(monkeypatch):
+    import stock_live_comparison as slc
+
+    calls = []
+
+    def fake_download(batch, **kwargs):
+        calls.append(list(batch))
+        if "BAD" in batch:
+            raise ValueError("boom")
+        return _yf_download_frame({t: _history_frame(["2026-04-01"], [1.0]) for t in batch})
+
+    monkeypatch.setattr(slc.yf, "download", fake_download)
+    monkeypatch.setattr(slc.time, "sleep", lambda x: None)
+
+    comp = StockLiveComparison(["A"], download_batch_size=4, batch_pause_sec=0, min_request_interval_sec=0)
+    out = comp.download_history_group(["A", "B", "BAD", "C"], label="full", period="1y")
+
+    assert calls == [["A", "B", "BAD", "C"], ["A", "B"], ["BAD", "C"], ["BAD"], ["C"]]
+    assert out["BAD"] is None
+    # "C" succeeded as a singleton batch and still gets flat OHLC columns.
+    assert all(list(out[t]["Close"]) == [1.0] for t in ("A", "B", "C"))
+    summary = comp.history_batch_summary()
+    assert summary["history_batch_splits"] == 2
+    assert summary["history_batch_failed_tickers"] == 1
+    assert [m["outcome"] for m in summary["history_batches"]] == ["split", "ok", "split", "failed", "ok"]
+    assert [m["empty_tickers"] for m in summary["history_batches"] if m["outcome"] == "ok"] == [0, 0]
+
+
+def test_download_history_batched_does_not_cache_frames_without_close(monkeypatch, tmp_path):
+    import stock_live_comparison as slc
+
+    def fake_download(batch, **kwargs):
+        # A frame whose columns do not resolve to a flat "Close" (e.g. unknown ticker level).
+        return _yf_download_frame({"OTHER": _history_frame(["2026-04-01"], [1.0])})
+
+    monkeypatch.setattr(slc.yf, "download", fake_download)
+    monkeypatch.setattr(slc.time, "sleep", lambda x: None)
+
+    comp = StockLiveComparison(["AAA"], batch_pause_sec=0, min_request_interval_sec=0, history_cache_dir=tmp_path)
+    out = comp.download_history_batched(["AAA"])
+
+    assert out["AAA"] is None
+    assert not comp.history_parquet_path("AAA").exists()
+    assert comp.history_batch_metrics[-1]["empty_tickers"] == 1
+
+
+def test_download_history_group_grows_batches_while_successful(monkeypatch):
+    import stock_live_comparison as slc
+
+    sizes = []
+
+    def fake_download(batch, **kwargs):
+        sizes.append(len(batch))
+        return _yf_download_frame({t: _history_frame(["2026-04-01"], [1.0]) for t in batch})
+
+    monkeypatch.setattr(slc.yf, "download", fake_download)
+    monkeypatch.setattr(slc.time, "sleep", lambda x: None)
+
+    comp = StockLiveComparison(
+        ["A"],
+        download_batch_size=2,
+        max_download_batch_size=5,
+        batch_pause_sec=0,
+        min_request_interval_sec=0,
+    )
+    comp.download_history_group([f"T{i}" for i in range(20)], label="full", period="1y")
+
+    assert sizes == [2, 3, 4, 5, 5, 1]
+    assert comp.history_batch_summary()["history_batch_max_size"] == 5
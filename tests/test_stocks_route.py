@@ -0,0 +1,118 @@
+import asyncio
+from unittest.mock import patch
+
+import mongomock
+import pytest
+from fastapi import HTTPException, Response
+
+from app.api import routes
+from app.models import User
+from app.services.stock_query import cursor_filter, decode_cursor, encode_cursor
+
+USER = User(username="u", role="admin", disabled=False)
+
+
+@pytest.fixture
+def stock_db():
+    client = mongomock.MongoClient()
+    db = client.get_default_database("stock_analysis")
+    db.stock_data.insert_many(
+        [
+            {"Ticker": "MSFT", "Current Price": 400.0, "profile": {"x": 1}, "_last_persisted_at": "2026-04-03 10:00:00"},
+            {"Ticker": "AAPL", "Current Price": 200.0, "profile": {"x": 1}, "_last_persisted_at": "2026-04-03 10:00:00"},
+            {"Ticker": "AMD", "Current Price": None, "profile": {"x": 1}, "_last_persisted_at": "2026-04-03 09:00:00"},
+            {"Ticker": "NVDA", "Current Price": 900.0, "profile": {"x": 1}, "_last_persisted_at": "2026-04-03 11:00:00"},
+        ]
+    )
+    with patch("app.api.routes.MongoClient", return_value=client):
+        yield db
+
+
+def _get(**kwargs):
+    response = Response()
+    params = {
+        "limit": None, "cursor": None, "fields": None, "sort": None, "order": "asc",
+        "tickers": None, "search": None, "if_none_match": None,
+    }
+    params.update(kwargs)
+    result = asyncio.run(routes.get_stocks(USER, response, **params))
+    return result, response
+
+
+def test_get_stocks_without_params_returns_every_field_sorted_by_ticker(stock_db):
+    rows, response = _get()
+
+    assert [r["Ticker"] for r in rows] == ["AAPL", "AMD", "MSFT", "NVDA"]
+    assert "profile" in rows[0] and "_id" not in rows[0]
+    assert response.headers["ETag"].startswith('W/"')
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_get_stocks_grid_projection_drops_nested_payloads(stock_db):
+    rows, _ = _get(fields="grid")
+
+    assert "profile" not in rows[0]
+    assert rows[0]["Current Price"] == 200.0
+
+
+def test_get_stocks_paginates_with_keyset_cursor_on_sort_field(stock_db):
+    seen = []
+    cursor = None
+    while True:
+        rows, response = _get(limit=1, cursor=cursor, sort="Current Price", order="desc", fields="Ticker")
+        seen.extend(r["Ticker"] for r in rows)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    # Nulls sort last descending.
+    assert seen == ["NVDA", "MSFT", "AAPL", "AMD"]
+
+
+def test_get_stocks_filters_by_tickers_and_prefix(stock_db):
+    rows, _ = _get(tickers="aapl,amd,nvda", search="a")
+    assert [r["Ticker"] for r in rows] == ["AAPL", "AMD"]
+
+
+def test_get_stocks_returns_304_until_a_row_is_persisted(stock_db):
+    _, first = _get(fields="grid")
+    etag = first.headers["ETag"]
+
+    not_modified, _ = _get(fields="grid", if_none_match=etag)
+    assert not_modified.status_code == 304
+
+    _, other_shape = _get(fields="Ticker")
+    assert other_shape.headers["ETag"] != etag
+
+    stock_db.stock_data.update_one({"Ticker": "AMD"}, {"$set": {"_last_persisted_at": "2026-04-03 12:00:00"}})
+    rows, changed = _get(fields="grid", if_none_match=etag)
+    assert isinstance(rows, list) and changed.headers["ETag"] != etag
+
+
+@pytest.mark.parametrize("kwargs", [{"order": "sideways"}, {"cursor": "not-a-cursor"}, {"fields": "$where"}])
+def test_get_stocks_rejects_invalid_parameters(stock_db, kwargs):
+    with pytest.raises(HTTPException) as exc:
+        _get(**kwargs)
+    assert exc.value.status_code == 400
+
+
+def test_cursor_filter_ascending_null_band():
+    cursor = decode_cursor(encode_cursor({"Ticker": "AMD", "Current Price": None}, "Current Price"))
+    assert cursor_filter(cursor, "Current Price", 1) == {
+        "$or": [
+            {"Current Price": None, "Ticker": {"$gt": "AMD"}},
+            {"Current Price": {"$ne": None}},
+        ]
+    }
+
+
+def test_get_stocks_repeat_request_is_served_from_response_cache(stock_db, monkeypatch):
+    from app.config import settings
+    from app.services.async_repository import AsyncMongoRepository
+
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", True)
+    _, first = _get(fields="grid")
+    with patch.object(AsyncMongoRepository, "aggregate", side_effect=AssertionError("cache miss")):
+        not_modified, _ = _get(fields="grid", if_none_match=first.headers["ETag"])
+
+    assert not_modified.status_code == 304
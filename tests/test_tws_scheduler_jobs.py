@@ -100,6 +100,59 @@ def test_run_tws_position_sync_upserts_live_snapshot(monkeypatch):
     assert kwargs["upsert"] is True
 
 
+def test_run_tws_position_sync_publishes_holdings_latest_pointer(monkeypatch):
+    import mongomock
+
+    mongo = mongomock.MongoClient()
+    monkeypatch.setattr(jobs, "MongoClient", MagicMock(return_value=mongo))
+    monkeypatch.setattr(jobs.settings, "IBKR_TWS_ENABLED", True)
+    monkeypatch.setattr(
+        jobs,
+        "get_ibkr_tws_service",
+        lambda: FakeTwsService(positions=[{"account": "DU123456", "symbol": "AAPL", "sec_type": "STK", "position": 10}]),
+    )
+
+    jobs.run_tws_position_sync()
+
+    db = mongo.get_default_database("stock_analysis")
+    stored = db.ibkr_holdings.find_one()
+    for key in ("latest", "tws"):
+        pointer = db.holdings_latest.find_one({"_id": key})
+        assert pointer["snapshot_id"] == stored["snapshot_id"]
+        assert pointer["source"] == "tws"
+        assert pointer["position_count"] == 1
+
+
+def test_run_tws_position_sync_writes_only_on_position_changes(monkeypatch):
+    import mongomock
+    from datetime import datetime, timedelta, timezone
+
+    mongo = mongomock.MongoClient()
+    monkeypatch.setattr(jobs, "MongoClient", MagicMock(return_value=mongo))
+    monkeypatch.setattr(jobs.settings, "IBKR_TWS_ENABLED", True)
+    ticks = iter(datetime(2026, 3, 10, 15, 0, tzinfo=timezone.utc) + timedelta(seconds=30 * i) for i in range(10))
+    monkeypatch.setattr(jobs, "_utc_now", lambda: next(ticks))
+    position = {"account": "DU1", "symbol": "AAPL", "sec_type": "STK", "position": 10}
+    service = FakeTwsService(positions=[position])
+    monkeypatch.setattr(jobs, "get_ibkr_tws_service", lambda: service)
+    db = mongo.get_default_database("stock_analysis")
+
+    jobs.run_tws_position_sync()
+    jobs.run_tws_position_sync()  # unchanged: no new snapshot, pointer heartbeat only
+    assert db.ibkr_holdings.count_documents({}) == 1
+    pointer = db.holdings_latest.find_one({"_id": "tws"})
+    assert pointer["last_tws_update"] > pointer["date"]
+    assert db.holdings_latest.find_one({"_id": "latest"})["last_tws_update"] == pointer["last_tws_update"]
+    # The heartbeat does not invalidate cached holdings responses.
+    assert db.system_config.find_one({"_id": "response_cache_versions"})["holdings"] == 1
+
+    service._positions = [dict(position, position=12)]
+    jobs.run_tws_position_sync()  # quantity change -> new snapshot
+    assert len(db.ibkr_holdings.distinct("snapshot_id")) == 2
+    assert db.system_config.find_one({"_id": "response_cache_versions"})["holdings"] == 2
+    assert db.holdings_latest.find_one({"_id": "tws"})["snapshot_id"] != pointer["snapshot_id"]
+
+
 def test_run_tws_position_sync_keeps_multiple_option_legs(monkeypatch):
     mock_db = MagicMock()
     mock_client = MagicMock()